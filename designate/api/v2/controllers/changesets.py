@@ -0,0 +1,115 @@
+# Copyright 2014 Hewlett-Packard Development Company, L.P.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import pecan
+
+from designate.openstack.common import log as logging
+from designate import exceptions
+from designate import schema
+from designate import utils
+from designate.api.v2.controllers import rest
+from designate.api.v2.views import changesets as changesets_view
+from designate.api.v2.views import recordsets as recordsets_view
+from designate.objects import Change
+from designate.objects import ChangeList
+from designate.objects import RecordSet
+
+
+LOG = logging.getLogger(__name__)
+
+
+class ChangeSetsController(rest.RestController):
+    _view = changesets_view.ChangeSetsView()
+    _recordsets_view = recordsets_view.RecordSetsView()
+    _resource_schema = schema.Schema('v2', 'changeset')
+    _recordset_schema = schema.Schema('v2', 'recordset')
+
+    @pecan.expose(template='json:', content_type='application/json')
+    @utils.validate_uuid('zone_id')
+    def post_all(self, zone_id):
+        """Apply ChangeSet"""
+        request = pecan.request
+        response = pecan.response
+        context = request.environ['context']
+
+        body = request.body_dict
+
+        # Validate the request conforms to the schema
+        self._resource_schema.validate(body)
+
+        zone = self.central_api.get_domain(context, zone_id)
+
+        # Convert from APIv2 -> Central format
+        changes = ChangeList()
+
+        for item in body['changeset']:
+            changes.append(self._load_change(context, request, zone, item))
+
+        # Apply every change at once
+        changes = self.central_api.apply_changeset(context, zone_id, changes)
+
+        response.status_int = 200
+
+        return self._view.list(context, request, changes, [zone_id])
+
+    def _load_change(self, context, request, zone, item):
+        action = item['action']
+
+        if action == 'CREATE':
+            if 'recordset' not in item:
+                raise exceptions.BadRequest(
+                    'A recordset is required to create a recordset')
+
+            body = {'recordset': item['recordset']}
+            self._recordset_schema.validate(body)
+
+            values = self._recordsets_view.load(context, request, body)
+
+            # SOA recordsets cannot be created manually
+            if values['type'] == 'SOA':
+                raise exceptions.BadRequest(
+                    'Creating a SOA recordset is not allowed')
+
+            return Change(action=action, recordset=RecordSet(**values))
+
+        if 'id' not in item:
+            raise exceptions.BadRequest(
+                'A recordset id is required to update or delete a recordset')
+
+        # Fetch the existing recordset
+        recordset = self.central_api.get_recordset(context, zone['id'],
+                                                   item['id'])
+
+        # SOA recordsets cannot be changed manually
+        if recordset['type'] == 'SOA':
+            raise exceptions.BadRequest(
+                'Changing a SOA recordset is not allowed')
+
+        # NS recordsets at the zone root cannot be changed manually
+        if recordset['type'] == 'NS' and recordset['name'] == zone['name']:
+            raise exceptions.BadRequest(
+                'Changing a root zone NS record is not allowed')
+
+        if action == 'UPDATE':
+            body = {'recordset': item.get('recordset', {})}
+
+            # Validate the new set of data
+            recordset_data = self._recordsets_view.show(context, request,
+                                                        recordset)
+            recordset_data = utils.deep_dict_merge(recordset_data, body)
+            self._recordset_schema.validate(recordset_data)
+
+            recordset.update(self._recordsets_view.load(context, request,
+                                                        body))
+
+        return Change(action=action, recordset=recordset)
@@ -22,6 +22,7 @@ from designate import utils
 from designate import schema
 from designate import dnsutils
 from designate.api.v2.controllers import rest
+from designate.api.v2.controllers import changesets
 from designate.api.v2.controllers import nameservers
 from designate.api.v2.controllers import recordsets
 from designate.api.v2.views import zones as zones_view
@@ -37,6 +38,7 @@ class ZonesController(rest.RestController):
 
     nameservers = nameservers.NameServersController()
     recordsets = recordsets.RecordSetsController()
+    changesets = changesets.ChangeSetsController()
 
     @pecan.expose(template='json:', content_type='application/json')
     @pecan.expose(template=None, content_type='text/dns')
@@ -18,6 +18,7 @@ import urllib
 from oslo.config import cfg
 
 from designate import exceptions
+from designate import utils
 from designate.openstack.common import log as logging
 
 
@@ -162,11 +163,28 @@ class BaseView(object):
     def _get_next_href(self, request, items, parents=None):
         # Prepare the extra params
         extra_params = {
-            'marker': items[-1]['id']
+            'marker': self._get_marker(request, items[-1])
         }
 
         return self._get_collection_href(request, parents, extra_params)
 
+    def _get_marker(self, request, item):
+        """
+        Get a marker for the page following item
+
+        The marker holds the item's values for the sort keys, so the next page
+        can be found without first looking up the item.
+        """
+        sort_keys = utils.get_paging_keys(request.GET.get('sort_key'))
+
+        try:
+            values = [item[sort_key] for sort_key in sort_keys]
+        except (KeyError, AttributeError):
+            # Items which are not stored rows can only be found by id
+            return item['id']
+
+        return utils.encode_marker(sort_keys, values)
+
     def _get_previous_href(self, request, items, parents=None):
         # Prepare the extra params
         extra_params = {
@@ -106,6 +106,17 @@ class Backend(DriverPlugin):
     def delete_record(self, context, domain, recordset, record):
         """Delete a DNS record"""
 
+    def apply_changes(self, context, domain, changes):
+        """
+        Apply many changes to a DNS domain at once
+
+        This is the default, naive, implementation, which makes one call per
+        change. Each change is a tuple of the name of the Backend method to
+        call, and the arguments following context and domain.
+        """
+        for method, args in changes:
+            getattr(self, method)(context, domain, *args)
+
     def sync_domain(self, context, domain, rdata):
         """
         Re-Sync a DNS domain
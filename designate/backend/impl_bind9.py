@@ -106,6 +106,12 @@ class Bind9Backend(base.Backend):
         LOG.debug('Delete Record')
         self._sync_domain(domain)
 
+    def apply_changes(self, context, domain, changes):
+        LOG.debug('Apply Changes')
+        # The zone file is rewritten from scratch, a single sync covers every
+        # change.
+        self._sync_domain(domain)
+
     def _rndc_base(self):
         rndc_call = [
             'rndc',
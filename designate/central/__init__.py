@@ -44,6 +44,49 @@ cfg.CONF.register_opts([
     cfg.StrOpt('default_pool_id',
                default='794ccc2c-d751-44fe-b57f-8894c9f5c842',
                help="The name of the default pool"),
+    cfg.IntOpt('journal-retention', default=86400,
+               help='The number of seconds to keep domain change journal '
+                    'entries for, allowing slaves to request incremental '
+                    'zone transfers. A 0 disables the journal.'),
+    cfg.IntOpt('ns-update-batch-size', default=500,
+               help='The number of zones to update in each transaction when '
+                    'the NS records of every zone change'),
+    cfg.IntOpt('tld-refresh-interval', default=60,
+               help='The number of seconds between checks for TLDs changed '
+                    'by other central services'),
+    cfg.StrOpt('lock-driver', default='local',
+               help='The driver used to lock domains while they are changed, '
+                    'one of local, file or database'),
+    cfg.IntOpt('lock-timeout', default=30,
+               help='The number of seconds to wait for a database domain '
+                    'lock'),
+    cfg.FloatOpt('lock-wait-warning', default=5.0,
+                 help='Log a warning when waiting longer than this number of '
+                      'seconds for a domain lock'),
+    cfg.IntOpt('notification-queue-size', default=1000,
+               help='The maximum number of notifications waiting to be '
+                    'published in the background. A 0 publishes them before '
+                    'each request returns.'),
+    cfg.IntOpt('notification-batch-size', default=100,
+               help='The number of waiting notifications which triggers '
+                    'publishing them'),
+    cfg.FloatOpt('notification-flush-interval', default=0.5,
+                 help='The number of seconds between publishing waiting '
+                      'notifications'),
+    cfg.StrOpt('notification-overflow', default='block',
+               help='What to do with a notification when the queue is '
+                    'full: block to publish the queue, drop-oldest or '
+                    'drop-newest'),
+    cfg.IntOpt('notification-stats-interval', default=60,
+               help='The number of seconds between logging the notification '
+                    'queue depth and publishing counters. A 0 disables '
+                    'logging them.'),
+    cfg.IntOpt('sync-workers', default=10,
+               help='The number of domains synced at once when syncing '
+                    'every domain'),
+    cfg.IntOpt('sync-batch-size', default=100,
+               help='The number of domains synced between checkpoints when '
+                    'syncing every domain'),
 ], group='service:central')
 
 # TODO(vinod): Remove the following code once pool manager calls mdns.
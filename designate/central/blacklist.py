@@ -0,0 +1,92 @@
+# Copyright 2014 Hewlett-Packard Development Company, L.P.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import re
+import threading
+
+from designate.openstack.common import log as logging
+from designate.i18n import _LW
+
+
+LOG = logging.getLogger(__name__)
+
+# Patterns which refer to their own groups, or set global flags, can not be
+# safely combined with others. Group numbers shift within the combined
+# expression, and inline flags would apply to every pattern.
+_UNCOMBINABLE = re.compile(r'\\[1-9]|\(\?P=|\(\?[iLmsux]+\)')
+
+
+class BlacklistMatcher(object):
+    """
+    Matches domain names against every Blacklist at once
+
+    The blacklist patterns are compiled into a single alternation, which is
+    only rebuilt when the blacklists are changed by this service, or when the
+    version reported by storage shows they were changed elsewhere.
+    """
+    def __init__(self, storage):
+        self.storage = storage
+
+        self._lock = threading.Lock()
+        self._version = None
+        self._regexes = []
+
+    def invalidate(self):
+        """Force the blacklists to be reloaded on the next match"""
+        self._version = None
+
+    def match(self, context, domain_name):
+        """
+        Check whether domain_name matches any Blacklist
+
+        :param context: RPC Context.
+        :param domain_name: The domain name to check.
+        """
+        version = self.storage.get_blacklists_version(context)
+
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    self._load(context, version)
+
+        return any(regex.search(domain_name) for regex in self._regexes)
+
+    def _load(self, context, version):
+        blacklists = self.storage.find_blacklists(context)
+
+        combined = []
+        regexes = []
+
+        for blacklist in blacklists:
+            try:
+                regex = re.compile(blacklist.pattern)
+            except re.error:
+                LOG.warn(_LW("Ignoring invalid blacklist pattern "
+                             "'%(pattern)s'") % {'pattern': blacklist.pattern})
+                continue
+
+            if _UNCOMBINABLE.search(blacklist.pattern):
+                regexes.append(regex)
+            else:
+                combined.append(regex)
+
+        if combined:
+            try:
+                regexes.insert(0, re.compile('|'.join(
+                    '(?:%s)' % regex.pattern for regex in combined)))
+            except (re.error, AssertionError):
+                # Python limits the number of groups in a single expression
+                regexes.extend(combined)
+
+        self._regexes = regexes
+        self._version = version
@@ -0,0 +1,146 @@
+# Copyright 2014 Hewlett-Packard Development Company, L.P.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import collections
+import threading
+import time
+
+import eventlet
+from oslo.config import cfg
+
+from designate.openstack.common import log as logging
+from designate.i18n import _LE
+from designate.i18n import _LI
+from designate.i18n import _LW
+
+
+LOG = logging.getLogger(__name__)
+
+
+class NotificationEmitter(object):
+    """
+    Publishes notifications in the background, in batches
+
+    Notifications are queued by emit, and published from the queue every
+    notification_flush_interval seconds, or as soon as
+    notification_batch_size of them are waiting. When the queue is full the
+    notification_overflow policy decides whether the caller publishes the
+    queue itself (block), or a notification is dropped (drop-oldest,
+    drop-newest).
+    """
+    def __init__(self, notifier):
+        self.notifier = notifier
+
+        self._queue = collections.deque()
+        self._lock = threading.Lock()
+        self._flush_pending = False
+
+        # Counters, for reporting
+        self.published = 0
+        self.failed = 0
+        self.dropped = 0
+        self.publish_time = 0.0
+        self.max_publish_time = 0.0
+
+    @property
+    def queue_depth(self):
+        return len(self._queue)
+
+    def get_stats(self):
+        """Get the counters of this emitter"""
+        return {
+            'queue_depth': self.queue_depth,
+            'published': self.published,
+            'failed': self.failed,
+            'dropped': self.dropped,
+            'publish_time': self.publish_time,
+            'max_publish_time': self.max_publish_time,
+        }
+
+    def log_stats(self):
+        """Log the counters of this emitter, for operators to monitor"""
+        LOG.info(_LI("Notifications: %(queue_depth)d queued, %(published)d "
+                     "published, %(failed)d failed, %(dropped)d dropped. "
+                     "Publishing took %(publish_time).3f seconds in total, "
+                     "at most %(max_publish_time).3f seconds each") %
+                 self.get_stats())
+
+    def emit(self, context, event_type, payload):
+        """Queue a notification to be published"""
+        conf = cfg.CONF['service:central']
+
+        if conf.notification_queue_size <= 0:
+            # Background publishing is disabled
+            self._publish(context, event_type, payload)
+            return
+
+        if len(self._queue) >= conf.notification_queue_size:
+            if conf.notification_overflow == 'drop-newest':
+                self._drop(event_type)
+                return
+
+            elif conf.notification_overflow == 'drop-oldest':
+                self._drop(self._queue.popleft()[1])
+
+            else:
+                self.flush()
+
+        self._queue.append((context, event_type, payload))
+
+        if (len(self._queue) >= conf.notification_batch_size and
+                not self._flush_pending):
+            self._flush_pending = True
+            eventlet.spawn_n(self.flush)
+
+    def flush(self):
+        """Publish every queued notification, in order"""
+        batch_size = cfg.CONF['service:central'].notification_batch_size
+
+        with self._lock:
+            self._flush_pending = False
+
+            while self._queue:
+                start = time.time()
+                count = 0
+
+                while self._queue and count < batch_size:
+                    self._publish(*self._queue.popleft())
+                    count += 1
+
+                LOG.debug('Published %(count)d notifications in %(time).3f '
+                          'seconds, %(depth)d queued',
+                          {'count': count, 'time': time.time() - start,
+                           'depth': len(self._queue)})
+
+    def _publish(self, context, event_type, payload):
+        start = time.time()
+
+        try:
+            self.notifier.info(context, event_type, payload)
+        except Exception:
+            self.failed += 1
+            LOG.exception(_LE("Failed to publish %(type)s notification") %
+                          {'type': event_type})
+            return
+        finally:
+            elapsed = time.time() - start
+
+            self.publish_time += elapsed
+            self.max_publish_time = max(self.max_publish_time, elapsed)
+
+        self.published += 1
+
+    def _drop(self, event_type):
+        self.dropped += 1
+        LOG.warn(_LW("Notification queue is full, dropped a %(type)s "
+                     "notification") % {'type': event_type})
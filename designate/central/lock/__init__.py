@@ -0,0 +1,26 @@
+# Copyright 2014 Hewlett-Packard Development Company, L.P.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+from designate.openstack.common import log as logging
+from designate.central.lock.base import ZoneLock
+
+LOG = logging.getLogger(__name__)
+
+
+def get_zone_lock(lock_driver):
+    """Return the zone lock class from the provided driver name"""
+    LOG.debug("Loading zone lock driver: %s" % lock_driver)
+
+    cls = ZoneLock.get_driver(lock_driver)
+
+    return cls()
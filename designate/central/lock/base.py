@@ -0,0 +1,61 @@
+# Copyright 2014 Hewlett-Packard Development Company, L.P.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import abc
+import contextlib
+import time
+
+import six
+from oslo.config import cfg
+
+from designate.openstack.common import log as logging
+from designate.i18n import _LW
+from designate.plugin import DriverPlugin
+
+
+LOG = logging.getLogger(__name__)
+
+
+@six.add_metaclass(abc.ABCMeta)
+class ZoneLock(DriverPlugin):
+    """Base class for zone lock plugins"""
+    __plugin_ns__ = 'designate.central.lock'
+    __plugin_type__ = 'lock'
+
+    @contextlib.contextmanager
+    def lock(self, domain_id):
+        """
+        Hold the lock for a domain, reporting how long it took to acquire
+
+        :param domain_id: ID of the domain to lock, or None while a domain is
+                          being created.
+        """
+        start = time.time()
+
+        with self._lock(domain_id):
+            waited = time.time() - start
+
+            if waited >= cfg.CONF['service:central'].lock_wait_warning:
+                LOG.warn(_LW("Waited %(waited).3f seconds for the lock on "
+                             "domain %(domain_id)s") %
+                         {'waited': waited, 'domain_id': domain_id})
+            else:
+                LOG.debug('Waited %(waited).3f seconds for the lock on '
+                          'domain %(domain_id)s',
+                          {'waited': waited, 'domain_id': domain_id})
+
+            yield
+
+    @abc.abstractmethod
+    def _lock(self, domain_id):
+        """Return a context manager which holds the lock for a domain"""
@@ -0,0 +1,116 @@
+# Copyright 2014 Hewlett-Packard Development Company, L.P.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import contextlib
+import hashlib
+import struct
+import time
+
+from oslo.config import cfg
+from oslo.concurrency import lockutils
+from sqlalchemy import text
+
+from designate.openstack.common import log as logging
+from designate.i18n import _LW
+from designate import exceptions
+from designate.central.lock import base
+from designate.sqlalchemy import session
+
+
+LOG = logging.getLogger(__name__)
+
+cfg.CONF.import_group('storage:sqlalchemy',
+                      'designate.storage.impl_sqlalchemy')
+
+# The number of seconds between attempts to take an advisory lock
+POLL_INTERVAL = 0.1
+
+
+class DatabaseZoneLock(base.ZoneLock):
+    """
+    Locks domains with advisory locks in the storage database, shared by
+    every designate-central service using that database
+
+    Advisory locks are used rather than row locks, as a domain being created
+    has no row to lock. Each lock is held on its own connection, taken from
+    the storage connection pool.
+    """
+    __plugin_name__ = 'database'
+
+    def __init__(self):
+        super(DatabaseZoneLock, self).__init__()
+
+        self.engine = session.get_engine('storage:sqlalchemy')
+
+        if self.engine.dialect.name not in ('mysql', 'postgresql'):
+            LOG.warn(_LW("The %(dialect)s database does not support "
+                         "advisory locks, domains will only be locked "
+                         "within this process") %
+                     {'dialect': self.engine.dialect.name})
+
+    @contextlib.contextmanager
+    def _lock(self, domain_id):
+        name = 'designate-domain-%s' % domain_id
+
+        # Serialize the threads of this process first, so only one of them
+        # holds a connection while waiting on the database.
+        with lockutils.lock(name):
+            connection = self.engine.connect()
+
+            try:
+                self._acquire(connection, name)
+
+                try:
+                    yield
+                finally:
+                    self._release(connection, name)
+            finally:
+                connection.close()
+
+    def _acquire(self, connection, name):
+        dialect = self.engine.dialect.name
+
+        if dialect == 'mysql':
+            query = text('SELECT GET_LOCK(:name, 0)')
+            params = {'name': name}
+        elif dialect == 'postgresql':
+            query = text('SELECT pg_try_advisory_lock(:key)')
+            params = {'key': self._get_key(name)}
+        else:
+            return
+
+        # Poll rather than block in the database, which would block every
+        # green thread of this process.
+        deadline = time.time() + cfg.CONF['service:central'].lock_timeout
+
+        while not connection.execute(query, **params).scalar():
+            if time.time() >= deadline:
+                raise exceptions.LockTimeout(
+                    'Timed out waiting for the lock on %s' % name)
+
+            time.sleep(POLL_INTERVAL)
+
+    def _release(self, connection, name):
+        dialect = self.engine.dialect.name
+
+        if dialect == 'mysql':
+            connection.execute(text('SELECT RELEASE_LOCK(:name)'), name=name)
+
+        elif dialect == 'postgresql':
+            connection.execute(text('SELECT pg_advisory_unlock(:key)'),
+                               key=self._get_key(name))
+
+    @staticmethod
+    def _get_key(name):
+        # PostgreSQL advisory locks are identified by a signed 64 bit integer
+        return struct.unpack('!q', hashlib.md5(name).digest()[:8])[0]
@@ -0,0 +1,30 @@
+# Copyright 2014 Hewlett-Packard Development Company, L.P.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+from oslo.concurrency import lockutils
+
+from designate.central.lock import base
+
+
+class FileZoneLock(base.ZoneLock):
+    """
+    Locks domains with lock files, shared by every designate-central worker
+    on the same host
+
+    The lock files are placed in the oslo.concurrency lock_path.
+    """
+    __plugin_name__ = 'file'
+
+    def _lock(self, domain_id):
+        return lockutils.lock('domain-%s' % domain_id,
+                              lock_file_prefix='designate-', external=True)
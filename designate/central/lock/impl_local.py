@@ -0,0 +1,29 @@
+# Copyright 2014 Hewlett-Packard Development Company, L.P.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+from oslo.concurrency import lockutils
+
+from designate.central.lock import base
+
+
+class LocalZoneLock(base.ZoneLock):
+    """
+    Locks domains within a single designate-central process
+
+    Only suitable when a single central service, with a single worker, is
+    running.
+    """
+    __plugin_name__ = 'local'
+
+    def _lock(self, domain_id):
+        return lockutils.lock('domain-%s' % domain_id)
@@ -43,14 +43,15 @@ class CentralAPI(object):
         4.0 - Create methods now accept designate objects
         4.1 - Add methods for server pools
         4.2 - Add methods for pool manager integration
+        4.3 - Add apply_changeset
     """
-    RPC_API_VERSION = '4.2'
+    RPC_API_VERSION = '4.3'
 
     def __init__(self, topic=None):
         topic = topic if topic else cfg.CONF.central_topic
 
         target = messaging.Target(topic=topic, version=self.RPC_API_VERSION)
-        self.client = rpc.get_client(target, version_cap='4.2')
+        self.client = rpc.get_client(target, version_cap='4.3')
 
     # Misc Methods
     def get_absolute_limits(self, context):
@@ -305,6 +306,13 @@ class CentralAPI(object):
         LOG.info(_LI("count_records: Calling central's count_records."))
         return self.client.call(context, 'count_records', criterion=criterion)
 
+    # ChangeSet Methods
+    def apply_changeset(self, context, domain_id, changes):
+        LOG.info(_LI("apply_changeset: Calling central's apply_changeset."))
+        cctxt = self.client.prepare(version='4.3')
+        return cctxt.call(context, 'apply_changeset', domain_id=domain_id,
+                          changes=changes)
+
     # Misc. Report combining counts for tenants, domains and records
     def count_report(self, context, criterion=None):
         LOG.info(_LI("count_report: Calling central's count_report."))
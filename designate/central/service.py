@@ -14,23 +14,32 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
-import re
 import contextlib
 import collections
+import datetime
 import functools
 import threading
 import itertools
+import time
 
+import eventlet
 from oslo.config import cfg
 from oslo import messaging
 from oslo.utils import excutils
-from oslo.concurrency import lockutils
+from oslo.utils import timeutils
 
 from designate.openstack.common import log as logging
 from designate.i18n import _LI
 from designate.i18n import _LC
+from designate.i18n import _LE
+from designate.i18n import _LW
 from designate import backend
 from designate import central
+from designate.central import blacklist as central_blacklist
+from designate.central import emitter as central_emitter
+from designate.central import lock as central_lock
+from designate.central import sync as central_sync
+from designate.central import tld as central_tld
 from designate import context as dcontext
 from designate import exceptions
 from designate import network_api
@@ -45,6 +54,8 @@ from designate import storage
 LOG = logging.getLogger(__name__)
 DOMAIN_LOCKS = threading.local()
 NOTIFICATON_BUFFER = threading.local()
+JOURNAL_BUFFER = threading.local()
+BACKEND_CHANGES = threading.local()
 
 
 @contextlib.contextmanager
@@ -70,6 +81,11 @@ def transaction(f):
         except Exception:
             with excutils.save_and_reraise_exception():
                 self.storage.rollback()
+
+                # Any buffered journal entries describe changes which have
+                # just been rolled back.
+                if hasattr(JOURNAL_BUFFER, 'entries'):
+                    JOURNAL_BUFFER.entries.clear()
         else:
             self.storage.commit()
             return result
@@ -80,7 +96,9 @@ def synchronized_domain(domain_arg=1, new_domain=False):
     """Ensures only a single operation is in progress for each domain
 
     A Decorator which ensures only a single operation can be happening
-    on a single domain at once, within the current designate-central instance
+    on a single domain at once. The lock_driver option decides whether this
+    covers the current designate-central instance, every worker on this host,
+    or every central service sharing the database.
     """
     def outer(f):
         @functools.wraps(f)
@@ -136,14 +154,14 @@ def synchronized_domain(domain_arg=1, new_domain=False):
                 # Call the wrapped function
                 return f(self, *args, **kwargs)
             else:
-                with lockutils.lock('domain-%s' % domain_id):
+                with self.zone_lock.lock(domain_id):
                     DOMAIN_LOCKS.held.add(domain_id)
 
-                    # Call the wrapped function
-                    result = f(self, *args, **kwargs)
-
-                    DOMAIN_LOCKS.held.remove(domain_id)
-                    return result
+                    try:
+                        # Call the wrapped function
+                        return f(self, *args, **kwargs)
+                    finally:
+                        DOMAIN_LOCKS.held.remove(domain_id)
 
         return wrapper
     return outer
@@ -182,11 +200,13 @@ def notification(notification_type):
                 if NOTIFICATON_BUFFER.stack == 0:
                     LOG.debug('Emitting %(count)d notifications',
                               {'count': len(NOTIFICATON_BUFFER.queue)})
-                    # Send the queued notifications, in order.
+                    # Hand the queued notifications, in order, to the
+                    # emitter to be published in the background.
                     for value in NOTIFICATON_BUFFER.queue:
                         LOG.debug('Emitting %(type)s notification',
                                   {'type': value[1]})
-                        self.notifier.info(value[0], value[1], value[2])
+                        self.notification_emitter.emit(
+                            value[0], value[1], value[2])
 
                     # Reset the queue
                     NOTIFICATON_BUFFER.queue.clear()
@@ -196,7 +216,7 @@ def notification(notification_type):
 
 
 class Service(service.RPCService):
-    RPC_API_VERSION = '4.2'
+    RPC_API_VERSION = '4.3'
 
     target = messaging.Target(version=RPC_API_VERSION)
 
@@ -213,25 +233,49 @@ class Service(service.RPCService):
         # Get a quota manager instance
         self.quota = quota.get_quota()
 
+        # Get the driver used to lock domains while they are changed
+        lock_driver = cfg.CONF['service:central'].lock_driver
+        self.zone_lock = central_lock.get_zone_lock(lock_driver)
+
         self.network_api = network_api.get_network_api(cfg.CONF.network_api)
 
-    def start(self):
-        # Check to see if there are any TLDs in the database
-        tlds = self.storage.find_tlds({})
-        if tlds:
-            self.check_for_tlds = True
-            LOG.info(_LI("Checking for TLDs"))
-        else:
-            self.check_for_tlds = False
-            LOG.info(_LI("NOT checking for TLDs"))
+        self.blacklist_matcher = central_blacklist.BlacklistMatcher(
+            self.storage)
+        self.sync_checkpoint = central_sync.SyncCheckpoint()
+        self.tlds = central_tld.TldSet(self.storage)
 
+    def start(self):
         self.backend.start()
 
         super(Service, self).start()
 
+        self.notification_emitter = central_emitter.NotificationEmitter(
+            self.notifier)
+        self.tg.add_timer(
+            cfg.CONF['service:central'].notification_flush_interval,
+            self.notification_emitter.flush)
+
+        # Periodically log the notification counters
+        interval = cfg.CONF['service:central'].notification_stats_interval
+        if interval > 0:
+            self.tg.add_timer(interval, self.notification_emitter.log_stats)
+
+        # Periodically reload the TLDs, picking up any changes made by other
+        # central services.
+        self.tg.add_timer(cfg.CONF['service:central'].tld_refresh_interval,
+                          self._refresh_tlds)
+
+    def _refresh_tlds(self):
+        context = dcontext.DesignateContext.get_admin_context()
+
+        self.tlds.refresh(context)
+
     def stop(self):
         super(Service, self).stop()
 
+        # Publish any notifications still waiting
+        self.notification_emitter.flush()
+
         self.backend.stop()
 
     # TODO(vinod): Remove the following code once pool manager calls mdns.
@@ -253,21 +297,14 @@ class Service(service.RPCService):
                                                'required')
 
         # Check the TLD for validity if there are entries in the database
-        if self.check_for_tlds:
-            try:
-                self.storage.find_tld(context, {'name': domain_labels[-1]})
-            except exceptions.TldNotFound:
+        tlds = self.tlds.names(context)
+
+        if tlds:
+            if domain_labels[-1].lower() not in tlds:
                 raise exceptions.InvalidDomainName('Invalid TLD')
 
             # Now check that the domain name is not the same as a TLD
-            try:
-                stripped_domain_name = domain_name.strip('.').lower()
-                self.storage.find_tld(
-                    context,
-                    {'name': stripped_domain_name})
-            except exceptions.TldNotFound:
-                pass
-            else:
+            if domain_name.strip('.').lower() in tlds:
                 raise exceptions.InvalidDomainName(
                     'Domain name cannot be the same as a TLD')
 
@@ -310,7 +347,8 @@ class Service(service.RPCService):
         if recordset_type != 'CNAME':
             criterion['type'] = 'CNAME'
 
-        recordsets = self.storage.find_recordsets(context, criterion)
+        recordsets = self.storage.find_recordsets(
+            context, criterion, load_records=False)
 
         if ((len(recordsets) == 1 and recordsets[0].id != recordset_id)
                 or len(recordsets) > 1):
@@ -355,13 +393,7 @@ class Service(service.RPCService):
         Ensures the provided domain_name is not blacklisted.
         """
 
-        blacklists = self.storage.find_blacklists(context)
-
-        for blacklist in blacklists:
-            if bool(re.search(blacklist.pattern, domain_name)):
-                return True
-
-        return False
+        return self.blacklist_matcher.match(context, domain_name)
 
     def _is_subdomain(self, context, domain_name):
         """
@@ -374,39 +406,36 @@ class Service(service.RPCService):
         # Break the name up into it's component labels
         labels = domain_name.split(".")
 
-        i = 1
+        # Every name above domain_name, excluding the root
+        names = ['.'.join(labels[i:]) for i in range(1, len(labels) - 1)]
 
-        # Starting with label #2, search for matching domain's in the database
-        while (i < len(labels)):
-            name = '.'.join(labels[i:])
+        if not names:
+            return False
 
-            try:
-                domain = self.storage.find_domain(context, {'name': name})
-            except exceptions.DomainNotFound:
-                i += 1
-            else:
-                return domain
+        # Search for all of them at once, the closest enclosing domain is
+        # the one with the longest name
+        domains = self.storage.find_domains(context, {'name': names})
 
-        return False
+        if not domains:
+            return False
 
-    def _is_superdomain(self, context, domain_name):
+        return max(domains, key=lambda d: len(d.name))
+
+    def _is_superdomain(self, context, domain_name, tenant_id=None):
         """
         Ensures the provided domain_name is the parent domain
-        of an existing subdomain (checks across all tenants)
+        of an existing subdomain (checks across all tenants), optionally
+        only counting subdomains owned by tenants other than tenant_id
         """
         context = context.elevated()
         context.all_tenants = True
 
-        # Create wildcard term to catch all subdomains
-        search_term = "*%s" % domain_name
+        criterion = None
+        if tenant_id is not None:
+            criterion = {'tenant_id': '!%s' % tenant_id}
 
-        try:
-            criterion = {'name': search_term}
-            subdomains = self.storage.find_domains(context, criterion)
-        except exceptions.DomainNotFound:
-            return False
-
-        return subdomains
+        return self.storage.count_subdomains(
+            context, domain_name, criterion) > 0
 
     def _is_valid_ttl(self, context, ttl):
         min_ttl = cfg.CONF['service:central'].min_ttl
@@ -419,13 +448,15 @@ class Service(service.RPCService):
 
     def _increment_domain_serial(self, context, domain_id):
         domain = self.storage.get_domain(context, domain_id)
+        previous_serial = domain.serial
 
         # Increment the serial number
         domain.serial = utils.increment_serial(domain.serial)
         domain = self.storage.update_domain(context, domain)
 
-        with wrap_backend_call():
-            self.backend.update_domain(context, domain)
+        self._flush_journal(context, domain, previous_serial)
+
+        self._backend_call(context, domain, 'update_domain')
 
         # Update SOA record
         self._update_soa(context, domain)
@@ -437,6 +468,105 @@ class Service(service.RPCService):
 
         return domain
 
+    def _backend_call(self, context, domain, method, *args):
+        """
+        Call a Backend method for a change to domain, or defer it until the
+        end of the changeset being applied to domain.
+        """
+        changes = getattr(BACKEND_CHANGES, 'changes', {}).get(domain.id)
+
+        if changes is not None:
+            changes.append((method, args))
+            return
+
+        with wrap_backend_call():
+            getattr(self.backend, method)(context, domain, *args)
+
+    # Journal Methods
+    def _get_journal_buffer(self, domain_id):
+        if not hasattr(JOURNAL_BUFFER, 'entries'):
+            # Create the journal buffer if necessary
+            JOURNAL_BUFFER.entries = collections.defaultdict(list)
+
+        return JOURNAL_BUFFER.entries[domain_id]
+
+    def _is_journaled(self, recordset):
+        # SOA changes are implied by the serial numbers of the journal
+        return (recordset.type != 'SOA' and
+                cfg.CONF['service:central'].journal_retention > 0)
+
+    def _journal_records(self, domain, action, recordset, records):
+        """
+        Buffer journal entries for changed records, until the domain's serial
+        is next incremented.
+        """
+        if not self._is_journaled(recordset):
+            return
+
+        ttl = recordset.ttl if recordset.ttl is not None else domain.ttl
+        entries = self._get_journal_buffer(domain.id)
+
+        for record in records:
+            entries.append(objects.JournalEntry(
+                action=action, name=recordset.name, type=recordset.type,
+                ttl=ttl, data=record.data))
+
+    def _journal_recordset_update(self, domain, original, recordset):
+        if recordset.obj_attr_is_set('records'):
+            records = recordset.records
+        else:
+            records = original.records
+
+        if (original.name != recordset.name or
+                original.ttl != recordset.ttl):
+            # Every record has changed
+            self._journal_records(domain, 'DELETE', original,
+                                  original.records)
+            self._journal_records(domain, 'ADD', recordset, records)
+            return
+
+        original_data = set([r.data for r in original.records])
+        data = set([r.data for r in records])
+
+        self._journal_records(
+            domain, 'DELETE', original,
+            [r for r in original.records if r.data not in data])
+        self._journal_records(
+            domain, 'ADD', recordset,
+            [r for r in records if r.data not in original_data])
+
+    def _discard_journal(self, domain_id):
+        if hasattr(JOURNAL_BUFFER, 'entries'):
+            JOURNAL_BUFFER.entries.pop(domain_id, None)
+
+    def _flush_journal(self, context, domain, previous_serial):
+        """
+        Write the buffered journal entries of a domain, recording them as the
+        changes between previous_serial and the domain's current serial, and
+        compact the journal.
+        """
+        entries = self._get_journal_buffer(domain.id)
+        self._discard_journal(domain.id)
+
+        retention = cfg.CONF['service:central'].journal_retention
+        if retention <= 0:
+            return
+
+        if len(entries) == 0:
+            # Record the serial increment, so the chain of serials in the
+            # journal remains unbroken.
+            entries = [objects.JournalEntry(action='NONE')]
+
+        for entry in entries:
+            entry.serial = domain.serial
+            entry.previous_serial = previous_serial
+
+        self.storage.create_journal_entries(
+            context, domain.id, objects.JournalEntryList(objects=entries))
+
+        before = timeutils.utcnow() - datetime.timedelta(seconds=retention)
+        self.storage.truncate_journal(context, domain.id, before=before)
+
     # SOA Recordset Methods
     def _build_soa_record(self, zone, servers):
         return "%s %s. %d %d %d %d %d" % (servers[0]['name'],
@@ -503,49 +633,79 @@ class Service(service.RPCService):
 
         return ns
 
-    def _update_ns(self, context, zone, orig_name, new_name):
-        # Get the zone's NS recordset
-        ns = self.find_recordset(context,
-                                 criterion={'domain_id': zone['id'],
-                                            'type': "NS"})
-        #
-        for r in ns.records:
-            if r.data == orig_name:
-                r.data = new_name
-                self.update_recordset(context, ns)
-
-    def _add_ns(self, context, zone, server):
-        # Get NS recordset
-        ns = self.find_recordset(context,
-                                 criterion={'domain_id': zone['id'],
-                                            'type': "NS"})
-        # Add new record to recordset
-        ns_record = objects.Record(data=server.name)
-
-        new_record = self.create_record(context, zone['id'],
-                                        ns['id'], ns_record,
-                                        increment_serial=False)
-
-        ns.records.append(new_record)
-
-        self.update_recordset(context, ns)
-
-    def _delete_ns(self, context, zone, server):
-        ns = self.find_recordset(context,
-                                 criterion={'domain_id': zone['id'],
-                                            'type': "NS"})
-        records = ns.records
-
-        for r in records:
-            if r.data == server.name:
-                ns.records.remove(r)
-
-        self.update_recordset(context, ns)
+    def _sync_ns_records(self, context, remove=None):
+        """
+        Update the NS records of every zone to match the current servers,
+        removing the names in remove.
+
+        Zones are updated in batches, each in its own transaction. Updating a
+        zone which already matches the servers is a no-op, so any interrupted
+        update is completed by the next one.
+        """
+        elevated_context = context.elevated()
+        elevated_context.all_tenants = True
+
+        batch_size = cfg.CONF['service:central'].ns_update_batch_size
+        marker = None
+
+        while True:
+            zones = self.storage.find_domains(
+                elevated_context, marker=marker, limit=batch_size)
+
+            if len(zones) == 0:
+                break
+
+            self._sync_ns_records_batch(elevated_context, zones, remove)
+
+            marker = zones[-1].id
+
+    @transaction
+    def _sync_ns_records_batch(self, context, zones, remove):
+        servers = self.storage.find_servers(context)
+
+        # TODO(Ron): remove this when integrated with pool manager.
+        status = None
+        if cfg.CONF['service:central'].backend_driver != 'pool_manager_proxy':
+            status = 'ACTIVE'
+
+        zone_ids = self.storage.sync_ns_records(
+            context, [z.id for z in zones], [s.name for s in servers],
+            remove=remove, status=status)
+
+        if len(zone_ids) == 0:
+            return
+
+        LOG.debug('Updating NS records of %d zones', len(zone_ids))
+
+        self.storage.increment_serials(context, zone_ids)
+
+        zones = self.storage.find_domains(context, {'id': zone_ids})
+
+        self.storage.update_soa_records(context, dict(
+            (z.id, self._build_soa_record(z, servers)) for z in zones))
+
+        recordsets = self.storage.find_recordsets(
+            context, {'domain_id': zone_ids, 'type': ['NS', 'SOA']})
+
+        for zone in zones:
+            # Slaves will need a full transfer to pick up the changes
+            self.storage.truncate_journal(context, zone.id)
+
+            with wrap_backend_call():
+                for recordset in recordsets:
+                    if (recordset.domain_id == zone.id and
+                            recordset.name == zone.name):
+                        self.backend.update_recordset(
+                            context, zone, recordset)
+
+                self.backend.update_domain(context, zone)
+
+            self.mdns_api.notify_zone_changed(context, zone, None, None,
+                                              None, None)
 
     # Quota Enforcement Methods
     def _enforce_domain_quota(self, context, tenant_id):
-        criterion = {'tenant_id': tenant_id}
-        count = self.storage.count_domains(context, criterion)
+        count = self.storage.get_quota_usage(context, 'domains', tenant_id)
 
         self.quota.limit_check(context, tenant_id, domains=count)
 
@@ -555,8 +715,8 @@ class Service(service.RPCService):
 
     def _enforce_record_quota(self, context, domain, recordset):
         # Ensure the records per domain quota is OK
-        criterion = {'domain_id': domain['id']}
-        count = self.storage.count_records(context, criterion)
+        count = self.storage.get_quota_usage(context, 'domain_records',
+                                             domain['id'])
 
         self.quota.limit_check(context, domain['tenant_id'],
                                domain_records=count)
@@ -605,25 +765,24 @@ class Service(service.RPCService):
 
     # Server Methods
     @notification('dns.server.create')
-    @transaction
     def create_server(self, context, server):
         policy.check('create_server', context)
 
+        created_server = self._create_server(context, server)
+
+        # Add the new server to the NS recordset of every zone
+        self._sync_ns_records(context)
+
+        return created_server
+
+    @transaction
+    def _create_server(self, context, server):
         created_server = self.storage.create_server(context, server)
 
         # Update backend with the new server..
         with wrap_backend_call():
             self.backend.create_server(context, created_server)
 
-        # Update NS recordsets for all zones
-        elevated_context = context.elevated()
-        elevated_context.all_tenants = True
-
-        zones = self.find_domains(elevated_context)
-        # Create a new NS recordset for for every zone
-        for z in zones:
-            self._add_ns(elevated_context, z, server)
-
         return created_server
 
     def find_servers(self, context, criterion=None, marker=None, limit=None,
@@ -639,50 +798,39 @@ class Service(service.RPCService):
         return self.storage.get_server(context, server_id)
 
     @notification('dns.server.update')
-    @transaction
     def update_server(self, context, server):
         target = {
             'server_id': server.obj_get_original_value('id'),
         }
         policy.check('update_server', context, target)
         orig_server_name = server.obj_get_original_value('name')
-        new_server_name = server.name
 
+        server = self._update_server(context, server)
+
+        # Rename the server in the NS recordset of every zone
+        if server.name != orig_server_name:
+            self._sync_ns_records(context, remove=[orig_server_name])
+
+        return server
+
+    @transaction
+    def _update_server(self, context, server):
         server = self.storage.update_server(context, server)
 
         # Update backend with the new details..
         with wrap_backend_call():
             self.backend.update_server(context, server)
 
-        # Update NS recordsets for all zones
-        elevated_context = context.elevated()
-        elevated_context.all_tenants = True
-        zones = self.find_domains(elevated_context)
-        for z in zones:
-            self._update_ns(elevated_context, z, orig_server_name,
-                            new_server_name)
-
         return server
 
     @notification('dns.server.delete')
-    @transaction
     def delete_server(self, context, server_id):
         policy.check('delete_server', context, {'server_id': server_id})
 
-        # don't delete last of servers
-        servers = self.storage.find_servers(context)
-        if len(servers) == 1 and server_id == servers[0].id:
-            raise exceptions.LastServerDeleteNotAllowed(
-                "Not allowed to delete last of servers")
-
-        server = self.storage.delete_server(context, server_id)
+        server = self._delete_server(context, server_id)
 
-        # Update NS recordsets for all zones
-        elevated_context = context.elevated()
-        elevated_context.all_tenants = True
-        zones = self.find_domains(elevated_context)
-        for z in zones:
-            self._delete_ns(elevated_context, z, server)
+        # Remove the server from the NS recordset of every zone
+        self._sync_ns_records(context, remove=[server.name])
 
         # Update backend with the new server..
         with wrap_backend_call():
@@ -690,6 +838,16 @@ class Service(service.RPCService):
 
         return server
 
+    @transaction
+    def _delete_server(self, context, server_id):
+        # don't delete last of servers
+        servers = self.storage.find_servers(context)
+        if len(servers) == 1 and server_id == servers[0].id:
+            raise exceptions.LastServerDeleteNotAllowed(
+                "Not allowed to delete last of servers")
+
+        return self.storage.delete_server(context, server_id)
+
     # TLD Methods
     @notification('dns.tld.create')
     @transaction
@@ -698,9 +856,8 @@ class Service(service.RPCService):
 
         # The TLD is only created on central's storage and not on the backend.
         created_tld = self.storage.create_tld(context, tld)
+        self.tlds.invalidate()
 
-        # Set check for tlds to be true
-        self.check_for_tlds = True
         return created_tld
 
     def find_tlds(self, context, criterion=None, marker=None, limit=None,
@@ -724,20 +881,17 @@ class Service(service.RPCService):
         policy.check('update_tld', context, target)
 
         tld = self.storage.update_tld(context, tld)
+        self.tlds.invalidate()
 
         return tld
 
     @notification('dns.tld.delete')
     @transaction
     def delete_tld(self, context, tld_id):
-        # Known issue - self.check_for_tld is not reset here.  So if the last
-        # TLD happens to be deleted, then we would incorrectly do the TLD
-        # validations.
-        # This decision was influenced by weighing the (ultra low) probability
-        # of hitting this issue vs doing the checks for every delete.
         policy.check('delete_tld', context, {'tld_id': tld_id})
 
         tld = self.storage.delete_tld(context, tld_id)
+        self.tlds.invalidate()
 
         return tld
 
@@ -855,15 +1009,10 @@ class Service(service.RPCService):
                                            'another tenants domain')
 
         # Handle super-domains appropriately
-        subdomains = self._is_superdomain(context, domain.name)
-        if subdomains:
-            LOG.debug("Domain '{0}' is a superdomain.".format(domain.name))
-            for subdomain in subdomains:
-                if subdomain.tenant_id != domain.tenant_id:
-                    raise exceptions.Forbidden('Unable to create domain '
-                                               'because another tenant '
-                                               'owns a subdomain of '
-                                               'the domain')
+        if self._is_superdomain(context, domain.name, domain.tenant_id):
+            raise exceptions.Forbidden('Unable to create domain because '
+                                       'another tenant owns a subdomain of '
+                                       'the domain')
         # If this succeeds, subdomain parent IDs will be updated
         # after domain is created
 
@@ -898,12 +1047,10 @@ class Service(service.RPCService):
 
         # If domain is a superdomain, update subdomains
         # with new parent IDs
-        for subdomain in subdomains:
-            LOG.debug("Updating subdomain '{0}' parent ID "
-                      "using superdomain ID '{1}'"
-                      .format(subdomain.name, domain.id))
-            subdomain.parent_domain_id = domain.id
-            self.update_domain(context, subdomain)
+        count = self.storage.reparent_domains(context, created_domain)
+        if count:
+            LOG.debug("Updated the parent ID of %d subdomains using "
+                      "superdomain ID '%s'", count, created_domain.id)
 
         # Create the NS and SOA recordsets for the new domain. SOA must be
         # last, in order to ensure BIND etc do not read the zone file before
@@ -911,8 +1058,13 @@ class Service(service.RPCService):
         self._create_ns(context, created_domain, servers)
         self._create_soa(context, created_domain)
 
+        # Slaves will fetch the new zone with a full transfer, nothing which
+        # happened during its creation belongs in the journal.
+        self._discard_journal(created_domain.id)
+
         self.mdns_api.notify_zone_changed(context, created_domain, None, None,
                                           None, None)
+        self.mdns_api.add_zone(context, created_domain)
 
         return created_domain
 
@@ -988,12 +1140,22 @@ class Service(service.RPCService):
         if ttl is not None:
             self._is_valid_ttl(context, ttl)
 
+        previous_serial = domain.serial
+
         if increment_serial:
             # Increment the serial number
             domain.serial = utils.increment_serial(domain.serial)
 
         domain = self.storage.update_domain(context, domain)
 
+        if 'ttl' in changes:
+            # The effective TTL of any recordset without its own TTL has
+            # changed, slaves will need to perform a full transfer.
+            self._discard_journal(domain.id)
+            self.storage.truncate_journal(context, domain.id)
+        elif increment_serial:
+            self._flush_journal(context, domain, previous_serial)
+
         with wrap_backend_call():
             self.backend.update_domain(context, domain)
 
@@ -1030,10 +1192,13 @@ class Service(service.RPCService):
                                                 'before deleting this domain')
 
         domain = self.storage.delete_domain(context, domain_id)
+        self.storage.truncate_journal(context, domain_id)
 
         with wrap_backend_call():
             self.backend.delete_domain(context, domain)
 
+        self.mdns_api.remove_zone(context, domain)
+
         return domain
 
     def count_domains(self, context, criterion=None):
@@ -1121,8 +1286,11 @@ class Service(service.RPCService):
         created_recordset = self.storage.create_recordset(context, domain_id,
                                                           recordset)
 
-        with wrap_backend_call():
-            self.backend.create_recordset(context, domain, created_recordset)
+        self._journal_records(domain, 'ADD', created_recordset,
+                              created_recordset.records)
+
+        self._backend_call(context, domain, 'create_recordset',
+                           created_recordset)
 
         # Only increment the serial # if records exist and
         # increment_serial = True
@@ -1214,11 +1382,18 @@ class Service(service.RPCService):
         if ttl is not None:
             self._is_valid_ttl(context, ttl)
 
+        if self._is_journaled(recordset):
+            original = self.storage.get_recordset(context, recordset.id)
+        else:
+            original = None
+
         # Update the recordset
         recordset = self.storage.update_recordset(context, recordset)
 
-        with wrap_backend_call():
-            self.backend.update_recordset(context, domain, recordset)
+        if original is not None:
+            self._journal_recordset_update(domain, original, recordset)
+
+        self._backend_call(context, domain, 'update_recordset', recordset)
 
         if increment_serial:
             self._increment_domain_serial(context, domain.id)
@@ -1246,10 +1421,11 @@ class Service(service.RPCService):
 
         policy.check('delete_recordset', context, target)
 
+        self._journal_records(domain, 'DELETE', recordset, recordset.records)
+
         recordset = self.storage.delete_recordset(context, recordset_id)
 
-        with wrap_backend_call():
-            self.backend.delete_recordset(context, domain, recordset)
+        self._backend_call(context, domain, 'delete_recordset', recordset)
 
         if increment_serial:
             self._increment_domain_serial(context, domain_id)
@@ -1299,9 +1475,10 @@ class Service(service.RPCService):
         created_record = self.storage.create_record(context, domain_id,
                                                     recordset_id, record)
 
-        with wrap_backend_call():
-            self.backend.create_record(
-                context, domain, recordset, created_record)
+        self._journal_records(domain, 'ADD', recordset, [created_record])
+
+        self._backend_call(context, domain, 'create_record', recordset,
+                           created_record)
 
         if increment_serial:
             self._increment_domain_serial(context, domain_id)
@@ -1384,11 +1561,17 @@ class Service(service.RPCService):
 
         policy.check('update_record', context, target)
 
+        if 'data' in changes:
+            self._journal_records(
+                domain, 'DELETE', recordset,
+                [objects.Record(data=record.obj_get_original_value('data'))])
+            self._journal_records(domain, 'ADD', recordset, [record])
+
         # Update the record
         record = self.storage.update_record(context, record)
 
-        with wrap_backend_call():
-            self.backend.update_record(context, domain, recordset, record)
+        self._backend_call(context, domain, 'update_record', recordset,
+                           record)
 
         if increment_serial:
             self._increment_domain_serial(context, domain.id)
@@ -1423,10 +1606,12 @@ class Service(service.RPCService):
 
         policy.check('delete_record', context, target)
 
+        self._journal_records(domain, 'DELETE', recordset, [record])
+
         record = self.storage.delete_record(context, record_id)
 
-        with wrap_backend_call():
-            self.backend.delete_record(context, domain, recordset, record)
+        self._backend_call(context, domain, 'delete_record', recordset,
+                           record)
 
         if increment_serial:
             self._increment_domain_serial(context, domain_id)
@@ -1444,30 +1629,201 @@ class Service(service.RPCService):
         policy.check('count_records', context, target)
         return self.storage.count_records(context, criterion)
 
+    # ChangeSet Methods
+    @notification('dns.changeset.apply')
+    @synchronized_domain()
+    @transaction
+    def apply_changeset(self, context, domain_id, changes):
+        """
+        Apply many recordset and record changes to a domain at once
+
+        The changes are applied in order, in a single transaction, followed
+        by a single serial increment, backend call and NOTIFY.
+
+        :param changes: ChangeList of the changes to apply.
+        :return: ChangeList with the resulting recordset or record of each
+                 change.
+        """
+        domain = self.storage.get_domain(context, domain_id)
+
+        target = {
+            'domain_id': domain_id,
+            'domain_name': domain.name,
+            'tenant_id': domain.tenant_id
+        }
+
+        policy.check('apply_changeset', context, target)
+
+        if not hasattr(BACKEND_CHANGES, 'changes'):
+            BACKEND_CHANGES.changes = {}
+
+        backend_changes = BACKEND_CHANGES.changes[domain.id] = []
+
+        try:
+            results = objects.ChangeList()
+
+            for change in changes:
+                results.append(self._apply_change(context, domain, change))
+
+            domain = self._increment_domain_serial(context, domain.id)
+        finally:
+            del BACKEND_CHANGES.changes[domain.id]
+
+        with wrap_backend_call():
+            self.backend.apply_changes(context, domain, backend_changes)
+
+        return results
+
+    def _apply_change(self, context, domain, change):
+        action = change.action
+        recordset = change.recordset
+        record = change.record if change.obj_attr_is_set('record') else None
+
+        # Every change must act on a recordset within the domain
+        if action != 'CREATE' or record is not None:
+            existing = self.storage.get_recordset(context, recordset.id)
+
+            if existing.domain_id != domain.id:
+                raise exceptions.RecordSetNotFound()
+
+        if record is None:
+            if action == 'CREATE':
+                recordset = self.create_recordset(
+                    context, domain.id, recordset, increment_serial=False)
+            elif action == 'UPDATE':
+                if recordset.obj_get_original_value('domain_id') != domain.id:
+                    raise exceptions.RecordSetNotFound()
+
+                recordset = self.update_recordset(
+                    context, recordset, increment_serial=False)
+            elif action == 'DELETE':
+                recordset = self.delete_recordset(
+                    context, domain.id, recordset.id, increment_serial=False)
+            else:
+                raise exceptions.BadRequest('Invalid change action')
+
+            return objects.Change(action=action, recordset=recordset)
+
+        if action == 'CREATE':
+            record = self.create_record(
+                context, domain.id, recordset.id, record,
+                increment_serial=False)
+        elif action == 'UPDATE':
+            if record.obj_get_original_value('recordset_id') != recordset.id:
+                raise exceptions.RecordNotFound()
+
+            record = self.update_record(
+                context, record, increment_serial=False)
+        elif action == 'DELETE':
+            record = self.delete_record(
+                context, domain.id, recordset.id, record.id,
+                increment_serial=False)
+        else:
+            raise exceptions.BadRequest('Invalid change action')
+
+        return objects.Change(action=action, recordset=recordset,
+                              record=record)
+
     # Diagnostics Methods
-    def _sync_domain(self, context, domain):
+    @transaction
+    def _get_domain_rdata(self, context, domain):
         recordsets = self.storage.find_recordsets(
             context, criterion={'domain_id': domain['id']})
 
-        # Since we now have records as well as recordsets we need to get the
-        # records for it as well and pass that down since the backend wants it.
-        rdata = []
-        for recordset in recordsets:
-            records = self.find_records(
-                context, {'recordset_id': recordset.id})
-            rdata.append((recordset, records))
+        # Since we now have records as well as recordsets we need to pass the
+        # records down too, since the backend wants them.
+        return [(recordset, recordset.records) for recordset in recordsets]
+
+    def _sync_domain(self, context, domain):
+        # Only reading the domain is transactional, the backend call is not
+        rdata = self._get_domain_rdata(context, domain)
+
         with wrap_backend_call():
             return self.backend.sync_domain(context, domain, rdata)
 
-    @transaction
+    def _sync_domain_timed(self, context, domain, results):
+        start = time.time()
+        error = None
+
+        try:
+            self._sync_domain(context, domain)
+        except Exception as e:
+            LOG.exception(_LE("Failed to sync domain '%(name)s'") %
+                          {'name': domain.name})
+            error = '%s' % e
+
+        duration = time.time() - start
+
+        LOG.debug('Synced domain %(name)s in %(duration).3f seconds',
+                  {'name': domain.name, 'duration': duration})
+
+        results[domain.id] = {'duration': duration, 'error': error}
+
     def sync_domains(self, context):
+        """
+        Sync every domain to the backend
+
+        The domains are synced in batches, each spread over a pool of
+        sync_workers. Progress is checkpointed after each batch, so a sync
+        which is interrupted resumes where it stopped.
+
+        :return: Dict of Domain ID to the sync duration and error, if any,
+                 of each domain synced by this call.
+        """
         policy.check('diagnostics_sync_domains', context)
 
-        domains = self.storage.find_domains(context)
+        conf = cfg.CONF['service:central']
+
+        marker = None
+        synced = 0
+        failed = 0
+
+        progress = self.sync_checkpoint.load()
 
+        if progress is not None:
+            marker = progress['marker']
+            synced = progress['synced']
+            failed = progress['failed']
+
+            LOG.info(_LI("Resuming the sync of every domain after "
+                         "%(synced)d domains") % {'synced': synced})
+
+        pool = eventlet.GreenPool(conf.sync_workers)
         results = {}
-        for domain in domains:
-            results[domain.id] = self._sync_domain(context, domain)
+
+        while True:
+            try:
+                domains = self.storage.find_domains(
+                    context, marker=marker, limit=conf.sync_batch_size,
+                    sort_key='id', sort_dir='asc')
+            except exceptions.MarkerNotFound:
+                # The checkpointed domain has since been deleted
+                LOG.warn(_LW("Sync checkpoint is no longer valid, restarting "
+                             "the sync of every domain"))
+                marker = None
+                continue
+
+            if len(domains) == 0:
+                break
+
+            batch = {}
+
+            for domain in domains:
+                pool.spawn_n(self._sync_domain_timed, context, domain, batch)
+
+            pool.waitall()
+
+            synced += len(batch)
+            failed += len([r for r in batch.values() if r['error']])
+            results.update(batch)
+
+            marker = domains[-1].id
+            self.sync_checkpoint.save(marker, synced, failed)
+
+        self.sync_checkpoint.clear()
+
+        LOG.info(_LI("Synced %(synced)d domains, %(failed)d failed") %
+                 {'synced': synced, 'failed': failed})
 
         return results
 
@@ -1528,7 +1884,8 @@ class Service(service.RPCService):
             'host': cfg.CONF.host,
             'status': status,
             'backend': backend_status,
-            'storage': storage_status
+            'storage': storage_status,
+            'notifications': self.notification_emitter.get_stats()
         }
 
     def _determine_floatingips(self, context, fips, records=None,
@@ -1550,8 +1907,20 @@ class Service(service.RPCService):
             'managed_resource_type': 'ptr:floatingip',
         }
 
-        records = self.find_records(elevated_context, criterion)
-        records = dict([(r['managed_extra'], r) for r in records])
+        policy.check('find_records', elevated_context,
+                     {'tenant_id': elevated_context.tenant})
+
+        # Fetch only the records of the FloatingIPs we were given, across
+        # every tenant
+        records = {}
+        addresses = list(set(f['address'] for f in fips.values()))
+
+        if addresses:
+            criterion['managed_extra'] = addresses
+
+            records = dict([(r['managed_extra'], r)
+                            for r in self.storage.iter_records(
+                                elevated_context, criterion)])
 
         invalid = []
         data = {}
@@ -1838,6 +2207,7 @@ class Service(service.RPCService):
         policy.check('create_blacklist', context)
 
         created_blacklist = self.storage.create_blacklist(context, blacklist)
+        self.blacklist_matcher.invalidate()
 
         return created_blacklist
 
@@ -1874,6 +2244,7 @@ class Service(service.RPCService):
         policy.check('update_blacklist', context, target)
 
         blacklist = self.storage.update_blacklist(context, blacklist)
+        self.blacklist_matcher.invalidate()
 
         return blacklist
 
@@ -1883,6 +2254,7 @@ class Service(service.RPCService):
         policy.check('delete_blacklist', context)
 
         blacklist = self.storage.delete_blacklist(context, blacklist_id)
+        self.blacklist_matcher.invalidate()
 
         return blacklist
 
@@ -1941,6 +2313,7 @@ class Service(service.RPCService):
         return pool
 
     # Pool Manager Integration
+    @transaction
     def update_status(self, context, domain_id, status, serial):
         """
         :param context: Security context information.
@@ -1950,10 +2323,6 @@ class Service(service.RPCService):
         :return: None
         """
         domain = self.storage.get_domain(context, domain_id)
-        criterion = {
-            'domain_id': domain_id
-        }
-        records = self.storage.find_records(context, criterion=criterion)
 
         if status == 'SUCCESS':
             if domain.action in ['CREATE', 'UPDATE'] \
@@ -1964,26 +2333,20 @@ class Service(service.RPCService):
                     and domain.status in ['PENDING', 'ERROR']:
                 domain.action = 'NONE'
                 domain.status = 'DELETED'
-            for record in records:
-                if record.action in ['CREATE', 'UPDATE'] \
-                        and record.status in ['PENDING', 'ERROR'] \
-                        and serial >= record.serial:
-                    record.action = 'NONE'
-                    record.status = 'ACTIVE'
-                elif record.action == 'DELETE' \
-                        and record.status in ['PENDING', 'ERROR'] \
-                        and serial >= record.serial:
-                    record.action = 'NONE'
-                    record.status = 'DELETED'
-                self.storage.update_record(context, record)
+
+            self.storage.update_records_status(
+                context, domain_id, serial, ['PENDING', 'ERROR'],
+                actions=['CREATE', 'UPDATE'], status='ACTIVE', action='NONE')
+            self.storage.update_records_status(
+                context, domain_id, serial, ['PENDING', 'ERROR'],
+                actions=['DELETE'], status='DELETED', action='NONE')
 
         elif status == 'ERROR':
             if domain.status == 'PENDING':
                 domain.status = 'ERROR'
-            for record in records:
-                if record.status == 'PENDING' \
-                        and serial >= record.serial:
-                    record.status = 'ERROR'
-                self.storage.update_record(context, record)
 
-        self.storage.update_domain(context, domain)
+            self.storage.update_records_status(
+                context, domain_id, serial, ['PENDING'], status='ERROR')
+
+        if domain.obj_what_changed():
+            self.storage.update_domain(context, domain)
@@ -0,0 +1,66 @@
+# Copyright 2014 Hewlett-Packard Development Company, L.P.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import os
+
+from oslo.config import cfg
+from oslo.serialization import jsonutils
+
+from designate.openstack.common import log as logging
+from designate.i18n import _LW
+
+
+LOG = logging.getLogger(__name__)
+
+
+class SyncCheckpoint(object):
+    """
+    The progress of a sync of every domain, kept in a file under state_path
+
+    Domains are synced in order of their ID, so the ID of the last domain of
+    the last completed batch is enough to resume an interrupted sync.
+    """
+    def __init__(self, filename='sync_domains.checkpoint'):
+        self.path = os.path.join(os.path.abspath(cfg.CONF.state_path),
+                                 filename)
+
+    def load(self):
+        """Get the saved progress, or None when no sync was interrupted"""
+        try:
+            with open(self.path) as f:
+                return jsonutils.loads(f.read())
+        except IOError:
+            return None
+        except ValueError:
+            LOG.warn(_LW("Ignoring unreadable sync checkpoint %(path)s") %
+                     {'path': self.path})
+            return None
+
+    def save(self, marker, synced, failed):
+        """Save the progress, replacing the previous checkpoint at once"""
+        path = self.path + '.tmp'
+
+        with open(path, 'w') as f:
+            f.write(jsonutils.dumps({
+                'marker': marker,
+                'synced': synced,
+                'failed': failed,
+            }))
+
+        os.rename(path, self.path)
+
+    def clear(self):
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
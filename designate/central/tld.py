@@ -0,0 +1,69 @@
+# Copyright 2014 Hewlett-Packard Development Company, L.P.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import threading
+
+from designate.openstack.common import log as logging
+
+
+LOG = logging.getLogger(__name__)
+
+
+class TldSet(object):
+    """
+    An in-memory copy of the names of every TLD
+
+    The names are reloaded when the TLDs are changed by this service, and by
+    periodic calls to refresh, which reload them only when the version
+    reported by storage shows they were changed elsewhere.
+    """
+    def __init__(self, storage):
+        self.storage = storage
+
+        self._lock = threading.Lock()
+        self._version = None
+        self._names = None
+
+    def invalidate(self):
+        """Force the TLDs to be reloaded on their next use"""
+        self._names = None
+
+    def refresh(self, context):
+        """Reload the TLDs if they have changed since they were last loaded"""
+        version = self.storage.get_tlds_version(context)
+
+        if version != self._version:
+            self._load(context, version)
+
+    def names(self, context):
+        """
+        Get the set of TLD names, in lower case
+
+        :param context: RPC Context.
+        """
+        names = self._names
+
+        if names is None:
+            self._load(context, self.storage.get_tlds_version(context))
+            names = self._names
+
+        return names
+
+    def _load(self, context, version):
+        with self._lock:
+            tlds = self.storage.find_tlds(context)
+
+            self._names = frozenset(tld.name.lower() for tld in tlds)
+            self._version = version
+
+        LOG.debug('Loaded %d TLDs', len(self._names))
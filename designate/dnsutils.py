@@ -13,6 +13,12 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
+import base64
+
+import dns.exception
+import dns.rdata
+import dns.rdataclass
+import six
 from dns import rdatatype
 
 from designate import exceptions
@@ -73,3 +79,52 @@ def dnspythonrecord_to_recordset(rname, rdataset):
         rr = objects.Record(data=rdata.to_text())
         rrset.records.append(rr)
     return rrset
+
+
+def rrset_wire_size(rrset):
+    """
+    Return the uncompressed wire format size of a dnspython RRset, in bytes.
+
+    Name compression can only make the RRset smaller once it is rendered into
+    a message, so this is a safe upper bound when packing messages.
+    """
+    output = six.BytesIO()
+    rrset.to_wire(output)
+    return output.tell()
+
+
+def serial_lt(serial1, serial2):
+    """
+    Check whether SOA serial1 precedes serial2, using the serial number
+    arithmetic of RFC 1982, which allows for serials wrapping around 2^32.
+    """
+    return serial1 != serial2 and (serial2 - serial1) % 2 ** 32 < 2 ** 31
+
+
+def rdata_to_wire(record_type, data):
+    """
+    Convert the presentation format data of a record to base64 encoded wire
+    format rdata.
+
+    :return: The encoded rdata, or None if data can not be converted, for
+             example as it contains names which are not fully qualified.
+    """
+    try:
+        rdata = dns.rdata.from_text(
+            dns.rdataclass.IN, rdatatype.from_text(record_type), str(data))
+
+        output = six.BytesIO()
+        rdata.to_wire(output)
+    except (dns.exception.DNSException, ValueError):
+        return None
+
+    return base64.b64encode(output.getvalue())
+
+
+def rdata_from_wire(record_type, rdata):
+    """Convert base64 encoded wire format rdata to a dnspython Rdata"""
+    wire = base64.b64decode(rdata)
+
+    return dns.rdata.from_wire(
+        dns.rdataclass.IN, rdatatype.from_text(record_type), wire, 0,
+        len(wire))
@@ -61,6 +61,11 @@ class CommunicationFailure(Base):
     error_type = 'communication_failure'
 
 
+class LockTimeout(Base):
+    error_code = 500
+    error_type = 'lock_timeout'
+
+
 class NeutronCommunicationFailure(CommunicationFailure):
     """
     Raised in case one of the alleged Neutron endpoints fails.
@@ -17,10 +17,16 @@ import os
 
 from migrate.versioning import api as versioning_api
 from oslo.config import cfg
+from sqlalchemy import select
 
 from designate.openstack.common import log as logging
+from designate import context
+from designate import dnsutils
+from designate import storage
 from designate.manage import base
+from designate.sqlalchemy import session
 from designate.sqlalchemy import utils
+from designate.storage.impl_sqlalchemy import tables
 
 
 LOG = logging.getLogger(__name__)
@@ -56,3 +62,78 @@ class DatabaseCommands(base.Commands):
     @base.args('revision', nargs='?')
     def downgrade(self, revision):
         get_manager().downgrade(revision)
+
+    @base.name('backfill-rdata')
+    @base.args('--batch_size', help="Number of records to update per "
+               "transaction", default=1000, type=int)
+    def backfill_rdata(self, batch_size=None):
+        """Populate the wire format rdata of records which have none"""
+        engine = session.get_engine('storage:sqlalchemy')
+
+        records = tables.records
+        recordsets = tables.recordsets
+
+        query = select([records.c.id, records.c.data, recordsets.c.type])\
+            .select_from(records.join(
+                recordsets, records.c.recordset_id == recordsets.c.id))\
+            .where(records.c.rdata.is_(None))\
+            .order_by(records.c.id)\
+            .limit(batch_size)
+
+        marker = None
+        updated = 0
+        skipped = 0
+
+        while True:
+            batch_query = query
+            if marker is not None:
+                batch_query = query.where(records.c.id > marker)
+
+            rows = engine.execute(batch_query).fetchall()
+
+            if not rows:
+                break
+
+            with engine.begin() as connection:
+                for row in rows:
+                    rdata = dnsutils.rdata_to_wire(row.type, row.data)
+
+                    # Records whose data can't be converted are left to be
+                    # parsed by mDNS as before.
+                    if rdata is None:
+                        skipped += 1
+                        continue
+
+                    connection.execute(
+                        records.update()
+                               .where(records.c.id == row.id)
+                               .values(rdata=rdata))
+                    updated += 1
+
+            # Records which could not be converted still have no rdata, so
+            # page past them rather than fetching them again.
+            marker = rows[-1].id
+
+            LOG.info("Backfilled rdata of %d records" % updated)
+
+        print("Backfilled rdata of %d records, skipped %d" % (updated,
+                                                              skipped))
+
+    @base.name('reconcile-quota-usages')
+    def reconcile_quota_usages(self):
+        """Correct the quota usage counters against the real usage"""
+        admin_context = context.DesignateContext.get_admin_context(
+            all_tenants=True)
+        storage_api = storage.get_storage('sqlalchemy')
+
+        storage_api.begin()
+
+        try:
+            corrected = storage_api.reconcile_quota_usages(admin_context)
+        except Exception:
+            storage_api.rollback()
+            raise
+        else:
+            storage_api.commit()
+
+        print("Corrected %d quota usages" % corrected)
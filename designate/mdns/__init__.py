@@ -41,12 +41,57 @@ OPTS = [
                     'nameserver.  A notify-retries of 1 implies that on an '
                     'error after sending a NOTIFY, there would not be any '
                     'retries.  A 0 implies that NOTIFYs are not sent at all'),
+    cfg.FloatOpt('notify-delay', default=1.0,
+                 help='The number of seconds to wait before sending NOTIFYs '
+                      'for a changed zone. Any further changes to the zone '
+                      'within this time are covered by the same NOTIFY. A 0 '
+                      'sends NOTIFYs immediately.'),
+    cfg.IntOpt('notify-pool-size', default=100,
+               help='The maximum number of NOTIFYs to have in flight at '
+                    'once'),
+    cfg.IntOpt('poll-max-outstanding', default=1000,
+               help='The maximum number of SOA queries to have in flight at '
+                    'once while polling for serial numbers'),
+    cfg.IntOpt('poll-batch-size', default=100,
+               help='The number of serial polling results to collect before '
+                    'reporting them to the pool manager'),
+    cfg.FloatOpt('poll-batch-interval', default=1.0,
+                 help='The maximum number of seconds to hold serial polling '
+                      'results before reporting them to the pool manager'),
     cfg.IntOpt('port', default=5354,
                help='mDNS Port Number'),
     cfg.IntOpt('tcp-backlog', default=100,
                help='mDNS TCP Backlog'),
+    cfg.BoolOpt('reuse-port', default=True,
+                help='Bind a separate SO_REUSEPORT socket in each worker '
+                     'process, where supported by the kernel'),
+    cfg.IntOpt('handler-pool-size', default=1000,
+               help='The maximum number of UDP DNS requests each worker '
+                    'process handles concurrently. Further requests are '
+                    'dropped.'),
+    cfg.IntOpt('tcp-max-connections', default=100,
+               help='The maximum number of TCP connections each worker '
+                    'process has open at once. Further connections wait in '
+                    'the TCP backlog.'),
+    cfg.IntOpt('tcp-recv-timeout', default=30,
+               help='The number of seconds a TCP connection may sit idle '
+                    'between requests before it is closed'),
     cfg.StrOpt('storage-driver', default='sqlalchemy',
                help='The storage driver to use'),
+    cfg.IntOpt('zone-cache-size', default=64 * 1024 * 1024,
+               help='The approximate number of bytes of prebuilt zone '
+                    'snapshots to keep in memory for serving AXFRs. A 0 '
+                    'disables the cache.'),
+    cfg.IntOpt('max-message-size', default=65535,
+               help='The maximum size, in bytes, of each DNS message sent '
+                    'as part of a zone transfer'),
+    cfg.IntOpt('axfr-batch-size', default=1000,
+               help='The number of recordsets to fetch from storage at a '
+                    'time while performing a zone transfer'),
+    cfg.IntOpt('zone-index-refresh-interval', default=300,
+               help='The number of seconds between full reloads of the index '
+                    'of zones served by mdns. The index is also updated as '
+                    'zones are created and deleted.'),
 ]
 
 cfg.CONF.register_opts(OPTS, group='service:mdns')
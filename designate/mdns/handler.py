@@ -13,11 +13,17 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
+import collections
+
 import dns
 from oslo.config import cfg
 
+from designate import dnsutils
 from designate import exceptions
 from designate import storage
+from designate.context import DesignateContext
+from designate.mdns import zone_cache
+from designate.mdns import zone_index
 from designate.openstack.common import log as logging
 from designate.i18n import _LE
 
@@ -32,10 +38,29 @@ class RequestHandler(object):
         storage_driver = cfg.CONF['service:mdns'].storage_driver
         self.storage = storage.get_storage(storage_driver)
 
+        # Prebuilt AXFR responses, keyed by domain id and serial
+        zone_cache_size = cfg.CONF['service:mdns'].zone_cache_size
+        if zone_cache_size > 0:
+            self.zone_cache = zone_cache.ZoneSnapshotCache(zone_cache_size)
+        else:
+            self.zone_cache = None
+
+        # The zones served by mdns, loaded on first use
+        self.zone_index = zone_index.ZoneIndex()
+
+    def refresh_zone_index(self):
+        """Reload the zone index from storage"""
+        context = DesignateContext.get_admin_context(all_tenants=True)
+
+        self.zone_index.load(self.storage.find_domains(context))
+
+        LOG.debug('Loaded %d zones into the zone index', len(self.zone_index))
+
     def __call__(self, request):
         """
         :param request: DNS Request Message
-        :return: DNS Response Message
+        :return: DNS Response Message, or an iterator of DNS Response
+                 Messages for zone transfers
         """
         context = request.environ['context']
 
@@ -49,6 +74,13 @@ class RequestHandler(object):
             q_rrset = request.question[0]
             if q_rrset.rdtype == dns.rdatatype.AXFR:
                 response = self._handle_axfr(context, request)
+            elif q_rrset.rdtype == dns.rdatatype.IXFR:
+                response = self._handle_ixfr(context, request)
+            elif q_rrset.rdtype == dns.rdatatype.SOA:
+                # Secondaries check the SOA serial once they are notified of
+                # a change, it must never come from a lagging replica.
+                with self.storage.read_primary():
+                    response = self._handle_record_query(context, request)
             else:
                 response = self._handle_record_query(context, request)
         else:
@@ -82,75 +114,394 @@ class RequestHandler(object):
             else:
                 ttl = CONF.default_ttl
 
-        # construct rdata from all the records
-        rdata = []
-        for record in recordset.records:
-            rdata.append(str(record.data))
-
         # Now put the records into dnspython's RRsets
         # answer section has 1 RR set.  If the RR set has multiple
         # records, DNSpython puts each record in a separate answer
         # section.
         # RRSet has name, ttl, class, type  and rdata
         # The rdata has one or more records
-        r_rrset = dns.rrset.from_text_list(
-            recordset.name, ttl, dns.rdataclass.IN, recordset.type, rdata)
+        rdtype = dns.rdatatype.from_text(recordset.type)
+        r_rrset = dns.rrset.RRset(
+            dns.name.from_text(recordset.name), dns.rdataclass.IN, rdtype)
+        r_rrset.update_ttl(ttl)
+
+        for record in recordset.records:
+            # Prefer the precomputed wire format rdata, falling back to
+            # parsing the presentation format data of records which don't
+            # have it.
+            if record.rdata:
+                rdata = dnsutils.rdata_from_wire(recordset.type, record.rdata)
+            else:
+                rdata = dns.rdata.from_text(
+                    dns.rdataclass.IN, rdtype, str(record.data))
+
+            r_rrset.add(rdata)
 
         return r_rrset
 
-    def _handle_axfr(self, context, request):
+    def _iter_recordsets(self, context, criterion):
+        """
+        Yield the recordsets matching criterion, fetching them from storage
+        in batches so that large zones are never held in memory at once.
+        """
+        return self.storage.iter_recordsets(
+            context, criterion,
+            batch_size=cfg.CONF['service:mdns'].axfr_batch_size)
+
+    def _iter_axfr_rrsets(self, context, domain):
+        """
+        Yield the RRsets of a zone in AXFR order, with the SOA at the
+        beginning and end, reusing a cached snapshot when the serial has not
+        changed since it was built.
+        """
+        if self.zone_cache is not None:
+            snapshot = self.zone_cache.get(domain.id, domain.serial)
+
+            if snapshot is not None:
+                for rrset in snapshot.soa_rrsets:
+                    yield rrset
+                for rrset in snapshot.rrsets:
+                    yield rrset
+                for rrset in snapshot.soa_rrsets:
+                    yield rrset
+                return
+
+            LOG.debug('Building zone snapshot for %(name)s at serial '
+                      '%(serial)d', {'name': domain.name,
+                                     'serial': domain.serial})
+
+        criterion = {'domain_id': domain.id, 'type': 'SOA'}
+        soa_rrsets = [self._convert_to_rrset(context, recordset, domain)
+                      for recordset in self._iter_recordsets(context,
+                                                             criterion)]
+
+        # Only keep hold of the RRsets while the zone still fits in the
+        # cache, otherwise stream them straight through to the client.
+        rrsets = [] if self.zone_cache is not None else None
+        size = 0
+        if rrsets is not None:
+            size = sum(dnsutils.rrset_wire_size(r) for r in soa_rrsets)
+
+        for rrset in soa_rrsets:
+            yield rrset
+
+        # Get all the recordsets other than SOA
+        criterion = {'domain_id': domain.id, 'type': '!SOA'}
+        for recordset in self._iter_recordsets(context, criterion):
+            rrset = self._convert_to_rrset(context, recordset, domain)
+
+            if rrsets is not None:
+                size += dnsutils.rrset_wire_size(rrset)
+                if size <= self.zone_cache.max_size:
+                    rrsets.append(rrset)
+                else:
+                    rrsets = None
+
+            yield rrset
+
+        for rrset in soa_rrsets:
+            yield rrset
+
+        if rrsets is not None:
+            # The snapshot was read across several queries, only cache it if
+            # the zone did not change while it was being built.
+            serial = self.storage.get_domain(context, domain.id).serial
+
+            if serial != domain.serial:
+                LOG.debug('Serial of %(name)s changed from %(serial)d to '
+                          '%(current)d during the transfer, not caching the '
+                          'snapshot', {'name': domain.name,
+                                       'serial': domain.serial,
+                                       'current': serial})
+                return
+
+            self.zone_cache.set(zone_cache.ZoneSnapshot(
+                domain.id, domain.serial, soa_rrsets, rrsets, size=size))
+
+    def _make_xfr_response(self, request):
         response = dns.message.make_response(request)
+        response.set_rcode(dns.rcode.NOERROR)
+        # For all the data stored in designate mdns is Authoritative
+        response.flags |= dns.flags.AA
+
+        return response
+
+    def _iter_xfr_responses(self, request, rrsets):
+        """
+        Yield a zone transfer response as a series of DNS messages, each no
+        larger than the configured maximum message size.
+        """
+        max_size = cfg.CONF['service:mdns'].max_message_size
+
+        response = self._make_xfr_response(request)
+        header_size = len(response.to_wire())
+        size = header_size
+
+        for rrset in rrsets:
+            rrset_size = dnsutils.rrset_wire_size(rrset)
+
+            # Always place at least one RRset in each message, even if it
+            # alone exceeds the budget.
+            if response.answer and size + rrset_size > max_size:
+                yield response
+
+                response = self._make_xfr_response(request)
+                size = header_size
+
+            response.answer.append(rrset)
+            size += rrset_size
+
+        yield response
+
+    def _find_xfr_domain(self, context, request):
         q_rrset = request.question[0]
         # First check if there is an existing zone
         # TODO(vinod) once validation is separated from the api,
         # validate the parameters
         criterion = {'name': q_rrset.name.to_text()}
         try:
-            domain = self.storage.find_domain(context, criterion)
+            with self.storage.read_primary():
+                return self.storage.find_domain(context, criterion)
+        except exceptions.DomainNotFound:
+            LOG.exception(_LE("got exception while handling %(type)s request. "
+                              "Question is %(qr)s") %
+                          {'type': dns.rdatatype.to_text(q_rrset.rdtype),
+                           'qr': q_rrset})
+            return None
+
+    def _replica_caught_up(self, context, domain):
+        """
+        Check whether storage reads outside of read_primary() see the
+        domain's current serial.
+        """
+        try:
+            current = self.storage.get_domain(context, domain.id)
         except exceptions.DomainNotFound:
-            LOG.exception(_LE("got exception while handling axfr request. "
-                              "Question is %(qr)s") % {'qr': q_rrset})
+            return False
+
+        return current.serial == domain.serial
+
+    def _iter_caught_up(self, context, domain, rrsets):
+        """
+        Yield rrsets, which are read from a replica only once it has caught
+        up with the domain's serial, and from the primary otherwise.
+        """
+        if self._replica_caught_up(context, domain):
+            for rrset in rrsets:
+                yield rrset
+        else:
+            with self.storage.read_primary():
+                for rrset in rrsets:
+                    yield rrset
+
+    def _handle_axfr(self, context, request):
+        """
+        Handle a DNS AXFR request
+
+        :return: A DNS error response message, or an iterator of DNS response
+                 messages which together make up the zone transfer.
+        """
+        domain = self._find_xfr_domain(context, request)
 
+        if domain is None:
             return self._handle_query_error(request, dns.rcode.REFUSED)
 
-        r_rrsets = []
+        if not request.environ.get('tcp', True):
+            # A full zone transfer never fits a single UDP datagram, set TC
+            # so that the client retries over TCP.
+            response = self._make_xfr_response(request)
+            response.flags |= dns.flags.TC
+            return response
 
-        # The AXFR response needs to have a SOA at the beginning and end.
+        return self._iter_xfr_responses(
+            request, self._iter_caught_up(
+                context, domain, self._iter_axfr_rrsets(context, domain)))
+
+    def _get_soa_rrset(self, context, domain):
         criterion = {'domain_id': domain.id, 'type': 'SOA'}
-        soa_recordsets = self.storage.find_recordsets(context, criterion)
+        recordset = self.storage.find_recordset(context, criterion)
 
-        for recordset in soa_recordsets:
-            r_rrsets.append(self._convert_to_rrset(context, recordset, domain))
+        return self._convert_to_rrset(context, recordset, domain)
 
-        # Get all the recordsets other than SOA
-        criterion = {'domain_id': domain.id, 'type': '!SOA'}
-        recordsets = self.storage.find_recordsets(context, criterion)
+    def _rewrite_soa_serial(self, soa_rrset, serial):
+        """Build a copy of a SOA RRset carrying a different serial number"""
+        soa = soa_rrset[0]
 
-        for recordset in recordsets:
-            r_rrsets.append(self._convert_to_rrset(context, recordset, domain))
+        return dns.rrset.from_text(
+            soa_rrset.name, soa_rrset.ttl, dns.rdataclass.IN,
+            dns.rdatatype.SOA, '%s %s %d %d %d %d %d' % (
+                soa.mname, soa.rname, serial, soa.refresh, soa.retry,
+                soa.expire, soa.minimum))
 
-        # Append the SOA recordset at the end
-        for recordset in soa_recordsets:
-            r_rrsets.append(self._convert_to_rrset(context, recordset, domain))
+    def _get_journal_versions(self, context, domain, serial):
+        """
+        Group the journal entries which lead from serial to the domain's
+        current serial into a list of (previous_serial, serial, deletions,
+        additions) versions.
 
-        response.set_rcode(dns.rcode.NOERROR)
-        # TODO(vinod) check if we dnspython has an upper limit on the number
-        # of rrsets.
-        response.answer = r_rrsets
-        # For all the data stored in designate mdns is Authoritative
-        response.flags |= dns.flags.AA
+        :return: The list of versions, or None when the journal does not
+                 cover every change since serial.
+        """
+        entries = self.storage.find_journal_entries(context, domain.id, serial)
 
-        return response
+        versions = []
+        for entry in entries:
+            if not versions or versions[-1][1] != entry.serial:
+                if entry.previous_serial != serial:
+                    return None
+
+                versions.append((entry.previous_serial, entry.serial, [], []))
+                serial = entry.serial
+
+            if entry.action == 'DELETE':
+                versions[-1][2].append(entry)
+            elif entry.action == 'ADD':
+                versions[-1][3].append(entry)
+
+        if serial != domain.serial:
+            return None
+
+        return versions
+
+    def _convert_journal_to_rrsets(self, entries):
+        rdata = collections.OrderedDict()
+
+        for entry in entries:
+            key = (entry.name, entry.type, entry.ttl)
+            rdata.setdefault(key, []).append(str(entry.data))
+
+        return [dns.rrset.from_text_list(
+                    name, ttl, dns.rdataclass.IN, type_, data)
+                for (name, type_, ttl), data in rdata.items()]
+
+    def _iter_ixfr_rrsets(self, context, domain, versions):
+        """
+        Yield the RRsets of an incremental zone transfer, as described in
+        RFC 1995.
+        """
+        soa_rrset = self._get_soa_rrset(context, domain)
+
+        yield soa_rrset
+
+        for previous_serial, serial, deletions, additions in versions:
+            yield self._rewrite_soa_serial(soa_rrset, previous_serial)
+
+            for rrset in self._convert_journal_to_rrsets(deletions):
+                yield rrset
+
+            yield self._rewrite_soa_serial(soa_rrset, serial)
+
+            for rrset in self._convert_journal_to_rrsets(additions):
+                yield rrset
+
+        yield soa_rrset
+
+    def _handle_ixfr(self, context, request):
+        """
+        Handle a DNS IXFR request
+
+        Falls back to a full zone transfer when the journal no longer covers
+        the changes since the client's serial.
+
+        :return: A DNS error response message, or an iterator of DNS response
+                 messages which together make up the zone transfer.
+        """
+        domain = self._find_xfr_domain(context, request)
+
+        if domain is None:
+            return self._handle_query_error(request, dns.rcode.REFUSED)
+
+        # The client places its current SOA in the authority section
+        serial = None
+        for rrset in request.authority:
+            if rrset.rdtype == dns.rdatatype.SOA and len(rrset) > 0:
+                serial = rrset[0].serial
+
+        if serial is None:
+            return self._handle_query_error(request, dns.rcode.FORMERR)
+
+        if (not dnsutils.serial_lt(serial, domain.serial) or
+                not request.environ.get('tcp', True)):
+            # The client is up to date, or asked over UDP where RFC 1995
+            # section 2 allows us to respond with just the current SOA and
+            # leave the client to retry over TCP.
+            with self.storage.read_primary():
+                soa_rrset = self._get_soa_rrset(context, domain)
+
+            return self._iter_xfr_responses(request, [soa_rrset])
+
+        with self.storage.read_primary():
+            versions = self._get_journal_versions(context, domain, serial)
+
+        if versions is None:
+            LOG.debug('Journal for %(name)s does not cover serial '
+                      '%(serial)d, falling back to AXFR',
+                      {'name': domain.name, 'serial': serial})
+            return self._iter_xfr_responses(
+                request, self._iter_caught_up(
+                    context, domain, self._iter_axfr_rrsets(context, domain)))
+
+        return self._iter_xfr_responses(
+            request, self._iter_caught_up(
+                context, domain,
+                self._iter_ixfr_rrsets(context, domain, versions)))
+
+    def _find_zone(self, name):
+        if not self.zone_index.loaded:
+            self.refresh_zone_index()
+
+        return self.zone_index.find(name)
+
+    def _name_exists(self, context, domain_id, name):
+        """
+        Check whether name owns any recordsets, or is an empty non-terminal
+        with recordsets beneath it.
+        """
+        criterion = {'domain_id': domain_id, 'name': name}
+        if self.storage.count_recordsets(context, criterion) > 0:
+            return True
+
+        criterion['name'] = '*.%s' % name
+        return self.storage.count_recordsets(context, criterion) > 0
+
+    def _get_negative_soa_rrset(self, context, domain_id):
+        """
+        Fetch the SOA RRset to place in the authority section of a negative
+        response, with the TTL lowered to the SOA minimum as per RFC 2308.
+        """
+        criterion = {
+            'domain_id': domain_id,
+            'type': 'SOA',
+            'domains_deleted': False
+        }
+        recordset = self.storage.find_recordset(context, criterion)
+        soa_rrset = self._convert_to_rrset(context, recordset)
+
+        soa_rrset.ttl = min(soa_rrset.ttl, soa_rrset[0].minimum)
+
+        return soa_rrset
 
     def _handle_record_query(self, context, request):
         """Handle a DNS QUERY request for a record"""
         response = dns.message.make_response(request)
+
+        q_rrset = request.question[0]
+        name = q_rrset.name.to_text()
+
+        domain_id = self._find_zone(name)
+
+        if domain_id is None:
+            # An authoritative nameserver shouldn't answer for names outside
+            # the zones it is authoritative for.
+            response.set_rcode(dns.rcode.REFUSED)
+            return response
+
         try:
-            q_rrset = request.question[0]
             # TODO(vinod) once validation is separated from the api,
             # validate the parameters
             criterion = {
-                'name': q_rrset.name.to_text(),
+                'domain_id': domain_id,
+                'name': name,
                 'type': dns.rdatatype.to_text(q_rrset.rdtype),
                 'domains_deleted': False
             }
@@ -158,25 +509,28 @@ class RequestHandler(object):
             r_rrset = self._convert_to_rrset(context, recordset)
             response.set_rcode(dns.rcode.NOERROR)
             response.answer = [r_rrset]
-            # For all the data stored in designate mdns is Authoritative
-            response.flags |= dns.flags.AA
+
         except exceptions.NotFound:
-            # If an FQDN exists, like www.rackspace.com, but the specific
-            # record type doesn't exist, like type SPF, then the return code
-            # would be NOERROR and the SOA record is returned.  This tells
-            # caching nameservers that the FQDN does exist, so don't negatively
-            # cache it, but the specific record doesn't exist.
-            #
-            # If an FQDN doesn't exist with any record type, that is NXDOMAIN.
-            # However, an authoritative nameserver shouldn't return NXDOMAIN
-            # for a zone it isn't authoritative for.  It would be more
-            # appropriate for it to return REFUSED.  It should still return
-            # NXDOMAIN if it is authoritative for a domain but the FQDN doesn't
-            # exist, like abcdef.rackspace.com.  Of course, a wildcard within a
-            # domain would mean that NXDOMAIN isn't ever returned for a domain.
-            #
-            # To simply things currently this returns a REFUSED in all cases.
-            # If zone transfers needs different errors, we could revisit this.
-            response.set_rcode(dns.rcode.REFUSED)
+            # If the name exists, but the specific record type doesn't, the
+            # answer is NOERROR with no data. This tells caching nameservers
+            # that the name does exist, so don't negatively cache it, only
+            # the type. If the name doesn't exist at all, that is NXDOMAIN.
+            # Both carry the zone's SOA in the authority section.
+            try:
+                soa_rrset = self._get_negative_soa_rrset(context, domain_id)
+            except exceptions.NotFound:
+                # The zone was deleted since the index was last refreshed
+                response.set_rcode(dns.rcode.REFUSED)
+                return response
+
+            if self._name_exists(context, domain_id, name):
+                response.set_rcode(dns.rcode.NOERROR)
+            else:
+                response.set_rcode(dns.rcode.NXDOMAIN)
+
+            response.authority = [soa_rrset]
+
+        # For all the data stored in designate mdns is Authoritative
+        response.flags |= dns.flags.AA
 
         return response
@@ -15,11 +15,13 @@
 import time
 
 import dns
+import eventlet
 from oslo import messaging
 from oslo.config import cfg
 
 from designate import exceptions
 from designate import mdns
+from designate.mdns import poller
 from designate.openstack.common import log as logging
 from designate.i18n import _LI
 from designate.i18n import _LW
@@ -29,18 +31,32 @@ CONF = cfg.CONF
 
 
 class NotifyEndpoint(object):
-    RPC_NOTIFY_API_VERSION = '1.0'
+    RPC_NOTIFY_API_VERSION = '1.1'
 
     target = messaging.Target(
         namespace='notify', version=RPC_NOTIFY_API_VERSION)
 
     def __init__(self, *args, **kwargs):
+        # Bounds the number of NOTIFYs in flight at once
+        self._notify_pool = eventlet.GreenPool(
+            CONF['service:mdns'].notify_pool_size)
+
+        # Maps domain_id -> the latest version of each domain which is
+        # waiting out the notify delay
+        self._pending_notifies = {}
+
+        self._poller = None
+
         LOG.info(_LI("started mdns notify endpoint"))
 
     @property
     def pool_manager_api(self):
         return mdns.get_pool_manager_api()
 
+    def stop(self):
+        if self._poller is not None:
+            self._poller.stop()
+
     def notify_zone_changed(self, context, domain, destination, timeout,
                             retry_interval, max_retries):
         """
@@ -62,16 +78,37 @@ class NotifyEndpoint(object):
         # TODO(vinod): Remove the following code for
         # setting destination from config once pool manager calls mdns
         if (destination is None):
-            for slave in CONF['service:mdns'].slave_nameserver_ips_and_ports:
-                self._make_and_send_dns_message(
-                    domain, slave, CONF['service:mdns'].notify_timeout,
-                    CONF['service:mdns'].notify_retry_interval,
-                    CONF['service:mdns'].notify_retries, notify=True)
+            delay = CONF['service:mdns'].notify_delay
+
+            if delay <= 0:
+                self._notify_slaves(domain)
+            elif domain.id in self._pending_notifies:
+                # A NOTIFY for this zone is already waiting to be sent, it
+                # will pick up this change too.
+                self._pending_notifies[domain.id] = domain
+            else:
+                self._pending_notifies[domain.id] = domain
+                eventlet.spawn_after(
+                    delay, self._send_pending_notify, domain.id)
         else:
             return self._make_and_send_dns_message(
                 domain, destination, timeout, retry_interval, max_retries,
                 notify=True)
 
+    def _send_pending_notify(self, domain_id):
+        domain = self._pending_notifies.pop(domain_id)
+
+        self._notify_slaves(domain)
+
+    def _notify_slaves(self, domain):
+        """Send NOTIFYs for a domain to all of the slaves concurrently"""
+        for slave in CONF['service:mdns'].slave_nameserver_ips_and_ports:
+            self._notify_pool.spawn_n(
+                self._make_and_send_dns_message,
+                domain, slave, CONF['service:mdns'].notify_timeout,
+                CONF['service:mdns'].notify_retry_interval,
+                CONF['service:mdns'].notify_retries, notify=True)
+
     def poll_for_serial_number(self, context, domain, destination, timeout,
                                retry_interval, max_retries):
         """
@@ -137,6 +174,35 @@ class NotifyEndpoint(object):
         # Return some values for testing purposes.
         return (status, actual_serial, retries)
 
+    def poll_for_serial_numbers(self, context, domains, destinations,
+                                timeout, retry_interval, max_retries):
+        """
+        Poll many zones on many servers for their serial numbers at once.
+
+        Unlike poll_for_serial_number, this returns immediately, the pool
+        manager is informed of the outcome of each poll in batches with
+        update_statuses.
+
+        :param context: The user context.
+        :param domains: The designate domain objects to poll for. For each,
+            domain.serial = expected_serial
+        :param destinations: The servers to poll each domain on, each of the
+            format "ip:[port]".  If there is no port, port 53 is used.
+        :param timeout: The time (in seconds) to wait for each SOA response.
+        :param retry_interval: The time (in seconds) before the first retry,
+            doubling for each retry after it.
+        :param max_retries: The maximum number of attempts for each domain on
+            each destination.
+        :return: None
+        """
+        if self._poller is None:
+            self._poller = poller.SerialPoller(self.pool_manager_api)
+
+        for domain in domains:
+            for destination in destinations:
+                self._poller.poll(context, domain, destination, timeout,
+                                  retry_interval, max_retries)
+
     def _make_and_send_dns_message(self, domain, destination, timeout,
                                    retry_interval, max_retries, notify=False):
         """
@@ -0,0 +1,261 @@
+# Copyright 2014 Hewlett-Packard Development Company, L.P.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import collections
+import random
+import socket
+
+import dns
+import eventlet
+from oslo.config import cfg
+
+from designate import dnsutils
+from designate.openstack.common import log as logging
+from designate.i18n import _LE
+from designate.i18n import _LW
+
+
+LOG = logging.getLogger(__name__)
+CONF = cfg.CONF
+
+SUCCESS = 0
+ERROR = 1
+
+
+class _Poll(object):
+    """The state of polling a single zone on a single server"""
+    def __init__(self, context, domain, destination, timeout, retry_interval,
+                 max_retries):
+        self.context = context
+        self.domain = domain
+        self.destination = destination
+        self.timeout = timeout
+        self.retry_interval = retry_interval
+        self.max_retries = max_retries
+
+        self.attempts = 0
+        self.message = None
+        self.timer = None
+
+        dest = destination.split(':')
+        self.addr = (dest[0], int(dest[1]) if len(dest) > 1 else 53)
+
+
+class SerialPoller(object):
+    """
+    Polls many zones on many servers for their SOA serial numbers at once
+
+    Every query is sent from a single shared UDP socket, and responses are
+    matched back to their queries by DNS message ID. Queries which time out,
+    or find an older serial than expected, are retried with an exponential
+    back off. The outcome of each poll is reported to the pool manager with
+    those of other polls, in batches.
+    """
+    def __init__(self, pool_manager_api):
+        self.pool_manager_api = pool_manager_api
+
+        self._sock = None
+        self._receiver = None
+
+        # Maps message id -> _Poll, for queries awaiting a response
+        self._pending = {}
+        # Polls waiting for a free slot to send their next query
+        self._queue = collections.deque()
+
+        # Maps id(context) -> (context, statuses) of results not yet sent to
+        # the pool manager
+        self._statuses = {}
+        self._status_count = 0
+        self._flush_timer = None
+
+    def poll(self, context, domain, destination, timeout, retry_interval,
+             max_retries):
+        """
+        Start polling destination until it has at least domain.serial
+
+        :param destination: The server to poll, of the format "ip:[port]".
+                            If there is no port, port 53 is used.
+        """
+        if self._sock is None:
+            self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._receiver = eventlet.spawn(self._receive)
+
+        self._queue.append(_Poll(context, domain, destination, timeout,
+                                 retry_interval, max_retries))
+        self._send_queued()
+
+    def stop(self):
+        """
+        Stop polling, abandoning any outstanding polls, and report the
+        results collected so far to the pool manager
+        """
+        if self._sock is None:
+            return
+
+        self._receiver.kill()
+        self._receiver = None
+
+        for poll in self._pending.values():
+            poll.timer.cancel()
+
+        self._pending.clear()
+        self._queue.clear()
+
+        self._sock.close()
+        self._sock = None
+
+        self._flush()
+
+    def _send_queued(self):
+        max_outstanding = CONF['service:mdns'].poll_max_outstanding
+
+        while self._queue and len(self._pending) < max_outstanding:
+            self._send(self._queue.popleft())
+
+    def _send(self, poll):
+        message = dns.message.make_query(poll.domain.name, dns.rdatatype.SOA)
+        message.flags = 0
+
+        while message.id in self._pending:
+            message.id = random.randint(0, 65535)
+
+        poll.attempts += 1
+        poll.message = message
+
+        self._pending[message.id] = poll
+        poll.timer = eventlet.spawn_after(
+            poll.timeout, self._handle_timeout, message.id)
+
+        try:
+            self._sock.sendto(message.to_wire(), poll.addr)
+        except socket.error:
+            LOG.exception(_LE("Failed to send SOA query for '%(zone)s' to "
+                              "'%(dst)s'") %
+                          {'zone': poll.domain.name, 'dst': poll.destination})
+
+    def _receive(self):
+        while True:
+            try:
+                payload, addr = self._sock.recvfrom(65535)
+            except socket.error:
+                # Keep receiving, the polls in flight time out and are
+                # retried if their responses were lost.
+                LOG.exception(_LE("Failed to receive SOA responses"))
+                eventlet.sleep(0.1)
+                continue
+
+            try:
+                response = dns.message.from_wire(payload)
+            except dns.exception.DNSException:
+                continue
+
+            poll = self._pending.get(response.id)
+
+            # Ignore anything which is not a response to an outstanding query,
+            # from the server it was sent to
+            if (poll is None or addr != poll.addr or
+                    not poll.message.is_response(response)):
+                continue
+
+            del self._pending[response.id]
+            poll.timer.cancel()
+
+            try:
+                self._handle_response(poll, response)
+            except Exception:
+                LOG.exception(_LE("Failed to handle SOA response for "
+                                  "'%(zone)s' from '%(dst)s'") %
+                              {'zone': poll.domain.name,
+                               'dst': poll.destination})
+
+            self._send_queued()
+
+    def _handle_response(self, poll, response):
+        serial = None
+
+        if (response.flags & dns.flags.AA and
+                response.rcode() == dns.rcode.NOERROR):
+            for rrset in response.answer:
+                if (rrset.rdtype == dns.rdatatype.SOA and
+                        rrset.name.to_text() == poll.domain.name):
+                    serial = rrset[0].serial
+
+        if serial is None:
+            LOG.warn(_LW("Failed to get the serial of '%(zone)s' from "
+                         "'%(dst)s'") %
+                     {'zone': poll.domain.name, 'dst': poll.destination})
+            self._finish(poll, ERROR, None)
+
+        elif dnsutils.serial_lt(serial, poll.domain.serial):
+            self._retry(poll, serial)
+
+        else:
+            self._finish(poll, SUCCESS, serial)
+
+    def _handle_timeout(self, message_id):
+        poll = self._pending.pop(message_id, None)
+
+        if poll is None:
+            return
+
+        LOG.warn(_LW("Timed out polling '%(zone)s' on '%(dst)s'. "
+                     "Attempt='%(attempt)d'") %
+                 {'zone': poll.domain.name, 'dst': poll.destination,
+                  'attempt': poll.attempts})
+
+        self._retry(poll, None)
+        self._send_queued()
+
+    def _retry(self, poll, serial):
+        if poll.attempts >= poll.max_retries:
+            self._finish(poll, ERROR, serial)
+            return
+
+        # Back off exponentially between attempts on the same zone and server
+        delay = poll.retry_interval * (2 ** (poll.attempts - 1))
+        eventlet.spawn_after(delay, self._requeue, poll)
+
+    def _requeue(self, poll):
+        if self._sock is None:
+            # The poller was stopped
+            return
+
+        self._queue.append(poll)
+        self._send_queued()
+
+    def _finish(self, poll, status, serial):
+        _, statuses = self._statuses.setdefault(
+            id(poll.context), (poll.context, []))
+
+        statuses.append((poll.domain, poll.destination, status, serial))
+        self._status_count += 1
+
+        if self._status_count >= CONF['service:mdns'].poll_batch_size:
+            self._flush()
+        elif self._flush_timer is None:
+            self._flush_timer = eventlet.spawn_after(
+                CONF['service:mdns'].poll_batch_interval, self._flush)
+
+    def _flush(self):
+        """Report the collected statuses to the pool manager"""
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+
+        batches = self._statuses.values()
+
+        self._statuses = {}
+        self._status_count = 0
+
+        for context, statuses in batches:
+            self.pool_manager_api.update_statuses(context, statuses)
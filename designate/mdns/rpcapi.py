@@ -30,8 +30,14 @@ class MdnsAPI(object):
     Notify API version history:
 
         1.0 - Added notify_zone_changed and poll_for_serial_number.
+        1.1 - Added poll_for_serial_numbers.
+
+    Zone Index API version history:
+
+        1.0 - Added add_zone and remove_zone.
     """
-    RPC_NOTIFY_API_VERSION = '1.0'
+    RPC_NOTIFY_API_VERSION = '1.1'
+    RPC_ZONE_INDEX_API_VERSION = '1.0'
 
     def __init__(self, topic=None):
         topic = topic if topic else cfg.CONF.mdns_topic
@@ -39,7 +45,13 @@ class MdnsAPI(object):
         notify_target = messaging.Target(topic=topic,
                                          namespace='notify',
                                          version=self.RPC_NOTIFY_API_VERSION)
-        self.notify_client = rpc.get_client(notify_target, version_cap='1.0')
+        self.notify_client = rpc.get_client(notify_target, version_cap='1.1')
+
+        zone_index_target = messaging.Target(
+            topic=topic, namespace='zone_index',
+            version=self.RPC_ZONE_INDEX_API_VERSION)
+        self.zone_index_client = rpc.get_client(
+            zone_index_target, version_cap='1.0')
 
     def notify_zone_changed(self, context, domain, destination, timeout,
                             retry_interval, max_retries):
@@ -67,3 +79,29 @@ class MdnsAPI(object):
             context, 'poll_for_serial_number', domain=domain,
             destination=destination, timeout=timeout,
             retry_interval=retry_interval, max_retries=max_retries)
+
+    def poll_for_serial_numbers(self, context, domains, destinations,
+                                timeout, retry_interval, max_retries):
+        LOG.info(_LI("poll_for_serial_numbers: Calling mdns for %(count)d "
+                     "zones on servers '%(dst)s'") %
+                 {'count': len(domains), 'dst': destinations})
+        # Mdns informs pool manager of the results in batches using
+        # update_statuses
+        return self.notify_client.cast(
+            context, 'poll_for_serial_numbers', domains=domains,
+            destinations=destinations, timeout=timeout,
+            retry_interval=retry_interval, max_retries=max_retries)
+
+    def add_zone(self, context, domain):
+        LOG.info(_LI("add_zone: Calling mdns for zone '%(zone)s'") %
+                 {'zone': domain.name})
+        # Every mdns server keeps its own index of zones, so this is fanned
+        # out to all of them.
+        return self.zone_index_client.prepare(fanout=True).cast(
+            context, 'add_zone', domain=domain)
+
+    def remove_zone(self, context, domain):
+        LOG.info(_LI("remove_zone: Calling mdns for zone '%(zone)s'") %
+                 {'zone': domain.name})
+        return self.zone_index_client.prepare(fanout=True).cast(
+            context, 'remove_zone', domain=domain)
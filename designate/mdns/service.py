@@ -17,12 +17,14 @@ import socket
 import struct
 
 import dns
+import eventlet
 from oslo.config import cfg
 
 from designate import service
 from designate.mdns import handler
 from designate.mdns import middleware
 from designate.mdns import notify
+from designate.mdns import zone_index
 from designate.openstack.common import log as logging
 from designate.i18n import _LE
 from designate.i18n import _LI
@@ -34,13 +36,17 @@ CONF = cfg.CONF
 
 class Service(service.RPCService):
     def __init__(self, *args, **kwargs):
-        notify_endpoint = notify.NotifyEndpoint()
-        kwargs['endpoints'] = [notify_endpoint]
+        # Create an instance of the RequestHandler class
+        self.handler = handler.RequestHandler()
+
+        self._notify_endpoint = notify.NotifyEndpoint()
+        zone_index_endpoint = zone_index.ZoneIndexEndpoint(
+            self.handler.zone_index)
+        kwargs['endpoints'] = [self._notify_endpoint, zone_index_endpoint]
 
         super(Service, self).__init__(*args, **kwargs)
 
-        # Create an instance of the RequestHandler class
-        self.application = handler.RequestHandler()
+        self.application = self.handler
 
         # Wrap the application in any middleware required
         # TODO(kiall): In the future, we want to allow users to pick+choose
@@ -48,6 +54,30 @@ class Service(service.RPCService):
         #              in the API.
         self.application = middleware.ContextMiddleware(self.application)
 
+        # Bounds the number of UDP requests each worker handles concurrently
+        self._handler_pool = eventlet.GreenPool(
+            CONF['service:mdns'].handler_pool_size)
+
+        # Bounds the number of TCP connections each worker has open
+        self._tcp_pool = eventlet.GreenPool(
+            CONF['service:mdns'].tcp_max_connections)
+
+        self._sock_tcp = None
+        self._sock_udp = None
+
+        # Where the kernel supports SO_REUSEPORT, each worker binds its own
+        # sockets once it has been forked, and the kernel spreads flows
+        # across them. Otherwise, bind now so every worker shares the
+        # same sockets.
+        if not self._reuse_port:
+            self._bind_sockets()
+
+    @property
+    def _reuse_port(self):
+        return (CONF['service:mdns'].reuse_port and
+                hasattr(socket, 'SO_REUSEPORT'))
+
+    def _bind_sockets(self):
         # Bind to the TCP port
         LOG.info(_LI('Opening TCP Listening Socket on %(host)s:%(port)d') %
                  {'host': CONF['service:mdns'].host,
@@ -55,6 +85,9 @@ class Service(service.RPCService):
         self._sock_tcp = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self._sock_tcp.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         self._sock_tcp.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        if self._reuse_port:
+            self._sock_tcp.setsockopt(
+                socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
         self._sock_tcp.bind((CONF['service:mdns'].host,
                              CONF['service:mdns'].port))
         self._sock_tcp.listen(CONF['service:mdns'].tcp_backlog)
@@ -64,14 +97,25 @@ class Service(service.RPCService):
                  {'host': CONF['service:mdns'].host,
                   'port': CONF['service:mdns'].port})
         self._sock_udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        if self._reuse_port:
+            self._sock_udp.setsockopt(
+                socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
         self._sock_udp.bind((CONF['service:mdns'].host,
                              CONF['service:mdns'].port))
 
     def start(self):
         super(Service, self).start()
 
+        if self._sock_tcp is None:
+            self._bind_sockets()
+
         self.tg.add_thread(self._handle_tcp)
         self.tg.add_thread(self._handle_udp)
+
+        # Periodically reload the zone index, picking up any changes which
+        # were missed while this server was not listening for them.
+        self.tg.add_timer(CONF['service:mdns'].zone_index_refresh_interval,
+                          self.handler.refresh_zone_index)
         LOG.info(_LI("started mdns service"))
 
     def stop(self):
@@ -79,12 +123,24 @@ class Service(service.RPCService):
         # _handle_udp are stopped too.
         super(Service, self).stop()
 
-    def _deserialize_request(self, payload, addr):
+        self._notify_endpoint.stop()
+
+        # Sockets bound by this worker are not shared with any other, so
+        # close them.
+        if self._reuse_port and self._sock_tcp is not None:
+            self._sock_tcp.close()
+            self._sock_udp.close()
+
+            self._sock_tcp = None
+            self._sock_udp = None
+
+    def _deserialize_request(self, payload, addr, tcp=False):
         """
         Deserialize a DNS Request Packet
 
         :param payload: Raw DNS query payload
         :param addr: Tuple of the client's (IP, Port)
+        :param tcp: Whether the query arrived over TCP
         """
         try:
             request = dns.message.from_wire(payload)
@@ -96,7 +152,7 @@ class Service(service.RPCService):
         else:
             # Create + Attach the initial "environ" dict. This is similar to
             # the environ dict used in typical WSGI middleware.
-            request.environ = {'addr': addr}
+            request.environ = {'addr': addr, 'tcp': tcp}
             return request
 
     def _serialize_response(self, response):
@@ -111,24 +167,70 @@ class Service(service.RPCService):
         LOG.info(_LI("_handle_tcp thread started"))
         while True:
             client, addr = self._sock_tcp.accept()
-            LOG.warn(_LW("Handling TCP Request from: %(host)s:%(port)d") %
+            LOG.warn(_LW("Handling TCP Connection from: %(host)s:%(port)d") %
                      {'host': addr[0], 'port': addr[1]})
 
-            payload = client.recv(65535)
-            (expected_length,) = struct.unpack('!H', payload[0:2])
-            actual_length = len(payload[2:])
-
-            # For now we assume all requests are one packet
-            # TODO(vinod): Handle multipacket requests
-            if (expected_length != actual_length):
-                LOG.warn(_LW("got a packet with unexpected length from "
-                             "%(host)s:%(port)d. Expected length=%(elen)d. "
-                             "Actual length=%(alen)d.") %
-                         {'host': addr[0], 'port': addr[1],
-                          'elen': expected_length, 'alen': actual_length})
-                client.close()
-            else:
-                self.tg.add_thread(self._handle, addr, payload[2:], client)
+            # Blocks while the maximum number of connections are open,
+            # leaving further connections queued in the listen backlog.
+            self._tcp_pool.spawn_n(self._handle_tcp_conn, client, addr)
+
+    def _recv_exactly(self, client, length):
+        """
+        Receive exactly length bytes from a TCP client
+
+        :return: The bytes received, or None if the client closed the
+                 connection first.
+        """
+        chunks = []
+        while length > 0:
+            chunk = client.recv(length)
+
+            if not chunk:
+                return None
+
+            chunks.append(chunk)
+            length -= len(chunk)
+
+        return b''.join(chunks)
+
+    def _handle_tcp_conn(self, client, addr):
+        """
+        Handle a series of DNS Queries on a single TCP connection
+
+        Each query is prefixed by its 2 byte length, and is answered before
+        the next is read. The connection is closed by the client, or once it
+        has been idle for longer than the configured timeout.
+        """
+        client.settimeout(CONF['service:mdns'].tcp_recv_timeout)
+
+        try:
+            while True:
+                prefix = self._recv_exactly(client, 2)
+
+                if prefix is None:
+                    break
+
+                (length,) = struct.unpack('!H', prefix)
+                payload = self._recv_exactly(client, length)
+
+                if payload is None:
+                    LOG.warn(_LW("Connection from %(host)s:%(port)d closed "
+                                 "before a complete request of length "
+                                 "%(length)d was received") %
+                             {'host': addr[0], 'port': addr[1],
+                              'length': length})
+                    break
+
+                self._handle(addr, payload, client)
+        except socket.timeout:
+            LOG.debug('Closing idle TCP connection from %(host)s:%(port)d',
+                      {'host': addr[0], 'port': addr[1]})
+        except socket.error:
+            LOG.exception(_LE("Error while handling TCP connection from "
+                              "%(host)s:%(port)d") %
+                          {'host': addr[0], 'port': addr[1]})
+        finally:
+            client.close()
 
     def _handle_udp(self):
         LOG.info(_LI("_handle_udp thread started"))
@@ -139,7 +241,15 @@ class Service(service.RPCService):
             LOG.warn(_LW("Handling UDP Request from: %(host)s:%(port)d") %
                      {'host': addr[0], 'port': addr[1]})
 
-            self.tg.add_thread(self._handle, addr, payload)
+            # Shed load rather than queueing an unbounded number of requests,
+            # the client will retry.
+            if self._handler_pool.free() == 0:
+                LOG.warn(_LW("Dropping UDP Request from: %(host)s:%(port)d, "
+                             "too many requests in progress") %
+                         {'host': addr[0], 'port': addr[1]})
+                continue
+
+            self._handler_pool.spawn_n(self._handle, addr, payload)
 
     def _handle(self, addr, payload, client=None):
         """
@@ -150,7 +260,8 @@ class Service(service.RPCService):
         :param client: Client socket (for TCP only)
         """
         try:
-            request = self._deserialize_request(payload, addr)
+            request = self._deserialize_request(payload, addr,
+                                                client is not None)
 
             if request is None:
                 # We failed to deserialize the request, generate a failure
@@ -161,19 +272,39 @@ class Service(service.RPCService):
             else:
                 response = self.application(request)
 
-            # send back a response only if present
-            if response:
+            # Zone transfers may be made up of a series of messages, which
+            # are sent as soon as each one is built.
+            if isinstance(response, dns.message.Message):
+                responses = [response]
+            else:
+                responses = response
+
+            for response in responses:
+                # send back a response only if present
+                if not response:
+                    continue
+
                 response = self._serialize_response(response)
 
                 if client is not None:
                     # Handle TCP Responses
                     msg_length = len(response)
                     tcp_response = struct.pack("!H", msg_length) + response
-                    client.send(tcp_response)
-                    client.close()
+                    client.sendall(tcp_response)
                 else:
-                    # Handle UDP Responses
+                    # Handle UDP Responses. A UDP query never gets more than
+                    # a single datagram back, zone transfers are only ever
+                    # streamed over TCP.
                     self._sock_udp.sendto(response, addr)
+                    break
+        except socket.error:
+            if client is not None:
+                # The TCP connection is broken, leave the connection handler
+                # to close it.
+                raise
+            LOG.exception(_LE("Unhandled exception while processing request "
+                              "from %(host)s:%(port)d") %
+                          {'host': addr[0], 'port': addr[1]})
         except Exception:
             LOG.exception(_LE("Unhandled exception while processing request "
                               "from %(host)s:%(port)d") %
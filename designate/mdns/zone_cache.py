@@ -0,0 +1,108 @@
+# Copyright 2014 Hewlett-Packard Development Company, L.P.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import collections
+
+from designate import dnsutils
+from designate.openstack.common import log as logging
+
+
+LOG = logging.getLogger(__name__)
+
+
+class ZoneSnapshot(object):
+    """A prebuilt, immutable view of a zone at a single serial"""
+    def __init__(self, domain_id, serial, soa_rrsets, rrsets, size=None):
+        self.domain_id = domain_id
+        self.serial = serial
+        self.soa_rrsets = soa_rrsets
+        self.rrsets = rrsets
+        self.size = size if size is not None else self._estimate_size()
+
+    def _estimate_size(self):
+        size = 0
+        for rrset in self.soa_rrsets:
+            size += dnsutils.rrset_wire_size(rrset)
+        for rrset in self.rrsets:
+            size += dnsutils.rrset_wire_size(rrset)
+        return size
+
+
+class ZoneSnapshotCache(object):
+    """
+    An LRU cache of ZoneSnapshots keyed by (domain_id, serial)
+
+    Only the latest known serial of each zone is retained, and the least
+    recently used zones are evicted once the total estimated size of the
+    cached snapshots exceeds max_size bytes.
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.size = 0
+
+        # Maps domain_id -> ZoneSnapshot, ordered from least to most recently
+        # used.
+        self._snapshots = collections.OrderedDict()
+
+    def get(self, domain_id, serial):
+        snapshot = self._snapshots.get(domain_id)
+
+        if snapshot is None or snapshot.serial != serial:
+            return None
+
+        # Mark the snapshot as the most recently used
+        del self._snapshots[domain_id]
+        self._snapshots[domain_id] = snapshot
+
+        return snapshot
+
+    def set(self, snapshot):
+        cached = self._snapshots.get(snapshot.domain_id)
+
+        if (cached is not None and
+                dnsutils.serial_lt(snapshot.serial, cached.serial)):
+            LOG.debug('Not caching snapshot of %(domain_id)s at serial '
+                      '%(serial)d, serial %(cached)d is already cached', {
+                          'domain_id': snapshot.domain_id,
+                          'serial': snapshot.serial,
+                          'cached': cached.serial})
+            return
+
+        self.invalidate(snapshot.domain_id)
+
+        if snapshot.size > self.max_size:
+            LOG.debug('Not caching snapshot of %(domain_id)s, size %(size)d '
+                      'exceeds the cache size', {
+                          'domain_id': snapshot.domain_id,
+                          'size': snapshot.size})
+            return
+
+        while self._snapshots and self.size + snapshot.size > self.max_size:
+            _, evicted = self._snapshots.popitem(last=False)
+            self.size -= evicted.size
+
+        self._snapshots[snapshot.domain_id] = snapshot
+        self.size += snapshot.size
+
+    def invalidate(self, domain_id):
+        snapshot = self._snapshots.pop(domain_id, None)
+
+        if snapshot is not None:
+            self.size -= snapshot.size
+
+    def clear(self):
+        self._snapshots.clear()
+        self.size = 0
+
+    def __len__(self):
+        return len(self._snapshots)
@@ -0,0 +1,134 @@
+# Copyright 2014 Hewlett-Packard Development Company, L.P.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+from oslo import messaging
+
+from designate.openstack.common import log as logging
+from designate.i18n import _LI
+
+
+LOG = logging.getLogger(__name__)
+
+# Key under which a trie node stores the id of the zone rooted at that node.
+# Labels are always strings, so None can never collide with a child label.
+_ZONE = None
+
+
+def _labels(name):
+    """Split a domain name into its labels, from the root downwards"""
+    name = name.lower().rstrip('.')
+
+    if not name:
+        return []
+
+    return reversed(name.split('.'))
+
+
+class ZoneIndex(object):
+    """
+    An in-memory index of the zones served by mDNS
+
+    Zones are stored in a trie keyed by their labels in reverse order, so the
+    zone enclosing any name is found in O(labels) without touching storage.
+    """
+    def __init__(self):
+        self.loaded = False
+
+        self._root = {}
+        # Maps domain_id -> name, used to find a zone's node on removal
+        self._names = {}
+
+    def load(self, domains):
+        """Replace the contents of the index with the given domains"""
+        index = ZoneIndex()
+
+        for domain in domains:
+            index.add(domain.id, domain.name)
+
+        # Swap in the new trie in one step, so concurrent lookups always see
+        # a complete index.
+        self._root, self._names = index._root, index._names
+        self.loaded = True
+
+    def add(self, domain_id, name):
+        if domain_id in self._names:
+            self.remove(domain_id)
+
+        node = self._root
+        for label in _labels(name):
+            node = node.setdefault(label, {})
+
+        node[_ZONE] = domain_id
+        self._names[domain_id] = name
+
+    def remove(self, domain_id):
+        name = self._names.pop(domain_id, None)
+
+        if name is None:
+            return
+
+        path = [self._root]
+        labels = list(_labels(name))
+        for label in labels:
+            path.append(path[-1][label])
+
+        if path[-1].get(_ZONE) == domain_id:
+            del path[-1][_ZONE]
+
+        # Prune the nodes which no longer lead to any zone
+        for label, node in reversed(list(zip(labels, path[:-1]))):
+            if node[label]:
+                break
+            del node[label]
+
+    def find(self, name):
+        """
+        Find the zone enclosing name
+
+        :return: The id of the closest enclosing zone, or None if no zone
+                 served by mDNS encloses name.
+        """
+        node = self._root
+        domain_id = node.get(_ZONE)
+
+        for label in _labels(name):
+            node = node.get(label)
+
+            if node is None:
+                break
+
+            domain_id = node.get(_ZONE, domain_id)
+
+        return domain_id
+
+    def __len__(self):
+        return len(self._names)
+
+
+class ZoneIndexEndpoint(object):
+    """Keeps a ZoneIndex up to date as zones are created and deleted"""
+    RPC_ZONE_INDEX_API_VERSION = '1.0'
+
+    target = messaging.Target(
+        namespace='zone_index', version=RPC_ZONE_INDEX_API_VERSION)
+
+    def __init__(self, zone_index):
+        self.zone_index = zone_index
+
+        LOG.info(_LI("started mdns zone index endpoint"))
+
+    def add_zone(self, context, domain):
+        self.zone_index.add(domain.id, domain.name)
+
+    def remove_zone(self, context, domain):
+        self.zone_index.remove(domain.id)
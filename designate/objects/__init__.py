@@ -19,7 +19,9 @@ from designate.objects.base import DictObjectMixin  # noqa
 from designate.objects.base import ListObjectMixin  # noqa
 from designate.objects.backend_option import BackendOption, BackendOptionList  # noqa
 from designate.objects.blacklist import Blacklist, BlacklistList  # noqa
+from designate.objects.change import Change, ChangeList  # noqa
 from designate.objects.domain import Domain, DomainList  # noqa
+from designate.objects.journal_entry import JournalEntry, JournalEntryList  # noqa
 from designate.objects.pool_manager_status import PoolManagerStatus, PoolManagerStatusList  # noqa
 from designate.objects.pool_server import PoolServer, PoolServerList  # noqa
 from designate.objects.pool import Pool, PoolList  # noqa
@@ -0,0 +1,29 @@
+# Copyright 2014 Hewlett-Packard Development Company, L.P.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+from designate.objects import base
+
+
+class Change(base.DictObjectMixin, base.DesignateObject):
+    # A single CREATE, UPDATE or DELETE of a ChangeList applied to a domain.
+    # Changes with a record act on that record within the recordset, others
+    # act on the recordset itself.
+    FIELDS = {
+        'action': {},
+        'recordset': {},
+        'record': {}
+    }
+
+
+class ChangeList(base.ListObjectMixin, base.DesignateObject):
+    LIST_ITEM_TYPE = Change
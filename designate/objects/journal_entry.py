@@ -0,0 +1,35 @@
+# Copyright 2014 Hewlett-Packard Development Company, L.P.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+from designate.objects import base
+
+
+class JournalEntry(base.DictObjectMixin, base.PersistentObjectMixin,
+                   base.DesignateObject):
+    # An entry with an action of 'NONE' records a serial increment which did
+    # not change any records, keeping the chain of serials unbroken.
+    FIELDS = {
+        'domain_id': {},
+        'serial': {},
+        'previous_serial': {},
+        'sequence': {},
+        'action': {},
+        'name': {},
+        'type': {},
+        'ttl': {},
+        'data': {}
+    }
+
+
+class JournalEntryList(base.ListObjectMixin, base.DesignateObject):
+    LIST_ITEM_TYPE = JournalEntry
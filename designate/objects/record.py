@@ -19,6 +19,8 @@ class Record(base.DictObjectMixin, base.PersistentObjectMixin,
              base.DesignateObject):
     # TODO(kiall): `hash` is an implementation detail of our SQLA driver,
     #              so we should remove it.
+    # NOTE: `rdata` is the base64 encoded wire format of `data`, computed on
+    #       write so mDNS need not parse `data` for every response.
     FIELDS = {
         'data': {},
         'domain_id': {},
@@ -28,6 +30,7 @@ class Record(base.DictObjectMixin, base.PersistentObjectMixin,
         'managed_plugin_name': {},
         'managed_plugin_type': {},
         'hash': {},
+        'rdata': {},
         'description': {},
         'status': {},
         'tenant_id': {},
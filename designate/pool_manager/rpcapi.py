@@ -33,14 +33,15 @@ class PoolManagerAPI(object):
         API version history:
 
         1.0 - Initial version
+        1.1 - Add update_statuses
     """
-    RPC_API_VERSION = '1.0'
+    RPC_API_VERSION = '1.1'
 
     def __init__(self, topic=None):
         topic = topic if topic else cfg.CONF.pool_manager_topic
 
         target = messaging.Target(topic=topic, version=self.RPC_API_VERSION)
-        self.client = rpc.get_client(target, version_cap='1.0')
+        self.client = rpc.get_client(target, version_cap='1.1')
 
     def create_domain(self, context, domain):
         LOG.info(_LI("create_domain: Calling pool manager's create_domain."))
@@ -62,3 +63,9 @@ class PoolManagerAPI(object):
         return self.client.cast(
             context, 'update_status', domain=domain, server=server,
             status=status, serial_number=serial_number)
+
+    def update_statuses(self, context, statuses):
+        LOG.info(_LI("update_statuses: Calling pool manager's "
+                     "update_statuses."))
+        return self.client.cast(
+            context, 'update_statuses', statuses=statuses)
@@ -22,6 +22,7 @@ from designate import backend
 from designate import exceptions
 from designate import service
 from designate import storage
+from designate.mdns import rpcapi as mdns_rpcapi
 from designate.pool_manager import cache
 from designate.openstack.common import log as logging
 from designate.openstack.common import threadgroup
@@ -39,8 +40,9 @@ class Service(service.RPCService):
     API version history:
 
         1.0 - Initial version
+        1.1 - Add update_statuses
     """
-    RPC_API_VERSION = '1.0'
+    RPC_API_VERSION = '1.1'
 
     target = messaging.Target(version=RPC_API_VERSION)
 
@@ -73,6 +75,16 @@ class Service(service.RPCService):
             self.server_backend_maps.append(server_backend_map)
         self.thread_group = threadgroup.ThreadGroup()
 
+        self._mdns_api = None
+
+    @property
+    def mdns_api(self):
+        # Created on demand, as the RPC transport is not set up until the
+        # service is started.
+        if self._mdns_api is None:
+            self._mdns_api = mdns_rpcapi.MdnsAPI()
+        return self._mdns_api
+
     def start(self):
 
         for server_backend_map in self.server_backend_maps:
@@ -132,6 +144,18 @@ class Service(service.RPCService):
         """
         LOG.debug("Calling update_domain.")
 
+        # Poll every server for the domain's new serial, mdns reports the
+        # outcome with update_statuses
+        destinations = ['%s:%d' % (server['host'], server['port'])
+                        for server in self.servers]
+
+        if destinations:
+            self.mdns_api.poll_for_serial_numbers(
+                context, [domain], destinations,
+                cfg.CONF['service:pool_manager'].poll_timeout,
+                cfg.CONF['service:pool_manager'].poll_retry_interval,
+                cfg.CONF['service:pool_manager'].poll_max_retries)
+
     def update_status(self, context, domain, server, status, serial_number):
         """
         :param context: Security context information.
@@ -145,6 +169,17 @@ class Service(service.RPCService):
         """
         LOG.debug("Calling update_status.")
 
+    def update_statuses(self, context, statuses):
+        """
+        :param context: Security context information.
+        :param statuses: A list of (domain, server, status, serial_number)
+                         tuples, each as passed to update_status.
+        :return: None
+        """
+        LOG.debug("Calling update_statuses.")
+        for domain, server, status, serial_number in statuses:
+            self.update_status(context, domain, server, status, serial_number)
+
     def periodic_sync(self):
         """
         :return: None
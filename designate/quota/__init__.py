@@ -32,6 +32,10 @@ cfg.CONF.register_opts([
                help='Number of records allowed per domain'),
     cfg.IntOpt('quota-recordset-records', default=20,
                help='Number of records allowed per recordset'),
+    cfg.IntOpt('quota-cache-ttl', default=10,
+               help='Number of seconds to cache the quota limits of each '
+                    'tenant for. Limits changed through another service may '
+                    'take this long to apply. A 0 disables the cache.'),
 ])
 
 
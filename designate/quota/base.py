@@ -14,6 +14,7 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 import abc
+import time
 
 import six
 from oslo.config import cfg
@@ -28,6 +29,12 @@ class Quota(DriverPlugin):
     __plugin_ns__ = 'designate.quota'
     __plugin_type__ = 'quota'
 
+    def __init__(self):
+        super(Quota, self).__init__()
+
+        # Maps tenant_id -> (expiry time, quotas)
+        self._cache = {}
+
     def limit_check(self, context, tenant_id, **values):
         quotas = self.get_quotas(context, tenant_id)
 
@@ -41,10 +48,31 @@ class Quota(DriverPlugin):
     def get_quotas(self, context, tenant_id):
         quotas = self.get_default_quotas(context)
 
-        quotas.update(self._get_quotas(context, tenant_id))
+        quotas.update(self._get_cached_quotas(context, tenant_id))
+
+        return quotas
+
+    def _get_cached_quotas(self, context, tenant_id):
+        now = time.time()
+        cached = self._cache.get(tenant_id)
+
+        if cached is not None and cached[0] > now:
+            return cached[1]
+
+        quotas = self._get_quotas(context, tenant_id)
+
+        if cfg.CONF.quota_cache_ttl > 0:
+            # Forget the tenants whose limits have expired
+            self._cache = dict((k, v) for k, v in self._cache.items()
+                               if v[0] > now)
+            self._cache[tenant_id] = (now + cfg.CONF.quota_cache_ttl, quotas)
 
         return quotas
 
+    def invalidate(self, tenant_id):
+        """Forget the cached quota limits of a tenant"""
+        self._cache.pop(tenant_id, None)
+
     @abc.abstractmethod
     def _get_quotas(self, context, tenant_id):
         pass
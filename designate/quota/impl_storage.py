@@ -36,6 +36,10 @@ class StorageQuota(Quota):
         self.storage = storage.get_storage(storage_driver)
 
     def _get_quotas(self, context, tenant_id):
+        # The limits are cached per tenant, so must not depend on the context
+        context = context.deepcopy()
+        context.all_tenants = True
+
         quotas = self.storage.find_quotas(context, {
             'tenant_id': tenant_id,
         })
@@ -82,6 +86,8 @@ class StorageQuota(Quota):
         else:
             update_quota(quota)
 
+        self.invalidate(tenant_id)
+
         return {resource: hard_limit}
 
     def reset_quotas(self, context, tenant_id):
@@ -94,3 +100,5 @@ class StorageQuota(Quota):
 
         for quota in quotas:
             self.storage.delete_quota(context, quota['id'])
+
+        self.invalidate(tenant_id)
@@ -14,6 +14,8 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 import abc
+import contextlib
+import datetime
 import threading
 
 import six
@@ -21,16 +23,21 @@ from oslo.db.sqlalchemy import utils as oslo_utils
 from oslo.db import exception as oslo_db_exception
 from oslo.utils import timeutils
 from sqlalchemy import exc as sqlalchemy_exc
-from sqlalchemy import select, or_
+from sqlalchemy import select, or_, Boolean, DateTime, Integer, String
 
 from designate.openstack.common import log as logging
 from designate import exceptions
+from designate import utils as designate_utils
 from designate.sqlalchemy import session
 from designate.sqlalchemy import utils
+from designate.sqlalchemy.types import UUID
 
 
 LOG = logging.getLogger(__name__)
 
+# The maximum number of rows to insert with a single executemany
+INSERT_CHUNK_SIZE = 1000
+
 
 def _set_object_from_model(obj, model, **extra):
     """Update a DesignateObject with the values from a SQLA Model"""
@@ -47,6 +54,61 @@ def _set_object_from_model(obj, model, **extra):
     return obj
 
 
+def _truncate_datetimes(values):
+    """Drop the microseconds of the date and time values of a row"""
+    for key, value in values.items():
+        if isinstance(value, datetime.datetime):
+            values[key] = value.replace(microsecond=0)
+
+
+def _get_insert_values(table, values, microseconds=True):
+    """
+    Complete the values of a new row with the client side defaults of table
+
+    Returns the values to insert, and the values of the whole row. The row is
+    None if any column is generated by the database itself. Unless
+    microseconds is True, they are dropped from date and time values.
+    """
+    values = dict(values)
+    row = dict(values)
+
+    for column in table.c:
+        if column.name in values:
+            continue
+
+        default = column.default
+
+        if default is None:
+            if column.server_default is not None:
+                return values, None
+
+            row[column.name] = None
+        elif default.is_callable:
+            values[column.name] = row[column.name] = default.arg(None)
+        elif default.is_scalar:
+            values[column.name] = row[column.name] = default.arg
+        else:
+            return values, None
+
+    if not microseconds:
+        _truncate_datetimes(values)
+        _truncate_datetimes(row)
+
+    return values, row
+
+
+def _set_object_from_values(obj, values):
+    """Update a DesignateObject with the column values of a row"""
+
+    for fieldname in obj.FIELDS.keys():
+        if fieldname in values:
+            obj[fieldname] = values[fieldname]
+
+    obj.obj_reset_changes()
+
+    return obj
+
+
 def _set_listobject_from_models(obj, models, map_=None):
         for model in models:
             extra = {}
@@ -88,6 +150,39 @@ class SQLAlchemy(object):
 
         return self.local_store.session
 
+    @property
+    def read_session(self):
+        """
+        A session for queries which only read, on a replica where possible
+
+        Within a transaction, reads stay on the primary to see the writes
+        made by the transaction, as do reads within read_primary().
+        """
+        if (self.session.transaction is not None or
+                getattr(self.local_store, 'read_primary', 0) or
+                not session.use_replica(self.get_name())):
+            return self.session
+
+        if not hasattr(self.local_store, 'replica_session'):
+            self.local_store.replica_session = session.get_replica_session(
+                self.get_name())
+
+        return self.local_store.replica_session
+
+    @contextlib.contextmanager
+    def read_primary(self):
+        """
+        Send the reads made within the block to the primary database, for
+        callers which must see the latest committed changes.
+        """
+        depth = getattr(self.local_store, 'read_primary', 0)
+        self.local_store.read_primary = depth + 1
+
+        try:
+            yield
+        finally:
+            self.local_store.read_primary = depth
+
     def begin(self):
         self.session.begin(subtransactions=True)
 
@@ -97,6 +192,16 @@ class SQLAlchemy(object):
     def rollback(self):
         self.session.rollback()
 
+    def _supports_returning(self):
+        # NOTE: Of the databases we support, only PostgreSQL can return the
+        #       columns of a row it has inserted or updated.
+        return self.engine.dialect.name == 'postgresql'
+
+    def _supports_microseconds(self):
+        # NOTE: MySQL DATETIME columns only hold whole seconds, the values we
+        #       write must be truncated to match the values read back.
+        return self.engine.dialect.name != 'mysql'
+
     def _apply_criterion(self, table, query, criterion):
         if criterion is not None:
             for name, value in criterion.items():
@@ -109,6 +214,9 @@ class SQLAlchemy(object):
                 elif isinstance(value, basestring) and value.startswith('!'):
                     queryval = value[1:]
                     query = query.where(column != queryval)
+                # Any of a list of values
+                elif isinstance(value, (list, tuple)):
+                    query = query.where(column.in_(value))
                 else:
                     query = query.where(column == value)
 
@@ -163,20 +271,83 @@ class SQLAlchemy(object):
             for key in extra_values:
                 values[key] = extra_values[key]
 
+        # Generate the id, timestamps, version etc of the row here, so the
+        # row need not be refetched once inserted.
+        values, row = _get_insert_values(table, values,
+                                         self._supports_microseconds())
+
         query = table.insert()
 
+        if row is None and self._supports_returning():
+            query = query.returning(*table.c)
+
         try:
-            resultproxy = self.session.execute(query, [dict(values)])
+            resultproxy = self.session.execute(query, [values])
         except oslo_db_exception.DBDuplicateEntry:
             raise exc_dup()
 
-        # Refetch the row, for generated columns etc
-        query = select([table]).where(
-            table.c.id == resultproxy.inserted_primary_key[0])
-        resultproxy = self.session.execute(query)
+        if row is not None:
+            return _set_object_from_values(obj, row)
+
+        if not resultproxy.returns_rows:
+            # Refetch the row, for columns generated by the database
+            query = select([table]).where(
+                table.c.id == resultproxy.inserted_primary_key[0])
+            resultproxy = self.session.execute(query)
 
         return _set_object_from_model(obj, resultproxy.fetchone())
 
+    def _create_many(self, table, objs, exc_dup, skip_values=None,
+                     extra_values=None):
+        """
+        Create many objects at once
+
+        The rows are inserted with one executemany per INSERT_CHUNK_SIZE
+        objects, rather than one statement per object.
+
+        :param extra_values: A list of dicts of extra values, one per object.
+        """
+        rows = []
+
+        for index, obj in enumerate(objs):
+            # Ensure the Object is valid
+            obj.validate()
+
+            values = obj.obj_get_changes()
+
+            if skip_values is not None:
+                for skip_value in skip_values:
+                    values.pop(skip_value, None)
+
+            if extra_values is not None:
+                values.update(extra_values[index])
+
+            values, row = _get_insert_values(table, values,
+                                             self._supports_microseconds())
+
+            if row is None:
+                # The row can only be known by refetching it
+                self._create(table, obj, exc_dup, skip_values,
+                             extra_values and extra_values[index])
+                continue
+
+            rows.append((obj, row))
+
+        for i in range(0, len(rows), INSERT_CHUNK_SIZE):
+            chunk = rows[i:i + INSERT_CHUNK_SIZE]
+
+            # Every row holds a value for every column, as executemany needs
+            # the same keys in every row
+            try:
+                self.session.execute(table.insert(), [r for _, r in chunk])
+            except oslo_db_exception.DBDuplicateEntry:
+                raise exc_dup()
+
+        for obj, row in rows:
+            _set_object_from_values(obj, row)
+
+        return objs
+
     def _find(self, context, table, cls, list_cls, exc_notfound, criterion,
               one=False, marker=None, limit=None, sort_key=None,
               sort_dir=None, query=None):
@@ -196,7 +367,7 @@ class SQLAlchemy(object):
             #              a NotFound. Limiting to 2 allows us to determine
             #              when we need to raise, while selecting the minimal
             #              number of rows.
-            resultproxy = self.session.execute(query.limit(2))
+            resultproxy = self.read_session.execute(query.limit(2))
             results = resultproxy.fetchall()
 
             if len(results) != 1:
@@ -204,33 +375,17 @@ class SQLAlchemy(object):
             else:
                 return _set_object_from_model(cls(), results[0])
         else:
+            sort_keys = designate_utils.get_paging_keys(sort_key)
+
             if marker is not None:
-                # If marker is not none and basestring we query it.
-                # Otherwise, return all matching records
-                marker_query = select([table]).where(table.c.id == marker)
-
-                try:
-                    marker_resultproxy = self.session.execute(marker_query)
-                    marker = marker_resultproxy.fetchone()
-                    if marker is None:
-                        raise exceptions.MarkerNotFound(
-                            'Marker %s could not be found' % marker)
-                except oslo_db_exception.DBError as e:
-                    # Malformed UUIDs return StatementError wrapped in a
-                    # DBError
-                    if isinstance(e.inner_exception,
-                                  sqlalchemy_exc.StatementError):
-                        raise exceptions.InvalidMarker()
-                    else:
-                        raise
+                marker = self._get_marker_values(table, marker, sort_keys)
 
             try:
                 query = utils.paginate_query(
-                    query, table, limit,
-                    [sort_key, 'id', 'created_at'], marker=marker,
+                    query, table, limit, sort_keys, marker=marker,
                     sort_dir=sort_dir)
 
-                resultproxy = self.session.execute(query)
+                resultproxy = self.read_session.execute(query)
                 results = resultproxy.fetchall()
 
                 return _set_listobject_from_models(list_cls(), results)
@@ -243,6 +398,116 @@ class SQLAlchemy(object):
             except ValueError as value_error:
                 raise exceptions.ValueError(value_error.message)
 
+    def _iter(self, find, batch_size, sort_key=None):
+        """
+        Yield every object found by find, fetching batch_size at a time
+
+        find is called with the marker and limit of each batch, as _find is.
+        Each batch seeks past the last row of the one before, so only a
+        single batch is held at once, however many rows there are.
+        """
+        sort_keys = designate_utils.get_paging_keys(sort_key)
+        marker = None
+
+        while True:
+            batch = find(marker=marker, limit=batch_size)
+
+            for obj in batch:
+                yield obj
+
+            if len(batch) < batch_size:
+                return
+
+            marker = dict((k, getattr(batch[-1], k)) for k in sort_keys)
+
+    def _get_marker_value(self, column, value):
+        """
+        Check a value decoded from a marker against its column's type,
+        returning it in the form the column is queried with.
+        """
+        if value is None:
+            if not column.nullable:
+                raise exceptions.InvalidMarker()
+
+            return None
+
+        if isinstance(column.type, DateTime):
+            try:
+                return timeutils.parse_strtime(value)
+            except (TypeError, ValueError):
+                raise exceptions.InvalidMarker()
+
+        if isinstance(column.type, UUID):
+            valid = designate_utils.is_uuid_like(value)
+        elif isinstance(column.type, Boolean):
+            valid = isinstance(value, bool)
+        elif isinstance(column.type, Integer):
+            valid = (isinstance(value, six.integer_types) and
+                     not isinstance(value, bool))
+        elif isinstance(column.type, String):
+            valid = isinstance(value, six.string_types)
+        else:
+            valid = True
+
+        if not valid:
+            raise exceptions.InvalidMarker()
+
+        return value
+
+    def _get_marker_values(self, table, marker, sort_keys):
+        """Get the sort key values of the row a page of results follows"""
+        if isinstance(marker, dict):
+            # The values themselves, as passed on by _iter
+            return marker
+
+        if not designate_utils.is_uuid_like(marker):
+            decoded = designate_utils.decode_marker(marker)
+
+            if decoded is None or decoded[0] != sort_keys:
+                raise exceptions.InvalidMarker()
+
+            values = {}
+
+            for sort_key, value in zip(*decoded):
+                column = getattr(table.c, sort_key, None)
+
+                if column is None:
+                    raise exceptions.InvalidMarker()
+
+                values[sort_key] = self._get_marker_value(column, value)
+
+            return values
+
+        # Markers which are the id of a row, rather than built by
+        # encode_marker, need the row's values looked up
+        query = select([table]).where(table.c.id == marker)
+
+        try:
+            row = self.read_session.execute(query).fetchone()
+        except oslo_db_exception.DBError as e:
+            # Malformed UUIDs return StatementError wrapped in a DBError
+            if isinstance(e.inner_exception, sqlalchemy_exc.StatementError):
+                raise exceptions.InvalidMarker()
+            else:
+                raise
+
+        if row is None:
+            raise exceptions.MarkerNotFound(
+                'Marker %s could not be found' % marker)
+
+        return row
+
+    def _execute_update(self, query, exc_dup, exc_notfound=None):
+        try:
+            resultproxy = self.session.execute(query)
+        except oslo_db_exception.DBDuplicateEntry:
+            raise exc_dup()
+
+        if exc_notfound is not None and resultproxy.rowcount != 1:
+            raise exc_notfound()
+
+        return resultproxy
+
     def _update(self, context, table, obj, exc_dup, exc_notfound,
                 skip_values=None):
         # Ensure the Object is valid
@@ -254,6 +519,21 @@ class SQLAlchemy(object):
             for skip_value in skip_values:
                 values.pop(skip_value, None)
 
+        # Generate the updated_at etc timestamps here, so they are known
+        # without refetching the row.
+        for column in table.c:
+            onupdate = column.onupdate
+
+            if column.name in values or onupdate is None:
+                continue
+            elif onupdate.is_callable:
+                values[column.name] = onupdate.arg(None)
+            elif onupdate.is_scalar:
+                values[column.name] = onupdate.arg
+
+        if not self._supports_microseconds():
+            _truncate_datetimes(values)
+
         query = table.update()\
                      .where(table.c.id == obj.id)\
                      .values(**values)
@@ -262,15 +542,34 @@ class SQLAlchemy(object):
         query = self._apply_deleted_criteria(context, table, query)
         query = self._apply_version_increment(context, table, query)
 
-        try:
-            resultproxy = self.session.execute(query)
-        except oslo_db_exception.DBDuplicateEntry:
-            raise exc_dup()
+        if self._supports_returning():
+            query = query.returning(*table.c)
 
-        if resultproxy.rowcount != 1:
-            raise exc_notfound()
+            resultproxy = self._execute_update(query, exc_dup, exc_notfound)
+
+            return _set_object_from_model(obj, resultproxy.fetchone())
+
+        # Without RETURNING, the row is known from the object itself when it
+        # holds every column, and the row is still at the object's version.
+        # Otherwise the row was changed since the object was read, and is
+        # refetched.
+        columns = [c.name for c in table.c if c.name in obj.FIELDS]
+
+        if (hasattr(table.c, 'version') and
+                all(obj.obj_attr_is_set(c) for c in columns)):
+            resultproxy = self._execute_update(
+                query.where(table.c.version == obj.version), exc_dup)
+
+            if resultproxy.rowcount == 1:
+                row = dict((c, getattr(obj, c)) for c in columns)
+                row.update(values)
+                row['version'] = obj.version + 1
 
-        # Refetch the row, for generated columns etc
+                return _set_object_from_values(obj, row)
+
+        self._execute_update(query, exc_dup, exc_notfound)
+
+        # Refetch the row, as the object does not tell us all of it
         query = select([table]).where(table.c.id == obj.id)
         resultproxy = self.session.execute(query)
 
@@ -299,8 +598,7 @@ class SQLAlchemy(object):
         if resultproxy.rowcount != 1:
             raise exc_notfound()
 
-        # Refetch the row, for generated columns etc
-        query = select([table]).where(table.c.id == obj.id)
-        resultproxy = self.session.execute(query)
+        # The row is gone, so there is nothing to refetch
+        obj.obj_reset_changes()
 
-        return _set_object_from_model(obj, resultproxy.fetchone())
+        return obj
@@ -15,7 +15,10 @@
 # under the License.
 
 """Session Handling for SQLAlchemy backend."""
+import random
+import time
 
+import sqlalchemy
 from oslo.config import cfg
 from oslo.db.sqlalchemy import session
 
@@ -28,6 +31,10 @@ CONF = cfg.CONF
 
 
 _FACADES = {}
+_REPLICA_FACADES = {}
+
+# Maps name -> The time a write to the primary database was last committed
+_LAST_WRITES = {}
 
 
 def _create_facade_lazily(name):
@@ -47,3 +54,47 @@ def get_engine(name):
 def get_session(name, **kwargs):
     facade = _create_facade_lazily(name)
     return facade.get_session(**kwargs)
+
+
+def _create_replica_facades_lazily(name):
+    if name not in _REPLICA_FACADES:
+        conf = cfg.CONF[name]
+        connections = getattr(conf, 'replica_connections', [])
+
+        options = dict(conf.iteritems())
+        options.pop('slave_connection', None)
+
+        _REPLICA_FACADES[name] = [session.EngineFacade(c, **options)
+                                  for c in connections]
+
+        if connections:
+            # Note when the primary was written to, so the replicas are not
+            # read from until they have caught up.
+            def _record_write(conn):
+                _LAST_WRITES[name] = time.time()
+
+            sqlalchemy.event.listen(get_engine(name), 'commit', _record_write)
+
+    return _REPLICA_FACADES[name]
+
+
+def use_replica(name):
+    """
+    Check whether reads should be sent to a replica of the database
+
+    Reads stay on the primary when there are no replicas, and for
+    replica_stale_window seconds after a write to the primary was committed,
+    as the replicas may not have it yet.
+    """
+    if not _create_replica_facades_lazily(name):
+        return False
+
+    stale_window = cfg.CONF[name].replica_stale_window
+
+    return time.time() - _LAST_WRITES.get(name, 0) >= stale_window
+
+
+def get_replica_session(name, **kwargs):
+    """Get a session on a randomly chosen replica of the database"""
+    facade = random.choice(_create_replica_facades_lazily(name))
+    return facade.get_session(**kwargs)
@@ -37,7 +37,36 @@ def get_migration_manager(repo_path, url, init_version=None):
     return manager.MigrationManager(migration_config)
 
 
-# copy from olso/db/sqlalchemy/utils.py
+def like_prefix(column, prefix, escape='!'):
+    """
+    Build a LIKE clause matching the values of column which begin with
+    prefix, escaping any LIKE wildcards within prefix.
+    """
+    for char in (escape, '%', '_'):
+        prefix = prefix.replace(char, escape + char)
+
+    return column.like(prefix + '%', escape=escape)
+
+
+def _after(table_attr, value, sort_dir):
+    """
+    Build the criteria matching values of table_attr which sort after value.
+
+    NULLs are taken to sort before every other value, as they do on MySQL
+    and SQLite, and never match a comparison, so are handled explicitly.
+    """
+    if sort_dir == 'desc':
+        if value is None:
+            return sqlalchemy.sql.false()
+        return sqlalchemy.sql.or_(table_attr < value,
+                                  table_attr == None)  # NOQA
+
+    if value is None:
+        return table_attr != None  # NOQA
+    return table_attr > value
+
+
+# copy from olso/db/sqlalchemy/utils.py, with a seekable marker criteria
 def paginate_query(query, table, limit, sort_keys, marker=None,
                    sort_dir=None, sort_dirs=None):
     if 'id' not in sort_keys:
@@ -89,10 +118,8 @@ def paginate_query(query, table, limit, sort_keys, marker=None,
                 crit_attrs.append((table_attr == marker_values[j]))
 
             table_attr = getattr(table.c, sort_keys[i])
-            if sort_dirs[i] == 'desc':
-                crit_attrs.append((table_attr < marker_values[i]))
-            else:
-                crit_attrs.append((table_attr > marker_values[i]))
+            crit_attrs.append(
+                _after(table_attr, marker_values[i], sort_dirs[i]))
 
             criteria = sqlalchemy.sql.and_(*crit_attrs)
             criteria_list.append(criteria)
@@ -100,6 +127,22 @@ def paginate_query(query, table, limit, sort_keys, marker=None,
         f = sqlalchemy.sql.or_(*criteria_list)
         query = query.where(f)
 
+        # Bound the first key too. The criteria above are equivalent to a
+        # (key1, key2, ...) > (value1, value2, ...) comparison, but only this
+        # bound lets the database seek into an index on the sort keys, rather
+        # than scanning every row before the marker. As NULLs sort first,
+        # nothing bounds an ascending page following a NULL.
+        table_attr = getattr(table.c, sort_keys[0])
+        if sort_dirs[0] == 'desc':
+            if marker_values[0] is None:
+                query = query.where(table_attr == None)  # NOQA
+            else:
+                query = query.where(sqlalchemy.sql.or_(
+                    table_attr <= marker_values[0],
+                    table_attr == None))  # NOQA
+        elif marker_values[0] is not None:
+            query = query.where(table_attr >= marker_values[0])
+
     if limit is not None:
         query = query.limit(limit)
 
@@ -14,6 +14,7 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 import abc
+import contextlib
 
 import six
 
@@ -27,6 +28,15 @@ class Storage(DriverPlugin):
     __plugin_ns__ = 'designate.storage'
     __plugin_type__ = 'storage'
 
+    @contextlib.contextmanager
+    def read_primary(self):
+        """
+        Send the reads made within the block to the primary database, for
+        callers which must see the latest committed changes. Drivers without
+        replicas always read from the primary, so do nothing.
+        """
+        yield
+
     @abc.abstractmethod
     def create_quota(self, context, quota):
         """
@@ -88,6 +98,26 @@ class Storage(DriverPlugin):
         :param quota_id: Delete a Quota via ID
         """
 
+    @abc.abstractmethod
+    def get_quota_usage(self, context, resource, scope_id):
+        """
+        Get the usage of a quota resource, as maintained by storage when
+        domains and records are created and deleted.
+
+        :param context: RPC Context.
+        :param resource: The quota resource, domains or domain_records.
+        :param scope_id: The tenant_id or domain_id the resource applies to.
+        """
+
+    @abc.abstractmethod
+    def reconcile_quota_usages(self, context):
+        """
+        Correct the maintained usage of every quota resource against the
+        real usage, returning the number of corrected usages.
+
+        :param context: RPC Context.
+        """
+
     @abc.abstractmethod
     def create_server(self, context, server):
         """
@@ -201,6 +231,15 @@ class Storage(DriverPlugin):
         :param tld_id: Delete a TLD via ID
         """
 
+    @abc.abstractmethod
+    def get_tlds_version(self, context):
+        """
+        Get a value which changes whenever any TLD is created, updated or
+        deleted.
+
+        :param context: RPC Context.
+        """
+
     @abc.abstractmethod
     def create_tsigkey(self, context, tsigkey):
         """
@@ -312,6 +351,17 @@ class Storage(DriverPlugin):
         :param sort_dir: Direction to sort after using sort_key.
         """
 
+    @abc.abstractmethod
+    def iter_domains(self, context, criterion=None, batch_size=None):
+        """
+        Iterate over Domains, fetching them from the database in batches rather
+        than all at once.
+
+        :param context: RPC Context.
+        :param criterion: Criteria to filter by.
+        :param batch_size: Number of Domains fetched at a time.
+        """
+
     @abc.abstractmethod
     def find_domain(self, context, criterion):
         """
@@ -339,6 +389,36 @@ class Storage(DriverPlugin):
         :param domain_id: Domain ID to delete.
         """
 
+    @abc.abstractmethod
+    def reparent_domains(self, context, domain):
+        """
+        Make domain the parent of every domain beneath it, which was
+        previously a child of domain's parent. Returns the number of domains
+        updated.
+
+        :param context: RPC Context.
+        :param domain: The newly created Domain.
+        """
+
+    @abc.abstractmethod
+    def count_subdomains(self, context, domain_name, criterion=None):
+        """
+        Count the domains beneath domain_name.
+
+        :param context: RPC Context.
+        :param domain_name: Name of the domain to count the subdomains of.
+        :param criterion: Criteria to filter by.
+        """
+
+    @abc.abstractmethod
+    def increment_serials(self, context, domain_ids):
+        """
+        Increment the serial of many domains in one operation.
+
+        :param context: RPC Context.
+        :param domain_ids: List of Domain IDs to increment the serials of.
+        """
+
     @abc.abstractmethod
     def count_domains(self, context, criterion=None):
         """
@@ -358,6 +438,17 @@ class Storage(DriverPlugin):
         :param recordset: RecordSet object with the values to be created.
         """
 
+    @abc.abstractmethod
+    def create_recordsets(self, context, domain_id, recordsets):
+        """
+        Create many recordsets, and their records, on a given Domain ID at
+        once
+
+        :param context: RPC Context.
+        :param domain_id: Domain ID to create the recordsets in.
+        :param recordsets: RecordSetList with the values to be created.
+        """
+
     @abc.abstractmethod
     def get_recordset(self, context, recordset_id):
         """
@@ -369,7 +460,8 @@ class Storage(DriverPlugin):
 
     @abc.abstractmethod
     def find_recordsets(self, context, criterion=None,
-                        marker=None, limit=None, sort_key=None, sort_dir=None):
+                        marker=None, limit=None, sort_key=None, sort_dir=None,
+                        load_records=True):
         """
         Find RecordSets.
 
@@ -381,6 +473,20 @@ class Storage(DriverPlugin):
                       marker
         :param sort_key: Key from which to sort after.
         :param sort_dir: Direction to sort after using sort_key.
+        :param load_records: Populate the records of each RecordSet. When
+                             False, the records are left unset and may be
+                             fetched per RecordSet with find_records.
+        """
+
+    @abc.abstractmethod
+    def iter_recordsets(self, context, criterion=None, batch_size=None):
+        """
+        Iterate over RecordSets, with their records, fetching them from the
+        database in batches rather than all at once.
+
+        :param context: RPC Context.
+        :param criterion: Criteria to filter by.
+        :param batch_size: Number of RecordSets fetched at a time.
         """
 
     @abc.abstractmethod
@@ -430,6 +536,17 @@ class Storage(DriverPlugin):
         :param record: Record object with the values to be created.
        """
 
+    @abc.abstractmethod
+    def create_records(self, context, domain_id, recordset_id, records):
+        """
+        Create many records on a given Domain ID at once
+
+        :param context: RPC Context.
+        :param domain_id: Domain ID to create the records in.
+        :param recordset_id: RecordSet ID to create the records in.
+        :param records: RecordList with the values to be created.
+        """
+
     @abc.abstractmethod
     def get_record(self, context, record_id):
         """
@@ -455,6 +572,17 @@ class Storage(DriverPlugin):
         :param sort_dir: Direction to sort after using sort_key.
         """
 
+    @abc.abstractmethod
+    def iter_records(self, context, criterion=None, batch_size=None):
+        """
+        Iterate over Records, fetching them from the database in batches rather
+        than all at once.
+
+        :param context: RPC Context.
+        :param criterion: Criteria to filter by.
+        :param batch_size: Number of Records fetched at a time.
+        """
+
     @abc.abstractmethod
     def find_record(self, context, criterion):
         """
@@ -482,6 +610,15 @@ class Storage(DriverPlugin):
         :param record_id: Record ID to delete
         """
 
+    @abc.abstractmethod
+    def delete_records(self, context, record_ids):
+        """
+        Delete many records at once
+
+        :param context: RPC Context
+        :param record_ids: Record IDs to delete
+        """
+
     @abc.abstractmethod
     def count_records(self, context, criterion=None):
         """
@@ -491,6 +628,80 @@ class Storage(DriverPlugin):
         :param criterion: Criteria to filter by.
         """
 
+    @abc.abstractmethod
+    def sync_ns_records(self, context, domain_ids, names, remove=None,
+                        status=None):
+        """
+        Ensure the apex NS recordset of each domain has a managed record for
+        every name, and no records for the names in remove, or managed
+        records for names not in names. Returns the IDs of the domains whose
+        NS records were changed.
+
+        :param context: RPC Context.
+        :param domain_ids: List of Domain IDs to update.
+        :param names: List of nameserver names each domain should contain.
+        :param remove: List of nameserver names to remove from each domain.
+        :param status: Status of any created records.
+        """
+
+    @abc.abstractmethod
+    def update_soa_records(self, context, soa_data):
+        """
+        Replace the SOA record data of many domains in one operation.
+
+        :param context: RPC Context.
+        :param soa_data: Dict of Domain ID to the new SOA record data.
+        """
+
+    @abc.abstractmethod
+    def update_records_status(self, context, domain_id, serial, statuses,
+                              actions=None, status=None, action=None):
+        """
+        Set the status and/or action of every record of a domain which is in
+        one of the given statuses and actions, and was changed at or before
+        serial, in one operation. Returns the number of updated records.
+
+        :param context: RPC Context.
+        :param domain_id: Domain ID of the records.
+        :param serial: Only records with a serial up to this are updated.
+        :param statuses: The statuses of the records to update.
+        :param actions: The actions of the records to update, or None for any.
+        :param status: The new status, or None to leave it alone.
+        :param action: The new action, or None to leave it alone.
+        """
+
+    @abc.abstractmethod
+    def create_journal_entries(self, context, domain_id, journal_entries):
+        """
+        Append entries to a domain's change journal.
+
+        :param context: RPC Context.
+        :param domain_id: Domain ID the entries belong to.
+        :param journal_entries: JournalEntryList of the entries to append.
+        """
+
+    @abc.abstractmethod
+    def find_journal_entries(self, context, domain_id, serial):
+        """
+        Find the journal entries of a domain recorded after a serial, ordered
+        by serial.
+
+        :param context: RPC Context.
+        :param domain_id: Domain ID to find journal entries for.
+        :param serial: Only entries with a greater serial are returned.
+        """
+
+    @abc.abstractmethod
+    def truncate_journal(self, context, domain_id, before=None):
+        """
+        Remove entries from a domain's change journal.
+
+        :param context: RPC Context.
+        :param domain_id: Domain ID to truncate the journal of.
+        :param before: Only remove entries created before this datetime. All
+                       entries are removed when this is None.
+        """
+
     @abc.abstractmethod
     def create_blacklist(self, context, blacklist):
         """
@@ -552,6 +763,15 @@ class Storage(DriverPlugin):
         :param blacklist_id: Delete a Blacklist via ID
         """
 
+    @abc.abstractmethod
+    def get_blacklists_version(self, context):
+        """
+        Get a value which changes whenever any Blacklist is created, updated
+        or deleted.
+
+        :param context: RPC Context.
+        """
+
     @abc.abstractmethod
     def create_pool(self, context, pool):
         """
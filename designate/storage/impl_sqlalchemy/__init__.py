@@ -13,29 +13,55 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
+import collections
 import time
 import hashlib
 
 from oslo.config import cfg
+from oslo.db import exception as oslo_db_exception
 from oslo.db import options
-from sqlalchemy import select, distinct, func
+from oslo.utils import timeutils
+from sqlalchemy import select, distinct, func, case, and_, bindparam
 
 from designate.openstack.common import log as logging
+from designate import dnsutils
 from designate import exceptions
 from designate import objects
 from designate.sqlalchemy import base as sqlalchemy_base
+from designate.sqlalchemy import utils as sqlalchemy_utils
 from designate.storage import base as storage_base
 from designate.storage.impl_sqlalchemy import tables
 
 
 LOG = logging.getLogger(__name__)
 
+# The maximum number of recordset ids to place in a single IN clause when
+# bulk loading records.
+RECORD_LOAD_CHUNK_SIZE = 500
+
+# The quota resources whose usage is maintained in the quota_usages table
+QUOTA_USAGE_RESOURCES = ('domains', 'domain_records')
+
 cfg.CONF.register_group(cfg.OptGroup(
     name='storage:sqlalchemy', title="Configuration for SQLAlchemy Storage"
 ))
 
 cfg.CONF.register_opts(options.database_opts, group='storage:sqlalchemy')
 
+cfg.CONF.register_opts([
+    cfg.ListOpt('replica-connections', default=[],
+                help='Connection strings of read only replicas of the '
+                     'database. Queries which only read, outside of a '
+                     'transaction, are spread across the replicas'),
+    cfg.FloatOpt('replica-stale-window', default=5.0,
+                 help='Seconds after a write during which reads stay on the '
+                      'primary database, which should exceed the lag of the '
+                      'replicas'),
+    cfg.IntOpt('iter-batch-size', default=1000,
+               help='The number of rows fetched at a time by the iter_* '
+                    'methods'),
+], group='storage:sqlalchemy')
+
 
 class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
     """SQLAlchemy connection"""
@@ -47,6 +73,27 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
     def get_name(self):
         return self.name
 
+    @property
+    def _iter_batch_size(self):
+        return cfg.CONF['storage:sqlalchemy'].iter_batch_size
+
+    @staticmethod
+    def _copy(criterion):
+        # The _find_* methods may alter the criterion they are given, which
+        # must be left intact for the next batch
+        return dict(criterion) if criterion is not None else None
+
+    def _get_table_version(self, table):
+        # Every change to the table alters at least one of the row count, the
+        # sum of the row versions or the newest creation time.
+        query = select([func.count(table.c.id),
+                        func.sum(table.c.version),
+                        func.max(table.c.created_at)])
+
+        resultproxy = self.read_session.execute(query)
+
+        return tuple(resultproxy.fetchone())
+
     # CRUD for our resources (quota, server, tsigkey, tenant, domain & record)
     # R - get_*, find_*s
     #
@@ -96,6 +143,124 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
         return self._delete(context, tables.quotas, quota,
                             exceptions.QuotaNotFound)
 
+    # Quota Usage Methods
+    def _get_quota_usage_query(self, resource):
+        """
+        Get a query for the real usage of a quota resource, grouped by scope,
+        and the column holding the scope.
+        """
+        domains = tables.domains
+        records = tables.records
+
+        if resource == 'domains':
+            query = select([domains.c.tenant_id, func.count(domains.c.id)])\
+                .where(domains.c.deleted == '0')\
+                .group_by(domains.c.tenant_id)
+
+            return query, domains.c.tenant_id
+
+        query = select([records.c.domain_id, func.count(records.c.id)])\
+            .select_from(records.join(
+                domains, domains.c.id == records.c.domain_id))\
+            .where(domains.c.deleted == '0')\
+            .group_by(records.c.domain_id)
+
+        return query, records.c.domain_id
+
+    def _count_quota_usage(self, resource, scope_id):
+        query, scope_column = self._get_quota_usage_query(resource)
+
+        row = self.session.execute(
+            query.where(scope_column == scope_id)).fetchone()
+
+        return row[1] if row is not None else 0
+
+    def _adjust_quota_usage(self, resource, scope_id, delta):
+        if scope_id is None or delta == 0:
+            return
+
+        table = tables.quota_usages
+
+        query = table.update()\
+            .where(table.c.resource == resource)\
+            .where(table.c.scope_id == scope_id)\
+            .values(in_use=table.c.in_use + delta)
+
+        if self.session.execute(query).rowcount > 0:
+            return
+
+        # Nothing has been recorded yet. The real usage already includes
+        # this change. The insert is made within a savepoint, as a failed
+        # statement aborts the whole transaction on PostgreSQL.
+        try:
+            with self.session.begin_nested():
+                self.session.execute(table.insert().values(
+                    resource=resource, scope_id=scope_id,
+                    in_use=self._count_quota_usage(resource, scope_id)))
+        except oslo_db_exception.DBDuplicateEntry:
+            # Recorded concurrently, by another change
+            self.session.execute(query)
+
+    def get_quota_usage(self, context, resource, scope_id):
+        if resource not in QUOTA_USAGE_RESOURCES:
+            raise exceptions.QuotaResourceUnknown()
+
+        table = tables.quota_usages
+
+        query = select([table.c.in_use])\
+            .where(table.c.resource == resource)\
+            .where(table.c.scope_id == scope_id)
+
+        row = self.read_session.execute(query).fetchone()
+
+        if row is None:
+            return self._count_quota_usage(resource, scope_id)
+
+        return row[0]
+
+    def reconcile_quota_usages(self, context):
+        table = tables.quota_usages
+
+        query = select([table.c.resource, table.c.scope_id, table.c.in_use])
+
+        recorded = dict(((resource, scope_id), in_use) for
+                        resource, scope_id, in_use in
+                        self.session.execute(query).fetchall())
+
+        actual = {}
+
+        for resource in QUOTA_USAGE_RESOURCES:
+            query, _ = self._get_quota_usage_query(resource)
+
+            for scope_id, in_use in self.session.execute(query).fetchall():
+                if scope_id is not None:
+                    actual[(resource, scope_id)] = in_use
+
+        corrected = 0
+
+        for key in set(recorded) | set(actual):
+            if recorded.get(key, 0) == actual.get(key, 0):
+                continue
+
+            resource, scope_id = key
+
+            if key not in actual:
+                query = table.delete()
+            elif key not in recorded:
+                query = table.insert().values(
+                    resource=resource, scope_id=scope_id, in_use=actual[key])
+            else:
+                query = table.update().values(in_use=actual[key])
+
+            if key in recorded:
+                query = query.where(table.c.resource == resource)\
+                    .where(table.c.scope_id == scope_id)
+
+            self.session.execute(query)
+            corrected += 1
+
+        return corrected
+
     # Server Methods
     def _find_servers(self, context, criterion, one=False, marker=None,
                      limit=None, sort_key=None, sort_dir=None):
@@ -164,6 +329,9 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
         tld = self._find_tlds(context, {'id': tld_id}, one=True)
         return self._delete(context, tables.tlds, tld, exceptions.TldNotFound)
 
+    def get_tlds_version(self, context):
+        return self._get_table_version(tables.tlds)
+
     # TSIG Key Methods
     def _find_tsigkeys(self, context, criterion, one=False, marker=None,
                        limit=None, sort_key=None, sort_dir=None):
@@ -210,7 +378,7 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
         query = self._apply_deleted_criteria(context, tables.domains, query)
         query = query.group_by(tables.domains.c.tenant_id)
 
-        resultproxy = self.session.execute(query)
+        resultproxy = self.read_session.execute(query)
         results = resultproxy.fetchall()
 
         tenant_list = objects.TenantList(
@@ -228,7 +396,7 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
         query = self._apply_deleted_criteria(context, tables.domains, query)
         query = query.where(tables.domains.c.tenant_id == tenant_id)
 
-        resultproxy = self.session.execute(query)
+        resultproxy = self.read_session.execute(query)
         results = resultproxy.fetchall()
 
         return objects.Tenant(
@@ -243,7 +411,7 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
         query = self._apply_tenant_criteria(context, tables.domains, query)
         query = self._apply_deleted_criteria(context, tables.domains, query)
 
-        resultproxy = self.session.execute(query)
+        resultproxy = self.read_session.execute(query)
         result = resultproxy.fetchone()
 
         if result is None:
@@ -269,10 +437,14 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
         extra_values = {"reverse_name": domain.name[::-1]}
 
         # Don't handle recordsets for now
-        return self._create(
+        domain = self._create(
             tables.domains, domain, exceptions.DuplicateDomain, ['recordsets'],
             extra_values=extra_values)
 
+        self._adjust_quota_usage('domains', domain.tenant_id, 1)
+
+        return domain
+
     def get_domain(self, context, domain_id):
         return self._find_domains(context, {'id': domain_id}, one=True)
 
@@ -282,6 +454,13 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
                                   limit=limit, sort_key=sort_key,
                                   sort_dir=sort_dir)
 
+    def iter_domains(self, context, criterion=None, batch_size=None):
+        def find(marker, limit):
+            return self._find_domains(context, self._copy(criterion),
+                                      marker=marker, limit=limit)
+
+        return self._iter(find, batch_size or self._iter_batch_size)
+
     def find_domain(self, context, criterion):
         return self._find_domains(context, criterion, one=True)
 
@@ -294,8 +473,71 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
     def delete_domain(self, context, domain_id):
         # Fetch the existing domain, we'll need to return it.
         domain = self._find_domains(context, {'id': domain_id}, one=True)
-        return self._delete(context, tables.domains, domain,
-                            exceptions.DomainNotFound)
+        domain = self._delete(context, tables.domains, domain,
+                              exceptions.DomainNotFound)
+
+        self._adjust_quota_usage('domains', domain.tenant_id, -1)
+
+        # Usage within a deleted domain is no longer needed
+        table = tables.quota_usages
+        self.session.execute(
+            table.delete().where(table.c.scope_id == domain.id))
+
+        return domain
+
+    def reparent_domains(self, context, domain):
+        table = tables.domains
+
+        # Every domain beneath domain, using the reverse_name index
+        query = table.update()\
+            .where(sqlalchemy_utils.like_prefix(
+                table.c.reverse_name, ('.' + domain.name)[::-1]))\
+            .where(table.c.parent_domain_id == domain.parent_domain_id)\
+            .values(parent_domain_id=domain.id)
+
+        query = self._apply_deleted_criteria(context, table, query)
+        query = self._apply_version_increment(context, table, query)
+
+        resultproxy = self.session.execute(query)
+
+        return resultproxy.rowcount
+
+    def count_subdomains(self, context, domain_name, criterion=None):
+        table = tables.domains
+
+        # Every domain beneath domain_name, using the reverse_name index
+        query = select([func.count(table.c.id)])\
+            .where(sqlalchemy_utils.like_prefix(
+                table.c.reverse_name, ('.' + domain_name)[::-1]))
+
+        query = self._apply_criterion(table, query, criterion)
+        query = self._apply_tenant_criteria(context, table, query)
+        query = self._apply_deleted_criteria(context, table, query)
+
+        resultproxy = self.read_session.execute(query)
+        result = resultproxy.fetchone()
+
+        if result is None:
+            return 0
+
+        return result[0]
+
+    def increment_serials(self, context, domain_ids):
+        table = tables.domains
+
+        # The same calculation as utils.increment_serial, for every domain
+        now = timeutils.utcnow_ts()
+        serial = case([(table.c.serial < now, now)],
+                      else_=table.c.serial + 1)
+
+        query = table.update()\
+            .where(table.c.id.in_(domain_ids))\
+            .values(serial=serial)
+
+        query = self._apply_deleted_criteria(context, table, query)
+        query = self._apply_version_increment(context, table, query)
+
+        self.session.execute(query)
 
     def count_domains(self, context, criterion=None):
         query = select([func.count(tables.domains.c.id)])
@@ -303,7 +545,7 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
         query = self._apply_tenant_criteria(context, tables.domains, query)
         query = self._apply_deleted_criteria(context, tables.domains, query)
 
-        resultproxy = self.session.execute(query)
+        resultproxy = self.read_session.execute(query)
         result = resultproxy.fetchone()
 
         if result is None:
@@ -351,11 +593,10 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
             ['records'], extra_values=extra_values)
 
         if recordset.obj_attr_is_set('records'):
-            for record in recordset.records:
-                # NOTE: Since we're dealing with a mutable object, the return
-                #       value is not needed. The original item will be mutated
-                #       in place on the input "recordset.records" list.
-                self.create_record(context, domain_id, recordset.id, record)
+            # NOTE: Since we're dealing with a mutable object, the return
+            #       value is not needed. The original items will be mutated
+            #       in place on the input "recordset.records" list.
+            self._create_records(domain, recordset, recordset.records)
         else:
             recordset.records = objects.RecordList()
 
@@ -363,6 +604,42 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
 
         return recordset
 
+    def create_recordsets(self, context, domain_id, recordsets):
+        # Fetch the domain as we need the tenant_id
+        domain = self._find_domains(context, {'id': domain_id}, one=True)
+
+        extra_values = []
+
+        for recordset in recordsets:
+            recordset.tenant_id = domain.tenant_id
+            recordset.domain_id = domain_id
+
+            # Patch in the reverse_name column
+            extra_values.append({"reverse_name": recordset.name[::-1]})
+
+        self._create_many(
+            tables.recordsets, recordsets, exceptions.DuplicateRecordSet,
+            ['records'], extra_values=extra_values)
+
+        # Create the records of every recordset together
+        records = []
+
+        for recordset in recordsets:
+            if recordset.obj_attr_is_set('records'):
+                for record in recordset.records:
+                    self._prepare_record(domain, recordset, record)
+                    records.append(record)
+            else:
+                recordset.records = objects.RecordList()
+
+            recordset.obj_reset_changes('records')
+
+        self._create_many(tables.records, records, exceptions.DuplicateRecord)
+
+        self._adjust_quota_usage('domain_records', domain_id, len(records))
+
+        return recordsets
+
     def get_recordset(self, context, recordset_id):
         recordset = self._find_recordsets(
             context, {'id': recordset_id}, one=True)
@@ -374,20 +651,53 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
 
         return recordset
 
+    def _load_records(self, context, recordsets):
+        """
+        Populate the records of each recordset, fetching the records for many
+        recordsets per query rather than issuing one query per recordset.
+        """
+        records = {}
+        recordset_ids = [recordset.id for recordset in recordsets]
+
+        for i in range(0, len(recordset_ids), RECORD_LOAD_CHUNK_SIZE):
+            chunk = recordset_ids[i:i + RECORD_LOAD_CHUNK_SIZE]
+            query = select([tables.records]).where(
+                tables.records.c.recordset_id.in_(chunk))
+
+            for record in self._find(
+                    context, tables.records, objects.Record,
+                    objects.RecordList, exceptions.RecordNotFound, None,
+                    query=query):
+                records.setdefault(record.recordset_id, []).append(record)
+
+        for recordset in recordsets:
+            recordset.records = objects.RecordList(
+                objects=records.get(recordset.id, []))
+
+            recordset.obj_reset_changes('records')
+
     def find_recordsets(self, context, criterion=None, marker=None, limit=None,
-                        sort_key=None, sort_dir=None):
+                        sort_key=None, sort_dir=None, load_records=True):
         recordsets = self._find_recordsets(context, criterion, marker=marker,
                                            limit=limit, sort_key=sort_key,
                                            sort_dir=sort_dir)
 
-        for recordset in recordsets:
-            recordset.records = self._find_records(
-                context, {'recordset_id': recordset.id})
-
-            recordset.obj_reset_changes('records')
+        if load_records:
+            self._load_records(context, recordsets)
 
         return recordsets
 
+    def iter_recordsets(self, context, criterion=None, batch_size=None):
+        def find(marker, limit):
+            recordsets = self._find_recordsets(
+                context, self._copy(criterion), marker=marker, limit=limit)
+
+            self._load_records(context, recordsets)
+
+            return recordsets
+
+        return self._iter(find, batch_size or self._iter_batch_size)
+
     def find_recordset(self, context, criterion):
         recordset = self._find_recordsets(context, criterion, one=True)
 
@@ -449,8 +759,17 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
         recordset = self._find_recordsets(
             context, {'id': recordset_id}, one=True)
 
-        return self._delete(context, tables.recordsets, recordset,
-                            exceptions.RecordSetNotFound)
+        # The recordset's records are deleted with it
+        record_count = self.count_records(
+            context, {'recordset_id': recordset_id})
+
+        recordset = self._delete(context, tables.recordsets, recordset,
+                                 exceptions.RecordSetNotFound)
+
+        self._adjust_quota_usage(
+            'domain_records', recordset.domain_id, -record_count)
+
+        return recordset
 
     def count_recordsets(self, context, criterion=None):
         query = select([func.count(tables.recordsets.c.id)])
@@ -458,7 +777,7 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
         query = self._apply_tenant_criteria(context, tables.recordsets, query)
         query = self._apply_deleted_criteria(context, tables.recordsets, query)
 
-        resultproxy = self.session.execute(query)
+        resultproxy = self.read_session.execute(query)
         result = resultproxy.fetchone()
 
         if result is None:
@@ -483,6 +802,34 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
 
         return md5.hexdigest()
 
+    def _recalculate_record_rdata(self, context, record):
+        """
+        Calculates the wire format rdata of the record, used by mDNS to build
+        responses without parsing the record's data.
+        """
+        recordset = self._find_recordsets(
+            context, {'id': record.recordset_id}, one=True)
+
+        return dnsutils.rdata_to_wire(recordset.type, record.data)
+
+    def _prepare_record(self, domain, recordset, record):
+        """Fill in the values of a new record which derive from others"""
+        record.tenant_id = domain.tenant_id
+        record.domain_id = domain.id
+        record.recordset_id = recordset.id
+        record.hash = self._recalculate_record_hash(record)
+        record.rdata = dnsutils.rdata_to_wire(recordset.type, record.data)
+
+    def _create_records(self, domain, recordset, records):
+        for record in records:
+            self._prepare_record(domain, recordset, record)
+
+        self._create_many(tables.records, records, exceptions.DuplicateRecord)
+
+        self._adjust_quota_usage('domain_records', domain.id, len(records))
+
+        return records
+
     def create_record(self, context, domain_id, recordset_id, record):
         # Fetch the domain as we need the tenant_id
         domain = self._find_domains(context, {'id': domain_id}, one=True)
@@ -491,10 +838,24 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
         record.domain_id = domain_id
         record.recordset_id = recordset_id
         record.hash = self._recalculate_record_hash(record)
+        record.rdata = self._recalculate_record_rdata(context, record)
 
-        return self._create(
+        record = self._create(
             tables.records, record, exceptions.DuplicateRecord)
 
+        self._adjust_quota_usage('domain_records', domain_id, 1)
+
+        return record
+
+    def create_records(self, context, domain_id, recordset_id, records):
+        # Fetch the domain as we need the tenant_id, and the recordset as we
+        # need the type
+        domain = self._find_domains(context, {'id': domain_id}, one=True)
+        recordset = self._find_recordsets(
+            context, {'id': recordset_id}, one=True)
+
+        return self._create_records(domain, recordset, records)
+
     def get_record(self, context, record_id):
         return self._find_records(context, {'id': record_id}, one=True)
 
@@ -504,6 +865,13 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
                                   limit=limit, sort_key=sort_key,
                                   sort_dir=sort_dir)
 
+    def iter_records(self, context, criterion=None, batch_size=None):
+        def find(marker, limit):
+            return self._find_records(context, self._copy(criterion),
+                                      marker=marker, limit=limit)
+
+        return self._iter(find, batch_size or self._iter_batch_size)
+
     def find_record(self, context, criterion):
         return self._find_records(context, criterion, one=True)
 
@@ -511,6 +879,9 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
         if record.obj_what_changed():
             record.hash = self._recalculate_record_hash(record)
 
+        if 'data' in record.obj_what_changed():
+            record.rdata = self._recalculate_record_rdata(context, record)
+
         return self._update(
             context, tables.records, record, exceptions.DuplicateRecord,
             exceptions.RecordNotFound)
@@ -518,8 +889,45 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
     def delete_record(self, context, record_id):
         # Fetch the existing record, we'll need to return it.
         record = self._find_records(context, {'id': record_id}, one=True)
-        return self._delete(context, tables.records, record,
-                            exceptions.RecordNotFound)
+        record = self._delete(context, tables.records, record,
+                              exceptions.RecordNotFound)
+
+        self._adjust_quota_usage('domain_records', record.domain_id, -1)
+
+        return record
+
+    def delete_records(self, context, record_ids):
+        table = tables.records
+        record_ids = list(set(record_ids))
+
+        # Fetch the existing records, we'll need to return them.
+        records = objects.RecordList()
+
+        for i in range(0, len(record_ids), RECORD_LOAD_CHUNK_SIZE):
+            chunk = record_ids[i:i + RECORD_LOAD_CHUNK_SIZE]
+
+            found = self._find_records(context, {'id': chunk})
+
+            if len(found) != len(chunk):
+                raise exceptions.RecordNotFound()
+
+            query = table.delete().where(table.c.id.in_(chunk))
+            query = self._apply_tenant_criteria(context, table, query)
+
+            if self.session.execute(query).rowcount != len(chunk):
+                raise exceptions.RecordNotFound()
+
+            records.extend(found)
+
+        usage = {}
+
+        for record in records:
+            usage[record.domain_id] = usage.get(record.domain_id, 0) + 1
+
+        for domain_id, count in usage.items():
+            self._adjust_quota_usage('domain_records', domain_id, -count)
+
+        return records
 
     def count_records(self, context, criterion=None):
         query = select([func.count(tables.records.c.id)])
@@ -527,7 +935,7 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
         query = self._apply_tenant_criteria(context, tables.records, query)
         query = self._apply_deleted_criteria(context, tables.records, query)
 
-        resultproxy = self.session.execute(query)
+        resultproxy = self.read_session.execute(query)
         result = resultproxy.fetchone()
 
         if result is None:
@@ -535,6 +943,195 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
 
         return result[0]
 
+    def sync_ns_records(self, context, domain_ids, names, remove=None,
+                        status=None):
+        records = tables.records
+        recordsets = tables.recordsets
+        domains = tables.domains
+
+        # Names which are still in use are never removed
+        remove = set(remove or []) - set(names)
+
+        # Fetch the apex NS recordset of every domain, with its records
+        query = select([recordsets.c.id, recordsets.c.domain_id,
+                        recordsets.c.tenant_id, records.c.id,
+                        records.c.data, records.c.managed])\
+            .select_from(
+                recordsets.join(domains, and_(
+                    domains.c.id == recordsets.c.domain_id,
+                    domains.c.name == recordsets.c.name))
+                .outerjoin(records,
+                           records.c.recordset_id == recordsets.c.id))\
+            .where(recordsets.c.domain_id.in_(domain_ids))\
+            .where(recordsets.c.type == 'NS')
+
+        ns_recordsets = {}
+        delete_ids = []
+        changed = set()
+        # The change in the number of records of each domain
+        deltas = collections.defaultdict(int)
+
+        for row in self.session.execute(query).fetchall():
+            recordset_id, domain_id, tenant_id, record_id, data, managed = row
+
+            _, _, existing = ns_recordsets.setdefault(
+                recordset_id, (domain_id, tenant_id, set()))
+
+            if record_id is None:
+                continue
+
+            if data in remove or (managed and data not in names):
+                delete_ids.append(record_id)
+                deltas[domain_id] -= 1
+                changed.add(domain_id)
+            else:
+                existing.add(data)
+
+        rdata = dict((name, dnsutils.rdata_to_wire('NS', name))
+                     for name in names)
+
+        values = []
+
+        for recordset_id, (domain_id, tenant_id, existing) in \
+                ns_recordsets.items():
+            for name in names:
+                if name in existing:
+                    continue
+
+                record = objects.Record(recordset_id=recordset_id, data=name)
+
+                value = {
+                    'tenant_id': tenant_id,
+                    'domain_id': domain_id,
+                    'recordset_id': recordset_id,
+                    'data': name,
+                    'hash': self._recalculate_record_hash(record),
+                    'rdata': rdata[name],
+                    'managed': True,
+                }
+
+                if status is not None:
+                    value['status'] = status
+
+                values.append(value)
+                deltas[domain_id] += 1
+                changed.add(domain_id)
+
+        if delete_ids:
+            self.session.execute(
+                records.delete().where(records.c.id.in_(delete_ids)))
+
+        if values:
+            self.session.execute(records.insert(), values)
+
+        for domain_id, delta in deltas.items():
+            self._adjust_quota_usage('domain_records', domain_id, delta)
+
+        return list(changed)
+
+    def update_soa_records(self, context, soa_data):
+        records = tables.records
+        recordsets = tables.recordsets
+
+        query = select([records.c.id, records.c.recordset_id,
+                        records.c.domain_id])\
+            .select_from(records.join(
+                recordsets, recordsets.c.id == records.c.recordset_id))\
+            .where(records.c.domain_id.in_(soa_data.keys()))\
+            .where(recordsets.c.type == 'SOA')
+
+        values = []
+
+        for record_id, recordset_id, domain_id in \
+                self.session.execute(query).fetchall():
+            record = objects.Record(
+                recordset_id=recordset_id, data=soa_data[domain_id])
+
+            values.append({
+                '_id': record_id,
+                '_data': record.data,
+                '_hash': self._recalculate_record_hash(record),
+                '_rdata': dnsutils.rdata_to_wire('SOA', record.data),
+            })
+
+        if not values:
+            return
+
+        query = records.update()\
+            .where(records.c.id == bindparam('_id'))\
+            .values(data=bindparam('_data'), hash=bindparam('_hash'),
+                    rdata=bindparam('_rdata'))
+
+        query = self._apply_version_increment(context, records, query)
+
+        self.session.execute(query, values)
+
+    def update_records_status(self, context, domain_id, serial, statuses,
+                              actions=None, status=None, action=None):
+        records = tables.records
+
+        values = {}
+
+        if status is not None:
+            values['status'] = status
+        if action is not None:
+            values['action'] = action
+
+        query = records.update()\
+            .where(records.c.domain_id == domain_id)\
+            .where(records.c.status.in_(statuses))\
+            .where(records.c.serial <= serial)\
+            .values(**values)
+
+        if actions is not None:
+            query = query.where(records.c.action.in_(actions))
+
+        query = self._apply_version_increment(context, records, query)
+
+        resultproxy = self.session.execute(query)
+
+        return resultproxy.rowcount
+
+    # Journal Methods
+    def create_journal_entries(self, context, domain_id, journal_entries):
+        values = []
+
+        # Record the order of the entries, as many share a serial
+        for sequence, journal_entry in enumerate(journal_entries):
+            journal_entry.domain_id = domain_id
+            journal_entry.sequence = sequence
+            journal_entry.validate()
+            values.append(journal_entry.obj_get_changes())
+
+        if values:
+            self.session.execute(tables.domain_journal.insert(), values)
+
+        return journal_entries
+
+    def find_journal_entries(self, context, domain_id, serial):
+        table = tables.domain_journal
+
+        query = select([table])\
+            .where(table.c.domain_id == domain_id)\
+            .where(table.c.serial > serial)\
+            .order_by(table.c.serial, table.c.sequence, table.c.created_at,
+                      table.c.id)
+
+        resultproxy = self.read_session.execute(query)
+
+        return sqlalchemy_base._set_listobject_from_models(
+            objects.JournalEntryList(), resultproxy.fetchall())
+
+    def truncate_journal(self, context, domain_id, before=None):
+        table = tables.domain_journal
+
+        query = table.delete().where(table.c.domain_id == domain_id)
+
+        if before is not None:
+            query = query.where(table.c.created_at < before)
+
+        self.session.execute(query)
+
     # Blacklist Methods
     def _find_blacklists(self, context, criterion, one=False, marker=None,
                          limit=None, sort_key=None, sort_dir=None):
@@ -572,6 +1169,9 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
         return self._delete(context, tables.blacklists, blacklist,
                             exceptions.BlacklistNotFound)
 
+    def get_blacklists_version(self, context):
+        return self._get_table_version(tables.blacklists)
+
     # Pool methods
     def _find_pools(self, context, criterion, one=False, marker=None,
                     limit=None, sort_key=None, sort_dir=None):
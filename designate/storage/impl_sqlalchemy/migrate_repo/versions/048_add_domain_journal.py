@@ -0,0 +1,58 @@
+# Copyright 2014 Hewlett-Packard Development Company, L.P.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+from oslo.utils import timeutils
+from sqlalchemy import Integer, String, DateTime, Text, Index, \
+                       ForeignKeyConstraint
+from sqlalchemy.schema import Table, Column, MetaData
+
+from designate import utils
+from designate.sqlalchemy.types import UUID
+
+meta = MetaData()
+
+domain_journal = Table('domain_journal', meta,
+    Column('id', UUID(), default=utils.generate_uuid, primary_key=True),
+    Column('version', Integer(), default=1, nullable=False),
+    Column('created_at', DateTime(), default=lambda: timeutils.utcnow()),
+    Column('updated_at', DateTime(), onupdate=lambda: timeutils.utcnow()),
+
+    Column('domain_id', UUID(), nullable=False),
+    Column('serial', Integer(), nullable=False),
+    Column('previous_serial', Integer(), nullable=False),
+    Column('action', String(10), nullable=False),
+    Column('name', String(255), nullable=True),
+    Column('type', String(10), nullable=True),
+    Column('ttl', Integer(), nullable=True),
+    Column('data', Text(), nullable=True),
+
+    Index('domain_journal_domain_serial', 'domain_id', 'serial'),
+    ForeignKeyConstraint(['domain_id'], ['domains.id'], ondelete='CASCADE'),
+
+    mysql_engine='INNODB',
+    mysql_charset='utf8')
+
+
+def upgrade(migrate_engine):
+    meta.bind = migrate_engine
+
+    # Load the domains table, so the foreign key can be resolved
+    Table('domains', meta, autoload=True)
+
+    domain_journal.create()
+
+
+def downgrade(migrate_engine):
+    meta.bind = migrate_engine
+
+    domain_journal.drop()
@@ -0,0 +1,50 @@
+# Copyright 2014 Hewlett-Packard Development Company, L.P.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+from sqlalchemy import MetaData, Table, Column, Text
+from migrate.changeset.constraint import UniqueConstraint
+
+meta = MetaData()
+
+
+def upgrade(migrate_engine):
+    meta.bind = migrate_engine
+
+    records_table = Table('records', meta, autoload=True)
+
+    # Holds the base64 encoded wire format of each record's data. Existing
+    # rows are populated by "designate-manage database backfill-rdata".
+    rdata_column = Column('rdata', Text, nullable=True)
+    rdata_column.create(records_table)
+
+    # Re-add constraint for sqlite.
+    dialect = migrate_engine.url.get_dialect().name
+    if dialect.startswith('sqlite'):
+        constraint = UniqueConstraint(
+            'hash', name='unique_record', table=records_table)
+        constraint.create()
+
+
+def downgrade(migrate_engine):
+    meta.bind = migrate_engine
+
+    records_table = Table('records', meta, autoload=True)
+
+    records_table.c.rdata.drop()
+
+    # Re-add constraint for sqlite.
+    dialect = migrate_engine.url.get_dialect().name
+    if dialect.startswith('sqlite'):
+        constraint = UniqueConstraint(
+            'hash', name='unique_record', table=records_table)
+        constraint.create()
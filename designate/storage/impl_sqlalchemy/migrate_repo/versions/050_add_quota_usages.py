@@ -0,0 +1,65 @@
+# Copyright 2014 Hewlett-Packard Development Company, L.P.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+from sqlalchemy import Integer, String, select, func
+from sqlalchemy.schema import Table, Column, MetaData
+
+meta = MetaData()
+
+quota_usages = Table('quota_usages', meta,
+    Column('resource', String(32), primary_key=True),
+    Column('scope_id', String(36), primary_key=True),
+    Column('in_use', Integer(), default=0, nullable=False),
+
+    mysql_engine='INNODB',
+    mysql_charset='utf8')
+
+
+def upgrade(migrate_engine):
+    meta.bind = migrate_engine
+
+    domains_table = Table('domains', meta, autoload=True)
+    records_table = Table('records', meta, autoload=True)
+
+    quota_usages.create()
+
+    # Populate the usage of existing domains and records
+    domains = select([domains_table.c.tenant_id,
+                      func.count(domains_table.c.id)])\
+        .where(domains_table.c.deleted == '0')\
+        .where(domains_table.c.tenant_id.isnot(None))\
+        .group_by(domains_table.c.tenant_id)
+
+    records = select([records_table.c.domain_id,
+                      func.count(records_table.c.id)])\
+        .select_from(records_table.join(
+            domains_table, domains_table.c.id == records_table.c.domain_id))\
+        .where(domains_table.c.deleted == '0')\
+        .group_by(records_table.c.domain_id)
+
+    values = []
+
+    for resource, query in (('domains', domains),
+                            ('domain_records', records)):
+        for scope_id, in_use in migrate_engine.execute(query).fetchall():
+            values.append({'resource': resource, 'scope_id': scope_id,
+                           'in_use': in_use})
+
+    if values:
+        migrate_engine.execute(quota_usages.insert(), values)
+
+
+def downgrade(migrate_engine):
+    meta.bind = migrate_engine
+
+    quota_usages.drop()
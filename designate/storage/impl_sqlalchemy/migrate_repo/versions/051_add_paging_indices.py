@@ -0,0 +1,63 @@
+# Copyright 2014 Hewlett-Packard Development Company, L.P.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+from sqlalchemy import Index, MetaData, Table
+
+meta = MetaData()
+
+
+def index_exists(index):
+    table = index[1]._get_table()
+    cols = sorted([str(x).split('.')[1] for x in index[1:]])
+
+    for idx in table.indexes:
+        if sorted(idx.columns.keys()) == cols:
+            return True
+    return False
+
+
+def _get_indices():
+    zones_table = Table('domains', meta, autoload=True)
+    recordsets_table = Table('recordsets', meta, autoload=True)
+    records_table = Table('records', meta, autoload=True)
+
+    # Match the default paging order of created_at then id, after any
+    # columns lists are usually filtered by
+    return [
+        ['zone_deleted_created_id', zones_table.c.deleted,
+         zones_table.c.created_at, zones_table.c.id],
+        ['zone_tenant_deleted_created_id', zones_table.c.tenant_id,
+         zones_table.c.deleted, zones_table.c.created_at, zones_table.c.id],
+        ['rrset_domainid_created_id', recordsets_table.c.domain_id,
+         recordsets_table.c.created_at, recordsets_table.c.id],
+        ['records_recordsetid_created_id', records_table.c.recordset_id,
+         records_table.c.created_at, records_table.c.id],
+    ]
+
+
+def upgrade(migrate_engine):
+    meta.bind = migrate_engine
+
+    for ind in _get_indices():
+        if not index_exists(ind):
+            index = Index(*ind)
+            index.create(migrate_engine)
+
+
+def downgrade(migrate_engine):
+    meta.bind = migrate_engine
+
+    for ind in _get_indices():
+        if index_exists(ind):
+            index = Index(*ind)
+            index.drop(migrate_engine)
@@ -15,7 +15,7 @@
 # under the License.
 from sqlalchemy import (Table, MetaData, Column, String, Text, Integer, CHAR,
                         DateTime, Enum, Boolean, Unicode, UniqueConstraint,
-                        ForeignKeyConstraint)
+                        ForeignKeyConstraint, Index)
 
 from oslo.config import cfg
 from oslo.utils import timeutils
@@ -50,6 +50,18 @@ quotas = Table('quotas', metadata,
     mysql_charset='utf8',
 )
 
+# The usage of each quota resource, maintained as domains and records are
+# created and deleted. scope_id is the tenant_id or domain_id the quota
+# resource applies to.
+quota_usages = Table('quota_usages', metadata,
+    Column('resource', String(32), primary_key=True),
+    Column('scope_id', String(36), primary_key=True),
+    Column('in_use', Integer(), default=0, nullable=False),
+
+    mysql_engine='InnoDB',
+    mysql_charset='utf8',
+)
+
 servers = Table('servers', metadata,
     Column('id', UUID, default=utils.generate_uuid, primary_key=True),
     Column('version', Integer(), default=1, nullable=False),
@@ -106,6 +118,9 @@ domains = Table('domains', metadata,
     Column('reverse_name', String(255), nullable=False),
 
     UniqueConstraint('name', 'deleted', name='unique_domain_name'),
+    Index('zone_deleted_created_id', 'deleted', 'created_at', 'id'),
+    Index('zone_tenant_deleted_created_id', 'tenant_id', 'deleted',
+          'created_at', 'id'),
     ForeignKeyConstraint(['parent_domain_id'],
                          ['domains.id'],
                          ondelete='SET NULL'),
@@ -129,6 +144,7 @@ recordsets = Table('recordsets', metadata,
     Column('reverse_name', String(255), nullable=False, default=''),
 
     UniqueConstraint('domain_id', 'name', 'type', name='unique_recordset'),
+    Index('rrset_domainid_created_id', 'domain_id', 'created_at', 'id'),
     ForeignKeyConstraint(['domain_id'], ['domains.id'], ondelete='CASCADE'),
 
     mysql_engine='InnoDB',
@@ -147,6 +163,7 @@ records = Table('records', metadata,
     Column('data', Text, nullable=False),
     Column('description', Unicode(160), nullable=True),
     Column('hash', String(32), nullable=False, unique=True),
+    Column('rdata', Text, nullable=True),
     Column('managed', Boolean, default=False),
     Column('managed_extra', Unicode(100), default=None, nullable=True),
     Column('managed_plugin_type', Unicode(50), default=None, nullable=True),
@@ -160,9 +177,12 @@ records = Table('records', metadata,
            server_default='PENDING', default='PENDING', nullable=False),
     Column('action', Enum(name='actions', *ACTIONS),
            default='CREATE', server_default='CREATE', nullable=False),
-    Column('serial', Integer(), server_default='1', nullable=False),
+    Column('serial', Integer(), default=1, server_default='1',
+           nullable=False),
 
     UniqueConstraint('hash', name='unique_record'),
+    Index('records_recordsetid_created_id', 'recordset_id', 'created_at',
+          'id'),
     ForeignKeyConstraint(['domain_id'], ['domains.id'], ondelete='CASCADE'),
     ForeignKeyConstraint(['recordset_id'], ['recordsets.id'],
                          ondelete='CASCADE'),
@@ -171,6 +191,30 @@ records = Table('records', metadata,
     mysql_charset='utf8',
 )
 
+domain_journal = Table('domain_journal', metadata,
+    Column('id', UUID, default=utils.generate_uuid, primary_key=True),
+    Column('version', Integer(), default=1, nullable=False),
+    Column('created_at', DateTime, default=lambda: timeutils.utcnow()),
+    Column('updated_at', DateTime, onupdate=lambda: timeutils.utcnow()),
+
+    Column('domain_id', UUID, nullable=False),
+    Column('serial', Integer, nullable=False),
+    Column('previous_serial', Integer, nullable=False),
+    Column('sequence', Integer, default=0, server_default='0',
+           nullable=False),
+    Column('action', String(10), nullable=False),
+    Column('name', String(255), nullable=True),
+    Column('type', String(10), nullable=True),
+    Column('ttl', Integer, nullable=True),
+    Column('data', Text, nullable=True),
+
+    Index('domain_journal_domain_serial', 'domain_id', 'serial'),
+    ForeignKeyConstraint(['domain_id'], ['domains.id'], ondelete='CASCADE'),
+
+    mysql_engine='InnoDB',
+    mysql_charset='utf8',
+)
+
 tsigkeys = Table('tsigkeys', metadata,
     Column('id', UUID, default=utils.generate_uuid, primary_key=True),
     Column('version', Integer(), default=1, nullable=False),
@@ -376,9 +376,12 @@ class TestCase(base.BaseTestCase):
 
     # Other Utility Methods
     def get_notifications(self):
+        # Central publishes its notifications in the background
+        self.central_service.notification_emitter.flush()
         return self.notifications.get()
 
     def reset_notifications(self):
+        self.central_service.notification_emitter.flush()
         self.notifications.clear()
 
     def start_service(self, svc_name, *args, **kw):
@@ -0,0 +1,96 @@
+# Copyright 2014 Hewlett-Packard Development Company, L.P.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+from designate.openstack.common import log as logging
+from designate.tests.test_api.test_v2 import ApiV2TestCase
+
+LOG = logging.getLogger(__name__)
+
+
+class ApiV2ChangeSetsTest(ApiV2TestCase):
+    def setUp(self):
+        super(ApiV2ChangeSetsTest, self).setUp()
+
+        # Create a domain
+        self.domain = self.create_domain()
+
+    def test_apply_changeset(self):
+        updated = self.create_recordset(self.domain, fixture=1)
+        deleted = self.create_recordset(self.domain, type='MX')
+
+        fixture = self.get_recordset_fixture(
+            self.domain['name'], 'A', fixture=0,
+            values={'records': ['192.0.2.1']})
+
+        body = {'changeset': [
+            {'action': 'CREATE', 'recordset': fixture},
+            {'action': 'UPDATE', 'id': updated['id'],
+             'recordset': {'description': 'Tester'}},
+            {'action': 'DELETE', 'id': deleted['id']},
+        ]}
+
+        response = self.client.post_json(
+            '/zones/%s/changesets' % self.domain['id'], body)
+
+        # Check the headers are what we expect
+        self.assertEqual(200, response.status_int)
+        self.assertEqual('application/json', response.content_type)
+
+        # Check the body structure is what we expect
+        self.assertIn('changeset', response.json)
+        self.assertIn('links', response.json)
+        self.assertEqual(3, len(response.json['changeset']))
+
+        # Check the values returned are what we expect
+        created, update, delete = response.json['changeset']
+
+        self.assertEqual('CREATE', created['action'])
+        self.assertEqual(['192.0.2.1'], created['recordset']['records'])
+        self.assertEqual('UPDATE', update['action'])
+        self.assertEqual('Tester', update['recordset']['description'])
+        self.assertEqual('DELETE', delete['action'])
+        self.assertEqual(deleted['id'], delete['recordset']['id'])
+
+        # Ensure the deleted recordset is gone
+        self._assert_exception(
+            'recordset_not_found', 404, self.client.get,
+            '/zones/%s/recordsets/%s' % (self.domain['id'], deleted['id']))
+
+    def test_apply_changeset_invalid_action(self):
+        body = {'changeset': [{'action': 'REPLACE'}]}
+
+        self._assert_exception(
+            'invalid_object', 400, self.client.post_json,
+            '/zones/%s/changesets' % self.domain['id'], body)
+
+    def test_apply_changeset_missing_id(self):
+        body = {'changeset': [{'action': 'DELETE'}]}
+
+        self._assert_exception(
+            'bad_request', 400, self.client.post_json,
+            '/zones/%s/changesets' % self.domain['id'], body)
+
+    def test_apply_changeset_soa(self):
+        recordsets = self.central_service.find_recordsets(
+            self.admin_context,
+            criterion={'domain_id': self.domain['id'], 'type': 'SOA'})
+
+        body = {'changeset': [{'action': 'DELETE', 'id': recordsets[0].id}]}
+
+        self._assert_exception(
+            'bad_request', 400, self.client.post_json,
+            '/zones/%s/changesets' % self.domain['id'], body)
+
+    def test_apply_changeset_invalid_id(self):
+        self._assert_invalid_uuid(
+            self.client.post_json, '/zones/%s/changesets')
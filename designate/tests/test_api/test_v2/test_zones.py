@@ -13,6 +13,8 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
+import urlparse
+
 from dns import zone as dnszone
 from mock import patch
 from oslo import messaging
@@ -166,6 +168,27 @@ class ApiV2ZonesTest(ApiV2TestCase):
 
         self._assert_invalid_paging(data, '/zones', key='zones')
 
+    def test_get_zones_next_link(self):
+        data = [self.create_domain(name='x-%s.com.' % i) for i in 'abc']
+
+        response = self.client.get('/zones/', {'limit': 2,
+                                               'sort_key': 'name'})
+
+        self.assertEqual([data[0]['id'], data[1]['id']],
+                         [z['id'] for z in response.json['zones']])
+
+        # Ensure the next link carries a marker holding the sort key values,
+        # rather than the id of the last zone
+        next_href = urlparse.urlparse(response.json['links']['next'])
+        params = dict(urlparse.parse_qsl(next_href.query))
+
+        self.assertNotEqual(data[1]['id'], params['marker'])
+
+        response = self.client.get('/zones/', params)
+
+        self.assertEqual([data[2]['id']],
+                         [z['id'] for z in response.json['zones']])
+
     @patch.object(central_service.Service, 'find_domains',
                   side_effect=messaging.MessagingTimeout())
     def test_get_zones_timeout(self, _):
@@ -0,0 +1,112 @@
+# Copyright 2014 Hewlett-Packard Development Company, L.P.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import eventlet
+import mock
+
+from designate.central import emitter
+from designate.tests.test_central import CentralTestCase
+
+
+class NotificationEmitterTest(CentralTestCase):
+    def setUp(self):
+        super(NotificationEmitterTest, self).setUp()
+
+        self.notifier = mock.Mock()
+        self.emitter = emitter.NotificationEmitter(self.notifier)
+
+    def _emit(self, count):
+        for i in range(count):
+            self.emitter.emit(self.admin_context, 'dns.test', {'index': i})
+
+    def _get_published(self):
+        return [c[0][2]['index'] for c in self.notifier.info.call_args_list]
+
+    def test_emit(self):
+        self._emit(2)
+
+        # Ensure nothing was published before the flush
+        self.assertEqual(0, self.notifier.info.call_count)
+        self.assertEqual(2, self.emitter.queue_depth)
+
+        self.emitter.flush()
+
+        self.assertEqual([0, 1], self._get_published())
+        self.assertEqual(0, self.emitter.queue_depth)
+        self.assertEqual(2, self.emitter.get_stats()['published'])
+
+    def test_emit_batch_size(self):
+        self.config(notification_batch_size=3, group='service:central')
+
+        self._emit(3)
+        eventlet.sleep(0)
+
+        self.assertEqual([0, 1, 2], self._get_published())
+
+    def test_emit_synchronous(self):
+        self.config(notification_queue_size=0, group='service:central')
+
+        self._emit(1)
+
+        self.assertEqual([0], self._get_published())
+
+    def test_emit_overflow_block(self):
+        self.config(notification_queue_size=2, group='service:central')
+
+        self._emit(3)
+
+        # Ensure the full queue was published by the caller
+        self.assertEqual([0, 1], self._get_published())
+        self.assertEqual(1, self.emitter.queue_depth)
+
+    def test_emit_overflow_drop_oldest(self):
+        self.config(notification_queue_size=2,
+                    notification_overflow='drop-oldest',
+                    group='service:central')
+
+        self._emit(3)
+        self.emitter.flush()
+
+        self.assertEqual([1, 2], self._get_published())
+        self.assertEqual(1, self.emitter.get_stats()['dropped'])
+
+    def test_emit_overflow_drop_newest(self):
+        self.config(notification_queue_size=2,
+                    notification_overflow='drop-newest',
+                    group='service:central')
+
+        self._emit(3)
+        self.emitter.flush()
+
+        self.assertEqual([0, 1], self._get_published())
+        self.assertEqual(1, self.emitter.get_stats()['dropped'])
+
+    def test_flush_failure(self):
+        self.notifier.info.side_effect = [Exception(), None]
+
+        self._emit(2)
+        self.emitter.flush()
+
+        # Ensure a failure does not stop the rest being published
+        self.assertEqual(2, self.notifier.info.call_count)
+        self.assertEqual(1, self.emitter.get_stats()['failed'])
+        self.assertEqual(1, self.emitter.get_stats()['published'])
+
+    def test_log_stats(self):
+        self._emit(2)
+
+        with mock.patch.object(emitter.LOG, 'info') as info:
+            self.emitter.log_stats()
+
+        self.assertEqual(1, info.call_count)
+        self.assertIn('2 queued', info.call_args[0][0])
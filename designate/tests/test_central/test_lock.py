@@ -0,0 +1,86 @@
+# Copyright 2014 Hewlett-Packard Development Company, L.P.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+from testscenarios import load_tests_apply_scenarios as load_tests  # noqa
+import eventlet
+import mock
+import testtools
+
+from designate.openstack.common import log as logging
+from designate.central import lock
+from designate.central.lock import base
+from designate.tests.test_central import CentralTestCase
+
+
+LOG = logging.getLogger(__name__)
+
+
+class ZoneLockTestCase(CentralTestCase):
+    scenarios = [
+        ('local', dict(lock_driver='local')),
+        ('database', dict(lock_driver='database')),
+    ]
+
+    def setUp(self):
+        super(ZoneLockTestCase, self).setUp()
+        self.zone_lock = lock.get_zone_lock(self.lock_driver)
+
+    def test_lock(self):
+        events = []
+
+        def hold(name):
+            with self.zone_lock.lock('domain-id'):
+                events.append('%s-acquired' % name)
+                eventlet.sleep(0.05)
+                events.append('%s-released' % name)
+
+        threads = [eventlet.spawn(hold, 'a'), eventlet.spawn(hold, 'b')]
+
+        for thread in threads:
+            thread.wait()
+
+        # Ensure the second holder waited for the first
+        self.assertEqual(['a-acquired', 'a-released',
+                          'b-acquired', 'b-released'], events)
+
+    def test_lock_other_domains(self):
+        with self.zone_lock.lock('domain-id'):
+            thread = eventlet.spawn(self._hold, 'other-domain-id')
+
+            # Ensure other domains are not blocked
+            self.assertTrue(thread.wait())
+
+    def test_lock_released_on_error(self):
+        with testtools.ExpectedException(ValueError):
+            with self.zone_lock.lock('domain-id'):
+                raise ValueError()
+
+        self.assertTrue(self._hold('domain-id'))
+
+    def test_lock_wait_warning(self):
+        self.config(lock_wait_warning=0, group='service:central')
+
+        with mock.patch.object(base.LOG, 'warn') as warn:
+            self._hold('domain-id')
+
+        self.assertEqual(1, warn.call_count)
+
+    def test_central(self):
+        self.central_service.zone_lock = self.zone_lock
+
+        domain = self.create_domain()
+        self.create_recordset(domain)
+
+    def _hold(self, domain_id):
+        with self.zone_lock.lock(domain_id):
+            return True
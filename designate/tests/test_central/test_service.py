@@ -17,12 +17,15 @@
 import copy
 import random
 
+import fixtures
+import mock
 import testtools
 from testtools.matchers import GreaterThan
 
 from designate.openstack.common import log as logging
 from designate import exceptions
 from designate import objects
+from designate.central import sync
 from designate.tests.test_central import CentralTestCase
 
 
@@ -105,6 +108,54 @@ class CentralServiceTest(CentralTestCase):
             context, 'blacklisted.org.')
         self.assertTrue(result)
 
+    def test_is_blacklisted_domain_name_backreference(self):
+        self.create_blacklist(pattern='example.org.')
+        self.create_blacklist(pattern=r'^(\w+)\.\1\.')
+
+        context = self.get_context()
+
+        self.assertTrue(self.central_service._is_blacklisted_domain_name(
+            context, 'foo.foo.com.'))
+        self.assertFalse(self.central_service._is_blacklisted_domain_name(
+            context, 'foo.bar.com.'))
+        self.assertTrue(self.central_service._is_blacklisted_domain_name(
+            context, 'www.example.org.'))
+
+    def test_is_blacklisted_domain_name_changed(self):
+        blacklist = self.create_blacklist(pattern='example.org.')
+
+        context = self.get_context()
+
+        self.assertTrue(self.central_service._is_blacklisted_domain_name(
+            context, 'example.org.'))
+
+        blacklist.pattern = 'example.net.'
+        self.central_service.update_blacklist(self.admin_context, blacklist)
+
+        self.assertFalse(self.central_service._is_blacklisted_domain_name(
+            context, 'example.org.'))
+        self.assertTrue(self.central_service._is_blacklisted_domain_name(
+            context, 'example.net.'))
+
+        self.central_service.delete_blacklist(self.admin_context, blacklist.id)
+
+        self.assertFalse(self.central_service._is_blacklisted_domain_name(
+            context, 'example.net.'))
+
+    def test_is_blacklisted_domain_name_changed_elsewhere(self):
+        context = self.get_context()
+
+        self.assertFalse(self.central_service._is_blacklisted_domain_name(
+            context, 'example.org.'))
+
+        # Changes made without going through this service, e.g. by another
+        # central, are found by the version check.
+        self.central_service.storage.create_blacklist(
+            self.admin_context, objects.Blacklist(pattern='example.org.'))
+
+        self.assertTrue(self.central_service._is_blacklisted_domain_name(
+            context, 'example.org.'))
+
     def test_is_subdomain(self):
         context = self.get_context()
 
@@ -142,13 +193,31 @@ class CentralServiceTest(CentralTestCase):
 
         LOG.debug("Testing 'example.org.'")
         result = self.central_service._is_superdomain(context, 'example.org.')
-        self.assertTrue(result)
+        self.assertFalse(result)
 
         LOG.debug("Testing 'www.example.org.'")
         result = self.central_service._is_superdomain(context,
                                                       'www.example.org.')
         self.assertFalse(result)
 
+        LOG.debug("Testing 'ample.org.'")
+        result = self.central_service._is_superdomain(context, 'ample.org.')
+        self.assertFalse(result)
+
+    def test_is_superdomain_tenant(self):
+        context = self.get_context()
+
+        domain = self.create_domain(name='example.org.')
+
+        # Only subdomains owned by other tenants are counted
+        result = self.central_service._is_superdomain(
+            context, 'org.', domain.tenant_id)
+        self.assertFalse(result)
+
+        result = self.central_service._is_superdomain(
+            context, 'org.', 'other-tenant')
+        self.assertTrue(result)
+
     def test_is_valid_recordset_placement_subdomain(self):
         context = self.get_context()
 
@@ -352,6 +421,36 @@ class CentralServiceTest(CentralTestCase):
             self.central_service.get_tld,
             self.admin_context, tld['id'])
 
+    def test_delete_last_tld(self):
+        tld = self.create_tld(fixture=0)
+
+        context = self.get_context()
+
+        with testtools.ExpectedException(exceptions.InvalidDomainName):
+            self.central_service._is_valid_domain_name(context, 'example.net.')
+
+        self.central_service.delete_tld(self.admin_context, tld['id'])
+
+        # With no TLDs left, any TLD should be allowed
+        self.central_service._is_valid_domain_name(context, 'example.net.')
+
+    def test_refresh_tlds(self):
+        context = self.get_context()
+
+        self.central_service._is_valid_domain_name(context, 'example.net.')
+
+        # TLDs created without going through this service, e.g. by another
+        # central, are found by the periodic refresh.
+        self.central_service.storage.create_tld(
+            self.admin_context, objects.Tld(name='com'))
+
+        self.central_service._refresh_tlds()
+
+        with testtools.ExpectedException(exceptions.InvalidDomainName):
+            self.central_service._is_valid_domain_name(context, 'example.net.')
+
+        self.central_service._is_valid_domain_name(context, 'example.com.')
+
     # TsigKey Tests
     def test_create_tsigkey(self):
         values = self.get_tsigkey_fixture(fixture=0)
@@ -567,6 +666,25 @@ class CentralServiceTest(CentralTestCase):
         self.assertIsNotNone(parent_domain['id'])
         self.assertEqual(subdomain['parent_domain_id'], parent_domain['id'])
 
+    def test_create_superdomain_nested(self):
+        subdomain = self.create_domain(name='www.example.com.')
+        nested = self.create_domain(name='a.www.example.com.')
+
+        domain = self.create_domain(name='example.com.')
+
+        subdomain = self.central_service.get_domain(
+            self.admin_context, subdomain.id)
+        nested = self.central_service.get_domain(
+            self.admin_context, nested.id)
+
+        # Only the closest enclosing domain is recorded as the parent
+        self.assertEqual(domain.id, subdomain.parent_domain_id)
+        self.assertEqual(subdomain.id, nested.parent_domain_id)
+
+        domain = self.create_domain(name='b.a.www.example.com.')
+
+        self.assertEqual(nested.id, domain.parent_domain_id)
+
     def test_create_subdomain_failure(self):
         context = self.get_admin_context()
 
@@ -1507,6 +1625,32 @@ class CentralServiceTest(CentralTestCase):
         self.assertEqual(record['data'], values['data'])
         self.assertIn('status', record)
 
+    def test_create_record_journaled(self):
+        domain = self.create_domain()
+        recordset = self.create_recordset(domain, type='A')
+
+        domain = self.central_service.get_domain(
+            self.admin_context, domain['id'])
+
+        self.central_service.create_record(
+            self.admin_context,
+            domain['id'],
+            recordset['id'],
+            record=objects.Record(data='127.0.0.1'))
+
+        updated_domain = self.central_service.get_domain(
+            self.admin_context, domain['id'])
+
+        entries = self.central_service.storage.find_journal_entries(
+            self.admin_context, domain['id'], domain['serial'])
+
+        self.assertEqual(1, len(entries))
+        self.assertEqual('ADD', entries[0].action)
+        self.assertEqual(recordset['name'], entries[0].name)
+        self.assertEqual('127.0.0.1', entries[0].data)
+        self.assertEqual(domain['serial'], entries[0].previous_serial)
+        self.assertEqual(updated_domain['serial'], entries[0].serial)
+
     def test_create_record_over_quota(self):
         self.config(quota_domain_records=3)
 
@@ -1820,6 +1964,117 @@ class CentralServiceTest(CentralTestCase):
         with testtools.ExpectedException(exceptions.Forbidden):
             self.central_service.count_records(self.get_context())
 
+    # ChangeSet Tests
+    def _get_changeset(self, domain):
+        # Create one recordset, update another, and delete a third
+        updated = self.create_recordset(domain, fixture=1)
+        deleted = self.create_recordset(domain, type='MX')
+
+        updated.ttl = 1800
+
+        values = self.get_recordset_fixture(domain['name'])
+        values['records'] = objects.RecordList(objects=[
+            objects.Record(data='192.0.2.1')])
+
+        return objects.ChangeList(objects=[
+            objects.Change(action='CREATE',
+                           recordset=objects.RecordSet(**values)),
+            objects.Change(action='UPDATE', recordset=updated),
+            objects.Change(action='DELETE', recordset=deleted),
+        ])
+
+    def test_apply_changeset(self):
+        domain = self.create_domain()
+        changes = self._get_changeset(domain)
+
+        domain = self.central_service.get_domain(self.admin_context,
+                                                 domain['id'])
+
+        mdns_api = mock.Mock()
+
+        with mock.patch.object(type(self.central_service), 'mdns_api',
+                               new_callable=mock.PropertyMock,
+                               return_value=mdns_api):
+            with mock.patch.object(self.central_service.backend,
+                                   'apply_changes') as apply_changes:
+                results = self.central_service.apply_changeset(
+                    self.admin_context, domain['id'], changes)
+
+        self.assertEqual(['CREATE', 'UPDATE', 'DELETE'],
+                         [result.action for result in results])
+
+        # Ensure every change reached the backend in a single call
+        self.assertEqual(1, apply_changes.call_count)
+        backend_changes = apply_changes.call_args[0][2]
+        self.assertIn('create_recordset', [c[0] for c in backend_changes])
+        self.assertIn('delete_recordset', [c[0] for c in backend_changes])
+
+        # Ensure a single NOTIFY was sent
+        self.assertEqual(1, mdns_api.notify_zone_changed.call_count)
+
+        # Ensure each change was applied
+        recordsets = self.central_service.find_recordsets(
+            self.admin_context, criterion={'domain_id': domain['id']})
+        ids = [recordset.id for recordset in recordsets]
+
+        self.assertIn(results[0].recordset.id, ids)
+        self.assertNotIn(results[2].recordset.id, ids)
+        self.assertEqual(1, len(results[0].recordset.records))
+
+        updated = self.central_service.get_recordset(
+            self.admin_context, domain['id'], results[1].recordset.id)
+        self.assertEqual(1800, updated.ttl)
+
+        # Ensure the serial was incremented
+        updated_domain = self.central_service.get_domain(self.admin_context,
+                                                         domain['id'])
+        self.assertThat(updated_domain.serial, GreaterThan(domain.serial))
+
+    def test_apply_changeset_other_domain(self):
+        domain = self.create_domain()
+        other_domain = self.create_domain(fixture=1)
+
+        recordset = self.create_recordset(other_domain)
+
+        changes = objects.ChangeList(objects=[
+            objects.Change(action='DELETE', recordset=recordset)])
+
+        with testtools.ExpectedException(exceptions.RecordSetNotFound):
+            self.central_service.apply_changeset(
+                self.admin_context, domain['id'], changes)
+
+        # Ensure the recordset was left alone
+        self.central_service.get_recordset(
+            self.admin_context, other_domain['id'], recordset['id'])
+
+    def test_apply_changeset_rollback(self):
+        domain = self.create_domain()
+        recordset = self.create_recordset(domain)
+
+        # A change which fails after an earlier one has been applied
+        changes = objects.ChangeList(objects=[
+            objects.Change(action='DELETE', recordset=recordset),
+            objects.Change(action='DELETE', recordset=recordset),
+        ])
+
+        with testtools.ExpectedException(exceptions.RecordSetNotFound):
+            self.central_service.apply_changeset(
+                self.admin_context, domain['id'], changes)
+
+        # Ensure the first change was rolled back
+        self.central_service.get_recordset(
+            self.admin_context, domain['id'], recordset['id'])
+
+    def test_apply_changeset_policy_check(self):
+        domain = self.create_domain()
+
+        # Set the policy to reject the authz
+        self.policy({'apply_changeset': '!'})
+
+        with testtools.ExpectedException(exceptions.Forbidden):
+            self.central_service.apply_changeset(
+                self.get_context(), domain['id'], objects.ChangeList())
+
     def test_get_floatingip_no_record(self):
         self.create_server()
 
@@ -2309,6 +2564,160 @@ class CentralServiceTest(CentralTestCase):
         self.assertEqual(ns_rs.records[2].data, server2.name)
         self.assertThat(new_serial, GreaterThan(original_serial))
 
+    def _get_ns_data(self, zone):
+        ns_rs = self.central_service.find_recordset(
+            self.admin_context,
+            criterion={'domain_id': zone['id'], 'type': "NS"})
+
+        return sorted(r.data for r in ns_rs.records)
+
+    def test_update_ns_server_renamed(self):
+        server = self.create_server(name='ns1.example.net.')
+        zones = [self.create_domain(name='example%d.net.' % i)
+                 for i in range(3)]
+
+        server.name = 'ns3.example.net.'
+        self.central_service.update_server(self.admin_context, server)
+
+        for zone in zones:
+            self.assertEqual(['ns1.example.org.', 'ns3.example.net.'],
+                             self._get_ns_data(zone))
+
+            updated_zone = self.central_service.get_domain(
+                self.admin_context, zone.id)
+            self.assertThat(updated_zone.serial, GreaterThan(zone.serial))
+
+            # The SOA record carries the new serial
+            soa = self.central_service.find_recordset(
+                self.admin_context,
+                criterion={'domain_id': zone['id'], 'type': "SOA"})
+            self.assertEqual(updated_zone.serial,
+                             int(soa.records[0].data.split()[2]))
+
+    def test_update_ns_server_deleted(self):
+        server = self.create_server(name='ns1.example.net.')
+        zone = self.create_domain(name='example3.net.')
+
+        self.central_service.delete_server(self.admin_context, server.id)
+
+        self.assertEqual(['ns1.example.org.'], self._get_ns_data(zone))
+
+    def test_update_ns_batches(self):
+        self.config(ns_update_batch_size=2, group='service:central')
+
+        zones = [self.create_domain(name='example%d.net.' % i)
+                 for i in range(5)]
+
+        self.create_server(name='ns2.example.net.')
+
+        for zone in zones:
+            self.assertEqual(['ns1.example.org.', 'ns2.example.net.'],
+                             self._get_ns_data(zone))
+
+    # Pool Manager Integration Tests
+    def _create_pending_records(self, domain):
+        recordset = self.create_recordset(domain)
+
+        records = []
+
+        for data, action, serial in (('192.0.2.1', 'CREATE', 10),
+                                     ('192.0.2.2', 'DELETE', 10),
+                                     ('192.0.2.3', 'UPDATE', 20)):
+            records.append(self.central_service.storage.create_record(
+                self.admin_context, domain['id'], recordset['id'],
+                objects.Record(data=data, action=action, status='PENDING',
+                               serial=serial)))
+
+        return records
+
+    def _get_record_states(self, records):
+        states = []
+
+        for record in records:
+            record = self.central_service.storage.get_record(
+                self.admin_context, record['id'])
+            states.append((record.action, record.status))
+
+        return states
+
+    def test_update_status_success(self):
+        domain = self.create_domain()
+        records = self._create_pending_records(domain)
+
+        self.central_service.update_status(
+            self.admin_context, domain['id'], 'SUCCESS', 15)
+
+        self.assertEqual([('NONE', 'ACTIVE'), ('NONE', 'DELETED'),
+                          ('UPDATE', 'PENDING')],
+                         self._get_record_states(records))
+
+    def test_update_status_error(self):
+        domain = self.create_domain()
+        records = self._create_pending_records(domain)
+
+        self.central_service.update_status(
+            self.admin_context, domain['id'], 'ERROR', 15)
+
+        self.assertEqual([('CREATE', 'ERROR'), ('DELETE', 'ERROR'),
+                          ('UPDATE', 'PENDING')],
+                         self._get_record_states(records))
+
+    # Diagnostics Tests
+    def test_ping_notifications(self):
+        result = self.central_service.ping(self.admin_context)
+
+        self.assertIn('queue_depth', result['notifications'])
+        self.assertIn('published', result['notifications'])
+
+    def _setup_sync(self):
+        self.config(state_path=self.useFixture(fixtures.TempDir()).path)
+        self.config(sync_batch_size=2, group='service:central')
+
+        self.central_service.sync_checkpoint = sync.SyncCheckpoint()
+
+        return [self.create_domain(fixture=i) for i in range(3)]
+
+    def test_sync_domains(self):
+        domains = self._setup_sync()
+
+        results = self.central_service.sync_domains(self.admin_context)
+
+        self.assertEqual(set(d.id for d in domains), set(results.keys()))
+
+        for result in results.values():
+            self.assertIsNone(result['error'])
+
+        # Ensure the checkpoint was removed once every domain was synced
+        self.assertIsNone(self.central_service.sync_checkpoint.load())
+
+    def test_sync_domains_failure(self):
+        domains = self._setup_sync()
+
+        def sync_domain(context, domain, rdata):
+            if domain.id == domains[1].id:
+                raise exceptions.Backend('Sync Failed')
+
+        with mock.patch.object(self.central_service.backend, 'sync_domain',
+                               side_effect=sync_domain):
+            results = self.central_service.sync_domains(self.admin_context)
+
+        # Ensure a failure does not stop the other domains from being synced
+        self.assertEqual(3, len(results))
+        self.assertIsNone(results[domains[0].id]['error'])
+        self.assertIsNotNone(results[domains[1].id]['error'])
+        self.assertIsNone(results[domains[2].id]['error'])
+
+    def test_sync_domains_resume(self):
+        domains = sorted(self._setup_sync(), key=lambda d: d.id)
+
+        # Pretend a previous sync was interrupted after the first domain
+        self.central_service.sync_checkpoint.save(domains[0].id, 1, 0)
+
+        results = self.central_service.sync_domains(self.admin_context)
+
+        self.assertEqual(set([domains[1].id, domains[2].id]),
+                         set(results.keys()))
+
     # Pool Tests
     def test_create_pool(self):
         # Get the values
@@ -95,3 +95,27 @@ class TestUtils(TestCase):
 
         self.assertEqual(len(SAMPLES), len(zone.recordsets))
         self.assertEqual('example.com.', zone.name)
+
+    def test_rdata_to_wire(self):
+        rdata = dnsutils.rdata_to_wire('MX', '5 mail.example.com.')
+
+        self.assertIsNotNone(rdata)
+        self.assertEqual(
+            '5 mail.example.com.',
+            dnsutils.rdata_from_wire('MX', rdata).to_text())
+
+    def test_rdata_to_wire_relative_name(self):
+        self.assertIsNone(dnsutils.rdata_to_wire('CNAME', 'www'))
+
+    def test_rdata_to_wire_invalid(self):
+        self.assertIsNone(dnsutils.rdata_to_wire('A', 'not-an-address'))
+
+    def test_serial_lt(self):
+        self.assertTrue(dnsutils.serial_lt(1, 2))
+        self.assertFalse(dnsutils.serial_lt(2, 1))
+        self.assertFalse(dnsutils.serial_lt(1, 1))
+
+        # Serials wrap around at 2^32
+        self.assertTrue(dnsutils.serial_lt(2 ** 32 - 1, 0))
+        self.assertFalse(dnsutils.serial_lt(0, 2 ** 32 - 1))
+        self.assertTrue(dnsutils.serial_lt(2 ** 32 - 10, 5))
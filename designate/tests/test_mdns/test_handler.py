@@ -16,6 +16,7 @@
 import binascii
 
 import dns
+from mock import patch
 
 from designate import context
 from designate.tests.test_mdns import MdnsTestCase
@@ -232,35 +233,70 @@ class MdnsRequestHandlerTest(MdnsTestCase):
 
         self.assertEqual(expected_response, binascii.b2a_hex(response))
 
-    def test_dispatch_opcode_query_nonexistent_recordtype(self):
-        # query is for mail.example.com. IN CNAME
-        payload = ("271801000001000000000000046d61696c076578616d706c6503636f6d"
-                   "0000050001")
+    def test_dispatch_opcode_query_without_rdata(self):
+        domain = self.create_domain()
+        recordset = self.create_recordset(domain, 'A')
+        record = self.create_record(domain, recordset)
 
-        # expected_response is REFUSED.  The other fields are
-        # id 10008
-        # opcode QUERY
-        # rcode REFUSED
-        # flags QR RD
-        # ;QUESTION
-        # mail.example.com. IN CNAME
-        # ;ANSWER
-        # ;AUTHORITY
-        # ;ADDITIONAL
-        expected_response = ("271881050001000000000000046d61696c076578616d706c"
-                             "6503636f6d0000050001")
+        # Records written before rdata was stored have their data parsed
+        record.rdata = None
+        self.handler.storage.update_record(self.admin_context, record)
+
+        request = dns.message.make_query('mail.example.com.', dns.rdatatype.A)
+        request.environ = {'addr': self.addr, 'context': self.context}
+        response = self.handler(request)
 
+        self.assertEqual(dns.rcode.NOERROR, response.rcode())
+        self.assertEqual('192.0.2.1', response.answer[0][0].address)
+
+    def test_dispatch_opcode_query_nonexistent_recordtype(self):
         # This creates an MX record for mail.example.com
         # But we query for a CNAME record
         domain = self.create_domain()
         recordset = self.create_recordset(domain, 'MX')
         self.create_record(domain, recordset)
 
-        request = dns.message.from_wire(binascii.a2b_hex(payload))
+        request = dns.message.make_query('mail.example.com.',
+                                         dns.rdatatype.CNAME)
         request.environ = {'addr': self.addr, 'context': self.context}
-        response = self.handler(request).to_wire()
+        response = self.handler(request)
 
-        self.assertEqual(expected_response, binascii.b2a_hex(response))
+        # The name exists, so expect NOERROR with no data and the SOA in
+        # the authority section
+        self.assertEqual(dns.rcode.NOERROR, response.rcode())
+        self.assertTrue(response.flags & dns.flags.AA)
+        self.assertEqual(0, len(response.answer))
+        self.assertEqual(1, len(response.authority))
+        self.assertEqual(dns.rdatatype.SOA, response.authority[0].rdtype)
+
+    def test_dispatch_opcode_query_empty_non_terminal(self):
+        domain = self.create_domain()
+        recordset = self.create_recordset(domain, 'A', name='a.b.%s' %
+                                          domain.name)
+        self.create_record(domain, recordset)
+
+        request = dns.message.make_query('b.%s' % domain.name,
+                                         dns.rdatatype.A)
+        request.environ = {'addr': self.addr, 'context': self.context}
+        response = self.handler(request)
+
+        self.assertEqual(dns.rcode.NOERROR, response.rcode())
+        self.assertEqual(0, len(response.answer))
+        self.assertEqual(dns.rdatatype.SOA, response.authority[0].rdtype)
+
+    def test_dispatch_opcode_query_nxdomain(self):
+        domain = self.create_domain()
+
+        request = dns.message.make_query('missing.%s' % domain.name,
+                                         dns.rdatatype.A)
+        request.environ = {'addr': self.addr, 'context': self.context}
+        response = self.handler(request)
+
+        self.assertEqual(dns.rcode.NXDOMAIN, response.rcode())
+        self.assertTrue(response.flags & dns.flags.AA)
+        self.assertEqual(0, len(response.answer))
+        self.assertEqual(1, len(response.authority))
+        self.assertEqual(dns.rdatatype.SOA, response.authority[0].rdtype)
 
     def test_dispatch_opcode_query_unsupported_recordtype(self):
         # query is for example.com. IN DNAME
@@ -284,3 +320,185 @@ class MdnsRequestHandlerTest(MdnsTestCase):
         response = self.handler(request).to_wire()
 
         self.assertEqual(expected_response, binascii.b2a_hex(response))
+
+    def _axfr(self, domain):
+        request = dns.message.make_query(domain.name, dns.rdatatype.AXFR)
+        request.environ = {'addr': self.addr, 'context': self.context}
+        return list(self.handler(request))
+
+    def test_dispatch_opcode_query_AXFR(self):
+        domain = self.create_domain()
+        recordset = self.create_recordset(domain, 'A')
+        self.create_record(domain, recordset)
+
+        responses = self._axfr(domain)
+
+        self.assertEqual(1, len(responses))
+
+        answer = responses[0].answer
+
+        # SOA, NS, A, SOA
+        self.assertEqual(4, len(answer))
+        self.assertEqual(dns.rdatatype.SOA, answer[0].rdtype)
+        self.assertEqual(dns.rdatatype.SOA, answer[-1].rdtype)
+
+    def test_dispatch_opcode_query_AXFR_multiple_messages(self):
+        self.config(max_message_size=128, axfr_batch_size=1,
+                    zone_cache_size=0, group='service:mdns')
+        self.handler = handler.RequestHandler()
+
+        domain = self.create_domain()
+        recordset = self.create_recordset(domain, 'A')
+        self.create_record(domain, recordset)
+        recordset = self.create_recordset(domain, 'MX')
+        self.create_record(domain, recordset)
+
+        responses = self._axfr(domain)
+
+        self.assertTrue(len(responses) > 1)
+
+        answer = []
+        for response in responses:
+            self.assertTrue(len(response.to_wire()) <= 128 or
+                            len(response.answer) == 1)
+            answer.extend(response.answer)
+
+        # SOA, NS, A, MX, SOA
+        self.assertEqual(5, len(answer))
+        self.assertEqual(dns.rdatatype.SOA, answer[0].rdtype)
+        self.assertEqual(dns.rdatatype.SOA, answer[-1].rdtype)
+
+    def test_dispatch_opcode_query_AXFR_non_existent_domain(self):
+        request = dns.message.make_query('example.com.', dns.rdatatype.AXFR)
+        request.environ = {'addr': self.addr, 'context': self.context}
+
+        response = self.handler(request)
+
+        self.assertEqual(dns.rcode.REFUSED, response.rcode())
+
+    def test_dispatch_opcode_query_AXFR_udp(self):
+        domain = self.create_domain()
+
+        request = dns.message.make_query(domain.name, dns.rdatatype.AXFR)
+        request.environ = {'addr': self.addr, 'context': self.context,
+                           'tcp': False}
+
+        response = self.handler(request)
+
+        self.assertEqual(dns.rcode.NOERROR, response.rcode())
+        self.assertTrue(response.flags & dns.flags.TC)
+        self.assertEqual(0, len(response.answer))
+
+    def test_dispatch_opcode_query_AXFR_lagging_replica(self):
+        domain = self.create_domain()
+
+        stale = self.central_service.get_domain(self.admin_context,
+                                                domain.id)
+        stale.serial -= 1
+
+        storage = self.handler.storage
+        with patch.object(storage, 'get_domain', return_value=stale):
+            with patch.object(storage, 'read_primary',
+                              wraps=storage.read_primary) as read_primary:
+                self._axfr(domain)
+
+        # Both the domain lookup and the transfer read from the primary
+        self.assertEqual(2, read_primary.call_count)
+
+    def test_dispatch_opcode_query_AXFR_replica_caught_up(self):
+        domain = self.create_domain()
+
+        storage = self.handler.storage
+        with patch.object(storage, 'read_primary',
+                          wraps=storage.read_primary) as read_primary:
+            self._axfr(domain)
+
+        # Only the domain lookup reads from the primary
+        self.assertEqual(1, read_primary.call_count)
+
+    def _ixfr(self, domain, serial, tcp=True):
+        request = dns.message.make_query(domain.name, dns.rdatatype.IXFR)
+        request.authority.append(dns.rrset.from_text(
+            domain.name, 3600, dns.rdataclass.IN, dns.rdatatype.SOA,
+            'ns1.example.org. example.example.com. %d 3600 600 86400 3600'
+            % serial))
+        request.environ = {'addr': self.addr, 'context': self.context,
+                           'tcp': tcp}
+
+        answer = []
+        for response in self.handler(request):
+            answer.extend(response.answer)
+
+        return answer
+
+    def test_dispatch_opcode_query_IXFR(self):
+        domain = self.create_domain()
+        recordset = self.create_recordset(domain, 'A')
+        record = self.create_record(domain, recordset)
+
+        serial = self.central_service.get_domain(
+            self.admin_context, domain.id).serial
+
+        record.data = '192.0.2.200'
+        self.central_service.update_record(self.admin_context, record)
+
+        answer = self._ixfr(domain, serial)
+
+        # SOA, old SOA, deleted A, new SOA, added A, SOA
+        self.assertEqual(6, len(answer))
+        self.assertEqual(dns.rdatatype.SOA, answer[0].rdtype)
+        self.assertEqual(serial, answer[1][0].serial)
+        self.assertEqual('192.0.2.1', answer[2][0].address)
+        self.assertEqual(answer[0][0].serial, answer[3][0].serial)
+        self.assertEqual('192.0.2.200', answer[4][0].address)
+        self.assertEqual(dns.rdatatype.SOA, answer[5].rdtype)
+
+    def test_dispatch_opcode_query_IXFR_up_to_date(self):
+        domain = self.create_domain()
+
+        serial = self.central_service.get_domain(
+            self.admin_context, domain.id).serial
+
+        answer = self._ixfr(domain, serial)
+
+        self.assertEqual(1, len(answer))
+        self.assertEqual(dns.rdatatype.SOA, answer[0].rdtype)
+
+    def test_dispatch_opcode_query_IXFR_serial_wrapped(self):
+        domain = self.create_domain()
+
+        serial = self.central_service.get_domain(
+            self.admin_context, domain.id).serial
+
+        # A larger serial more than 2^31 ahead precedes the domain's serial
+        answer = self._ixfr(domain, (serial + 2 ** 31 + 1) % 2 ** 32)
+
+        # SOA, NS, SOA
+        self.assertEqual(3, len(answer))
+        self.assertEqual(dns.rdatatype.SOA, answer[0].rdtype)
+        self.assertEqual(dns.rdatatype.SOA, answer[-1].rdtype)
+
+    def test_dispatch_opcode_query_IXFR_udp(self):
+        domain = self.create_domain()
+        recordset = self.create_recordset(domain, 'A')
+        self.create_record(domain, recordset)
+
+        # Over UDP only the current SOA is returned, even though the client
+        # is behind.
+        answer = self._ixfr(domain, 1, tcp=False)
+
+        self.assertEqual(1, len(answer))
+        self.assertEqual(dns.rdatatype.SOA, answer[0].rdtype)
+
+    def test_dispatch_opcode_query_IXFR_fallback_to_AXFR(self):
+        domain = self.create_domain()
+        recordset = self.create_recordset(domain, 'A')
+        self.create_record(domain, recordset)
+
+        # The journal holds no changes since serial 1
+        answer = self._ixfr(domain, 1)
+
+        # SOA, NS, A, SOA
+        self.assertEqual(4, len(answer))
+        self.assertEqual(dns.rdatatype.SOA, answer[0].rdtype)
+        self.assertEqual(dns.rdatatype.SOA, answer[-1].rdtype)
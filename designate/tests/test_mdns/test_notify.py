@@ -15,6 +15,7 @@
 import binascii
 
 import dns
+import eventlet
 from mock import patch
 
 from designate.tests.test_mdns import MdnsTestCase
@@ -182,3 +183,38 @@ class MdnsNotifyTest(MdnsTestCase):
         self.assertEqual(status, 1)
         self.assertEqual(serial, None)
         self.assertEqual(retries, 2)
+
+    def test_notify_zone_changed_slaves(self):
+        self.config(slave_nameserver_ips_and_ports=['127.0.0.1:65255',
+                                                    '127.0.0.2:65255'],
+                    notify_delay=0, group='service:mdns')
+        self.notify = notify.NotifyEndpoint()
+
+        context = self.get_context()
+        with patch.object(self.notify, '_make_and_send_dns_message') as send:
+            self.notify.notify_zone_changed(
+                context, objects.Domain(**self.test_domain), None, None, None,
+                None)
+            eventlet.sleep(0)
+
+            self.assertEqual(2, send.call_count)
+
+    def test_notify_zone_changed_slaves_coalesced(self):
+        self.config(slave_nameserver_ips_and_ports=['127.0.0.1:65255'],
+                    notify_delay=0.1, group='service:mdns')
+        self.notify = notify.NotifyEndpoint()
+
+        context = self.get_context()
+        with patch.object(self.notify, '_make_and_send_dns_message') as send:
+            for serial in (100, 101, 102):
+                values = dict(self.test_domain, id='domain-1', serial=serial)
+                self.notify.notify_zone_changed(
+                    context, objects.Domain(**values), None, None, None, None)
+
+            self.assertEqual(0, send.call_count)
+
+            eventlet.sleep(0.2)
+
+            # A single NOTIFY is sent, for the latest serial
+            self.assertEqual(1, send.call_count)
+            self.assertEqual(102, send.call_args[0][0].serial)
@@ -0,0 +1,153 @@
+# Copyright 2014 Hewlett-Packard Development Company, L.P.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import socket
+
+import dns
+import eventlet
+import mock
+
+from designate import objects
+from designate.tests.test_mdns import MdnsTestCase
+from designate.mdns import poller
+
+
+class SerialPollerTest(MdnsTestCase):
+    def setUp(self):
+        super(SerialPollerTest, self).setUp()
+        self.config(poll_batch_size=1, group='service:mdns')
+
+        self.pool_manager_api = mock.Mock()
+        self.poller = poller.SerialPoller(self.pool_manager_api)
+        self.addCleanup(self.poller.stop)
+
+        # A nameserver which answers SOA queries with the serial in
+        # self.server_serial, if set.
+        self.server_serial = None
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.server.bind(('127.0.0.1', 0))
+        self.addCleanup(self.server.close)
+
+        self.destination = '127.0.0.1:%d' % self.server.getsockname()[1]
+
+        # Responses are sent from self.spoofer instead, if set
+        self.spoofer = None
+
+        eventlet.spawn_n(self._serve)
+
+    def _serve(self):
+        while True:
+            payload, addr = self.server.recvfrom(65535)
+
+            if self.server_serial is None:
+                continue
+
+            request = dns.message.from_wire(payload)
+            response = dns.message.make_response(request)
+            response.flags |= dns.flags.AA
+            response.answer.append(dns.rrset.from_text(
+                request.question[0].name, 3600, dns.rdataclass.IN,
+                dns.rdatatype.SOA, 'ns1.example.org. admin.example.com. '
+                '%d 3600 600 86400 3600' % self.server_serial))
+
+            sock = self.spoofer or self.server
+            sock.sendto(response.to_wire(), addr)
+
+    def _poll(self, serial, timeout=1, retry_interval=0.05, max_retries=3):
+        domain = objects.Domain(name='example.com.', serial=serial)
+
+        self.poller.poll(self.get_context(), domain, self.destination,
+                         timeout, retry_interval, max_retries)
+
+        for _ in range(50):
+            if self.pool_manager_api.update_statuses.called:
+                break
+            eventlet.sleep(0.05)
+
+        self.assertEqual(1, self.pool_manager_api.update_statuses.call_count)
+
+        return self.pool_manager_api.update_statuses.call_args[0][1]
+
+    def test_poll(self):
+        self.server_serial = 100
+
+        statuses = self._poll(100)
+
+        self.assertEqual(1, len(statuses))
+        domain, server, status, serial = statuses[0]
+        self.assertEqual(self.destination, server)
+        self.assertEqual(poller.SUCCESS, status)
+        self.assertEqual(100, serial)
+
+    def test_poll_lower_serial(self):
+        self.server_serial = 99
+
+        statuses = self._poll(100)
+
+        domain, server, status, serial = statuses[0]
+        self.assertEqual(poller.ERROR, status)
+        self.assertEqual(99, serial)
+
+    def test_poll_timeout(self):
+        statuses = self._poll(100, timeout=0.1)
+
+        domain, server, status, serial = statuses[0]
+        self.assertEqual(poller.ERROR, status)
+        self.assertIsNone(serial)
+
+    def test_poll_response_from_other_address(self):
+        self.server_serial = 100
+        self.spoofer = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.addCleanup(self.spoofer.close)
+
+        statuses = self._poll(100, timeout=0.1, max_retries=1)
+
+        domain, server, status, serial = statuses[0]
+        self.assertEqual(poller.ERROR, status)
+        self.assertIsNone(serial)
+
+    def test_poll_receive_error(self):
+        self.server_serial = 100
+
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.addCleanup(sock.close)
+
+        # Fail the first receive only
+        errors = [socket.error()]
+        recvfrom = sock.recvfrom
+
+        def _recvfrom(size):
+            if errors:
+                raise errors.pop()
+            return recvfrom(size)
+
+        wrapper = mock.Mock(wraps=sock)
+        wrapper.recvfrom.side_effect = _recvfrom
+
+        with mock.patch.object(poller.socket, 'socket', return_value=wrapper):
+            statuses = self._poll(100)
+
+        domain, server, status, serial = statuses[0]
+        self.assertEqual(poller.SUCCESS, status)
+        self.assertEqual(100, serial)
+
+    def test_stop(self):
+        domain = objects.Domain(name='example.com.', serial=100)
+
+        self.poller.poll(self.get_context(), domain, self.destination,
+                         10, 0.05, 3)
+        self.poller.stop()
+
+        self.assertEqual({}, self.poller._pending)
+        self.assertIsNone(self.poller._sock)
+        self.assertIsNone(self.poller._receiver)
@@ -13,6 +13,12 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
+import socket
+import struct
+
+import dns
+import eventlet
+
 from designate.tests.test_mdns import MdnsTestCase
 
 
@@ -28,3 +34,56 @@ class MdnsServiceTest(MdnsTestCase):
     def test_stop(self):
         # NOTE: Start is already done by the fixture in start_service()
         self.service.stop()
+
+    def _query_udp(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.settimeout(1)
+        self.addCleanup(sock.close)
+
+        request = dns.message.make_query('example.com.', dns.rdatatype.A)
+        sock.sendto(request.to_wire(),
+                    ('127.0.0.1', self.service._sock_udp.getsockname()[1]))
+
+        return dns.message.from_wire(sock.recv(65535))
+
+    def test_handle_udp(self):
+        response = self._query_udp()
+
+        # mdns is not authoritative for example.com.
+        self.assertEqual(dns.rcode.REFUSED, response.rcode())
+
+    def test_handle_udp_pool_full(self):
+        # With no free handlers, requests are dropped
+        self.service._handler_pool = eventlet.GreenPool(0)
+
+        self.assertRaises(socket.timeout, self._query_udp)
+
+    def _recv_tcp_response(self, sock):
+        data = sock.recv(65535)
+        while len(data) < 2 + struct.unpack('!H', data[:2])[0]:
+            data += sock.recv(65535)
+
+        return dns.message.from_wire(data[2:])
+
+    def test_handle_tcp_multiple_requests(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.settimeout(1)
+        self.addCleanup(sock.close)
+
+        sock.connect(
+            ('127.0.0.1', self.service._sock_tcp.getsockname()[1]))
+
+        for qname in ('example.com.', 'example.org.'):
+            request = dns.message.make_query(qname, dns.rdatatype.A)
+            payload = request.to_wire()
+            payload = struct.pack('!H', len(payload)) + payload
+
+            # Split the request across several segments
+            sock.sendall(payload[:1])
+            eventlet.sleep(0.1)
+            sock.sendall(payload[1:])
+
+            response = self._recv_tcp_response(sock)
+
+            self.assertEqual(request.id, response.id)
+            self.assertEqual(dns.rcode.REFUSED, response.rcode())
@@ -0,0 +1,142 @@
+# Copyright 2014 Hewlett-Packard Development Company, L.P.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import dns
+from mock import patch
+
+from designate import context
+from designate.tests.test_mdns import MdnsTestCase
+from designate.mdns import handler
+from designate.mdns import zone_cache
+
+
+class ZoneSnapshotCacheTest(MdnsTestCase):
+    def _make_snapshot(self, domain_id, serial):
+        rrset = dns.rrset.from_text_list(
+            'mail.example.com.', 3600, dns.rdataclass.IN, 'A', ['192.0.2.1'])
+        return zone_cache.ZoneSnapshot(domain_id, serial, [], [rrset])
+
+    def test_get_missing(self):
+        cache = zone_cache.ZoneSnapshotCache(1024)
+
+        self.assertIsNone(cache.get('domain-1', 1))
+
+    def test_get_stale_serial(self):
+        cache = zone_cache.ZoneSnapshotCache(1024)
+        cache.set(self._make_snapshot('domain-1', 1))
+
+        self.assertIsNone(cache.get('domain-1', 2))
+        self.assertIsNotNone(cache.get('domain-1', 1))
+
+    def test_set_replaces_older_serial(self):
+        cache = zone_cache.ZoneSnapshotCache(1024)
+        cache.set(self._make_snapshot('domain-1', 1))
+        cache.set(self._make_snapshot('domain-1', 2))
+
+        self.assertEqual(1, len(cache))
+        self.assertIsNone(cache.get('domain-1', 1))
+        self.assertIsNotNone(cache.get('domain-1', 2))
+
+    def test_set_ignores_older_serial(self):
+        cache = zone_cache.ZoneSnapshotCache(1024)
+        cache.set(self._make_snapshot('domain-1', 2))
+        cache.set(self._make_snapshot('domain-1', 1))
+
+        self.assertEqual(1, len(cache))
+        self.assertIsNone(cache.get('domain-1', 1))
+        self.assertIsNotNone(cache.get('domain-1', 2))
+
+    def test_lru_eviction(self):
+        snapshot = self._make_snapshot('domain-1', 1)
+        cache = zone_cache.ZoneSnapshotCache(snapshot.size * 2)
+
+        cache.set(snapshot)
+        cache.set(self._make_snapshot('domain-2', 1))
+
+        # Touch domain-1, making domain-2 the least recently used
+        cache.get('domain-1', 1)
+
+        cache.set(self._make_snapshot('domain-3', 1))
+
+        self.assertIsNotNone(cache.get('domain-1', 1))
+        self.assertIsNone(cache.get('domain-2', 1))
+        self.assertIsNotNone(cache.get('domain-3', 1))
+        self.assertEqual(snapshot.size * 2, cache.size)
+
+    def test_oversized_snapshot_not_cached(self):
+        cache = zone_cache.ZoneSnapshotCache(1)
+        cache.set(self._make_snapshot('domain-1', 1))
+
+        self.assertEqual(0, len(cache))
+        self.assertEqual(0, cache.size)
+
+
+class MdnsAxfrCacheTest(MdnsTestCase):
+    def setUp(self):
+        super(MdnsAxfrCacheTest, self).setUp()
+        self.handler = handler.RequestHandler()
+        self.addr = ["0.0.0.0", 5556]
+        self.context = context.DesignateContext.get_admin_context(
+            all_tenants=True)
+
+    def _axfr(self, domain):
+        request = dns.message.make_query(domain.name, dns.rdatatype.AXFR)
+        request.environ = {'addr': self.addr, 'context': self.context}
+
+        answer = []
+        for response in self.handler(request):
+            answer.extend(response.answer)
+
+        return answer
+
+    def test_axfr_served_from_cache(self):
+        domain = self.create_domain()
+        recordset = self.create_recordset(domain, 'A')
+        self.create_record(domain, recordset)
+
+        first = self._axfr(domain)
+
+        with patch.object(self.handler.storage, 'iter_recordsets') as find:
+            second = self._axfr(domain)
+            self.assertFalse(find.called)
+
+        self.assertEqual(first, second)
+
+    def test_axfr_rebuilt_on_serial_change(self):
+        domain = self.create_domain()
+        recordset = self.create_recordset(domain, 'A')
+        self.create_record(domain, recordset)
+
+        first = self._axfr(domain)
+
+        self.create_record(domain, recordset, fixture=1)
+
+        second = self._axfr(domain)
+
+        self.assertNotEqual(first, second)
+
+    def test_axfr_not_cached_when_serial_changes(self):
+        domain = self.create_domain()
+        recordset = self.create_recordset(domain, 'A')
+        self.create_record(domain, recordset)
+
+        changed = self.central_service.get_domain(self.admin_context,
+                                                  domain.id)
+        changed.serial += 1
+
+        # Simulate the zone changing while the snapshot is being built
+        with patch.object(self.handler.storage, 'get_domain',
+                          return_value=changed):
+            self._axfr(domain)
+
+        self.assertEqual(0, len(self.handler.zone_cache))
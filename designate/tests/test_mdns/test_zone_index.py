@@ -0,0 +1,91 @@
+# Copyright 2014 Hewlett-Packard Development Company, L.P.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+from designate import objects
+from designate.tests.test_mdns import MdnsTestCase
+from designate.mdns import handler
+from designate.mdns import zone_index
+
+
+class ZoneIndexTest(MdnsTestCase):
+    def setUp(self):
+        super(ZoneIndexTest, self).setUp()
+        self.index = zone_index.ZoneIndex()
+        self.index.add('domain-1', 'example.com.')
+        self.index.add('domain-2', 'sub.example.com.')
+
+    def test_find(self):
+        self.assertEqual('domain-1', self.index.find('example.com.'))
+        self.assertEqual('domain-1', self.index.find('www.example.com.'))
+        self.assertEqual('domain-1', self.index.find('WWW.Example.COM.'))
+
+    def test_find_closest_enclosing(self):
+        self.assertEqual('domain-2', self.index.find('sub.example.com.'))
+        self.assertEqual('domain-2', self.index.find('a.b.sub.example.com.'))
+        self.assertEqual('domain-1', self.index.find('b.example.com.'))
+
+    def test_find_missing(self):
+        self.assertIsNone(self.index.find('example.org.'))
+        self.assertIsNone(self.index.find('com.'))
+        self.assertIsNone(self.index.find('.'))
+
+    def test_remove(self):
+        self.index.remove('domain-2')
+
+        self.assertEqual(1, len(self.index))
+        self.assertEqual('domain-1', self.index.find('sub.example.com.'))
+
+        self.index.remove('domain-1')
+
+        self.assertEqual(0, len(self.index))
+        self.assertIsNone(self.index.find('www.example.com.'))
+
+    def test_remove_parent(self):
+        self.index.remove('domain-1')
+
+        self.assertIsNone(self.index.find('www.example.com.'))
+        self.assertEqual('domain-2', self.index.find('www.sub.example.com.'))
+
+    def test_load(self):
+        self.index.load([objects.Domain(id='domain-3', name='example.org.')])
+
+        self.assertTrue(self.index.loaded)
+        self.assertEqual(1, len(self.index))
+        self.assertIsNone(self.index.find('example.com.'))
+        self.assertEqual('domain-3', self.index.find('www.example.org.'))
+
+
+class ZoneIndexEndpointTest(MdnsTestCase):
+    def setUp(self):
+        super(ZoneIndexEndpointTest, self).setUp()
+        self.handler = handler.RequestHandler()
+        self.endpoint = zone_index.ZoneIndexEndpoint(self.handler.zone_index)
+
+    def test_refresh_zone_index(self):
+        domain = self.create_domain()
+
+        self.handler.refresh_zone_index()
+
+        self.assertEqual(domain.id, self.handler.zone_index.find(domain.name))
+
+    def test_add_and_remove_zone(self):
+        domain = objects.Domain(id='domain-1', name='example.net.')
+
+        self.endpoint.add_zone(self.admin_context, domain)
+
+        self.assertEqual('domain-1',
+                         self.handler.zone_index.find('www.example.net.'))
+
+        self.endpoint.remove_zone(self.admin_context, domain)
+
+        self.assertIsNone(self.handler.zone_index.find('www.example.net.'))
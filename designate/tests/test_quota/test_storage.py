@@ -91,3 +91,41 @@ class StorageQuotaTest(tests.TestCase):
 
         quotas = self.quota.storage.find_quotas(context, criterion)
         self.assertEqual(0, len(quotas))
+
+    def test_get_quotas_cached(self):
+        context = self.get_admin_context()
+        context.all_tenants = True
+
+        self.quota.set_quota(context, 'tenant_id', 'domains', 1500)
+        self.assertEqual(
+            1500, self.quota.get_quotas(context, 'tenant_id')['domains'])
+
+        # Change the quota behind the quota driver's back
+        quota = self.quota.storage.find_quota(
+            context, {'tenant_id': 'tenant_id', 'resource': 'domains'})
+        quota.hard_limit = 1234
+        self.quota.storage.update_quota(context, quota)
+
+        # Ensure the cached limit is used
+        self.assertEqual(
+            1500, self.quota.get_quotas(context, 'tenant_id')['domains'])
+
+        # Ensure changes made through the driver are seen at once
+        self.quota.set_quota(context, 'tenant_id', 'domains', 1000)
+        self.assertEqual(
+            1000, self.quota.get_quotas(context, 'tenant_id')['domains'])
+
+    def test_get_quotas_cache_disabled(self):
+        self.config(quota_cache_ttl=0)
+
+        context = self.get_admin_context()
+        context.all_tenants = True
+
+        self.quota.get_quotas(context, 'tenant_id')
+
+        self.quota.storage.create_quota(context, {
+            'tenant_id': 'tenant_id', 'resource': 'domains',
+            'hard_limit': 1500})
+
+        self.assertEqual(
+            1500, self.quota.get_quotas(context, 'tenant_id')['domains'])
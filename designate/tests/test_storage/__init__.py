@@ -17,11 +17,14 @@ import uuid
 import math
 
 import testtools
+from testtools.matchers import GreaterThan
 from oslo.config import cfg
 
 from designate.openstack.common import log as logging
+from designate import dnsutils
 from designate import exceptions
 from designate import objects
+from designate import utils
 from designate.storage.base import Storage as StorageBase
 
 
@@ -73,6 +76,69 @@ class StorageTestCase(object):
 
                 item_number += 1
 
+    def test_paging_encoded_marker(self):
+        domains = [self.create_domain(fixture=i) for i in range(3)]
+        domains = sorted(domains, key=lambda d: d.name)
+
+        marker = utils.encode_marker(['name', 'id'],
+                                     [domains[0].name, domains[0].id])
+
+        results = self.storage.find_domains(
+            self.admin_context, marker=marker, sort_key='name')
+
+        self.assertEqual([domains[1].id, domains[2].id],
+                         [r.id for r in results])
+
+    def test_paging_nullable_sort_key(self):
+        domains = [self.create_domain(fixture=i) for i in range(3)]
+
+        # Only one domain has an updated_at, the others sort as NULLs
+        domains[1].email = 'updated@example.com'
+        self.storage.update_domain(self.admin_context, domains[1])
+
+        for sort_dir in ('asc', 'desc'):
+            ids = []
+            marker = None
+
+            for _ in range(len(domains) + 1):
+                results = self.storage.find_domains(
+                    self.admin_context, marker=marker, limit=1,
+                    sort_key='updated_at', sort_dir=sort_dir)
+
+                if not results:
+                    break
+
+                ids.append(results[0].id)
+                marker = results[0].id
+
+            self.assertEqual(sorted(d.id for d in domains), sorted(ids))
+
+    def test_paging_encoded_marker_sort_key_mismatch(self):
+        domain = self.create_domain()
+
+        marker = utils.encode_marker(['name', 'id'], [domain.name, domain.id])
+
+        with testtools.ExpectedException(exceptions.InvalidMarker):
+            self.storage.find_domains(
+                self.admin_context, marker=marker, sort_key='created_at')
+
+    def test_paging_encoded_marker_invalid_values(self):
+        domain = self.create_domain()
+
+        values = [
+            ('name', [domain.name, 'not-a-uuid']),
+            ('name', [1, domain.id]),
+            ('name', [None, domain.id]),
+            ('serial', ['1', domain.id]),
+        ]
+
+        for sort_key, marker_values in values:
+            marker = utils.encode_marker([sort_key, 'id'], marker_values)
+
+            with testtools.ExpectedException(exceptions.InvalidMarker):
+                self.storage.find_domains(
+                    self.admin_context, marker=marker, sort_key=sort_key)
+
     def test_paging_marker_not_found(self):
         with testtools.ExpectedException(exceptions.MarkerNotFound):
             self.storage.find_servers(
@@ -274,6 +340,76 @@ class StorageTestCase(object):
             uuid = 'caf771fc-6b05-4891-bee1-c2a48621f57b'
             self.storage.delete_quota(self.admin_context, uuid)
 
+    # Quota Usage Tests
+    def _assert_record_usage(self, domain):
+        count = self.storage.count_records(
+            self.admin_context, {'domain_id': domain['id']})
+        usage = self.storage.get_quota_usage(
+            self.admin_context, 'domain_records', domain['id'])
+
+        self.assertEqual(count, usage)
+
+        return usage
+
+    def test_get_quota_usage_domains(self):
+        tenant_id = self.admin_context.tenant
+
+        self.assertEqual(0, self.storage.get_quota_usage(
+            self.admin_context, 'domains', tenant_id))
+
+        domain = self.create_domain()
+        self.create_domain(fixture=1)
+
+        self.assertEqual(2, self.storage.get_quota_usage(
+            self.admin_context, 'domains', tenant_id))
+
+        self.storage.delete_domain(self.admin_context, domain['id'])
+
+        self.assertEqual(1, self.storage.get_quota_usage(
+            self.admin_context, 'domains', tenant_id))
+
+    def test_get_quota_usage_domain_records(self):
+        domain = self.create_domain()
+        initial = self._assert_record_usage(domain)
+
+        recordset = self.create_recordset(domain)
+        record = self.create_record(domain, recordset)
+        self.create_record(domain, recordset, fixture=1)
+
+        self.assertEqual(initial + 2, self._assert_record_usage(domain))
+
+        self.storage.delete_record(self.admin_context, record['id'])
+
+        self.assertEqual(initial + 1, self._assert_record_usage(domain))
+
+        # Deleting a recordset deletes its records
+        self.storage.delete_recordset(self.admin_context, recordset['id'])
+
+        self.assertEqual(initial, self._assert_record_usage(domain))
+
+    def test_get_quota_usage_sync_ns_records(self):
+        domain = self.create_domain()
+        initial = self._assert_record_usage(domain)
+
+        self.storage.sync_ns_records(
+            self.admin_context, [domain['id']],
+            ['ns1.example.org.', 'ns2.example.org.', 'ns3.example.org.'])
+
+        self.assertEqual(initial + 2, self._assert_record_usage(domain))
+
+    def test_get_quota_usage_unknown(self):
+        with testtools.ExpectedException(exceptions.QuotaResourceUnknown):
+            self.storage.get_quota_usage(
+                self.admin_context, 'unknown', 'scope_id')
+
+    def test_reconcile_quota_usages(self):
+        domain = self.create_domain()
+        self._assert_record_usage(domain)
+
+        # Nothing needs correcting while the usage is maintained
+        self.assertEqual(0, self.storage.reconcile_quota_usages(
+            self.admin_context))
+
     # Server Tests
     def test_create_server(self):
         values = {
@@ -635,6 +771,19 @@ class StorageTestCase(object):
         with testtools.ExpectedException(exceptions.DuplicateDomain):
             self.create_domain()
 
+    def test_iter_domains(self):
+        domains = [self.create_domain(fixture=i) for i in range(3)]
+
+        # Ensure every domain is found, across batches smaller than the total
+        results = self.storage.iter_domains(self.admin_context, batch_size=2)
+
+        self.assertEqual([d.id for d in domains], [r.id for r in results])
+
+        results = self.storage.iter_domains(
+            self.admin_context, {'name': domains[1].name}, batch_size=2)
+
+        self.assertEqual([domains[1].id], [r.id for r in results])
+
     def test_find_domains(self):
         self.config(quota_domains=20)
 
@@ -821,6 +970,93 @@ class StorageTestCase(object):
             uuid = 'caf771fc-6b05-4891-bee1-c2a48621f57b'
             self.storage.delete_domain(self.admin_context, uuid)
 
+    def test_find_domains_criterion_list(self):
+        domain_one = self.create_domain()
+        domain_two = self.create_domain(fixture=1)
+        self.create_domain(fixture=2)
+
+        criterion = dict(
+            name=[domain_one['name'], domain_two['name'], 'example.io.']
+        )
+
+        results = self.storage.find_domains(self.admin_context, criterion)
+
+        self.assertEqual(2, len(results))
+        self.assertEqual(set([domain_one['id'], domain_two['id']]),
+                         set(r['id'] for r in results))
+
+    def test_reparent_domains(self):
+        subdomain = self.create_domain(name='www.example.com.')
+        nested = self.create_domain(name='a.www.example.com.')
+        other = self.create_domain(name='wwwexample.com.')
+
+        # Create the parent directly, leaving its subdomains to be reparented
+        domain = self.storage.create_domain(self.admin_context, objects.Domain(
+            name='example.com.', email='example@example.com',
+            tenant_id=self.admin_context.tenant))
+
+        count = self.storage.reparent_domains(self.admin_context, domain)
+
+        self.assertEqual(1, count)
+
+        subdomain = self.storage.get_domain(self.admin_context, subdomain.id)
+        self.assertEqual(domain.id, subdomain.parent_domain_id)
+
+        # Only domains which were children of the new domain's parent move
+        nested = self.storage.get_domain(self.admin_context, nested.id)
+        self.assertEqual(subdomain.id, nested.parent_domain_id)
+
+        other = self.storage.get_domain(self.admin_context, other.id)
+        self.assertIsNone(other.parent_domain_id)
+
+    def test_reparent_domains_escapes_wildcards(self):
+        # Unescaped, the _ would match the . in www.example.com.
+        other = self.create_domain(name='www.example.com.')
+
+        domain = self.storage.create_domain(self.admin_context, objects.Domain(
+            name='example_com.', email='example@example.com',
+            tenant_id=self.admin_context.tenant))
+
+        count = self.storage.reparent_domains(self.admin_context, domain)
+
+        self.assertEqual(0, count)
+
+        other = self.storage.get_domain(self.admin_context, other.id)
+        self.assertIsNone(other.parent_domain_id)
+
+    def test_count_subdomains(self):
+        self.create_domain(name='www.example.com.')
+        self.create_domain(name='a.www.example.com.')
+        self.create_domain(name='wwwexample.com.')
+
+        count = self.storage.count_subdomains(self.admin_context,
+                                              'example.com.')
+        self.assertEqual(2, count)
+
+        count = self.storage.count_subdomains(self.admin_context,
+                                              'www.example.com.')
+        self.assertEqual(1, count)
+
+        criterion = {'tenant_id': '!%s' % self.admin_context.tenant}
+        count = self.storage.count_subdomains(self.admin_context,
+                                              'example.com.', criterion)
+        self.assertEqual(0, count)
+
+    def test_increment_serials(self):
+        domain_one = self.create_domain()
+        domain_two = self.create_domain(fixture=1)
+        domain_three = self.create_domain(fixture=2)
+
+        self.storage.increment_serials(
+            self.admin_context, [domain_one.id, domain_two.id])
+
+        for domain in (domain_one, domain_two):
+            updated = self.storage.get_domain(self.admin_context, domain.id)
+            self.assertThat(updated.serial, GreaterThan(domain.serial))
+
+        updated = self.storage.get_domain(self.admin_context, domain_three.id)
+        self.assertEqual(domain_three.serial, updated.serial)
+
     def test_count_domains(self):
         # in the beginning, there should be nothing
         domains = self.storage.count_domains(self.admin_context)
@@ -892,6 +1128,44 @@ class StorageTestCase(object):
         self.assertIsNotNone(recordset.records[0].id)
         self.assertIsNotNone(recordset.records[1].id)
 
+    def test_create_recordsets(self):
+        domain = self.create_domain()
+
+        recordsets = objects.RecordSetList(objects=[
+            objects.RecordSet(
+                name='www.%s' % domain['name'], type='A',
+                records=objects.RecordList(objects=[
+                    objects.Record(data='192.0.2.1'),
+                    objects.Record(data='192.0.2.2'),
+                ])),
+            objects.RecordSet(
+                name='mail.%s' % domain['name'], type='A',
+                records=objects.RecordList(objects=[
+                    objects.Record(data='192.0.2.3'),
+                ])),
+            objects.RecordSet(name='ftp.%s' % domain['name'], type='A'),
+        ])
+
+        usage = self.storage.get_quota_usage(
+            self.admin_context, 'domain_records', domain['id'])
+
+        recordsets = self.storage.create_recordsets(
+            self.admin_context, domain['id'], recordsets)
+
+        self.assertEqual([2, 1, 0], [len(rs.records) for rs in recordsets])
+
+        # Ensure the RecordSets and Records have been saved
+        for recordset in recordsets:
+            stored = self.storage.get_recordset(
+                self.admin_context, recordset.id)
+
+            self.assertEqual(domain['id'], stored.domain_id)
+            self.assertEqual(sorted(r.id for r in recordset.records),
+                             sorted(r.id for r in stored.records))
+
+        self.assertEqual(usage + 3, self.storage.get_quota_usage(
+            self.admin_context, 'domain_records', domain['id']))
+
     def test_find_recordsets(self):
         domain = self.create_domain()
 
@@ -1000,6 +1274,36 @@ class StorageTestCase(object):
         self.assertIsInstance(recordset.records[0], objects.Record)
         self.assertIsInstance(recordset.records[1], objects.Record)
 
+    def test_find_recordsets_with_records_multiple(self):
+        domain = self.create_domain()
+        recordset_a = self.create_recordset(domain, 'A')
+        recordset_mx = self.create_recordset(domain, 'MX')
+
+        record_a = self.create_record(domain, recordset_a)
+        record_mx = self.create_record(domain, recordset_mx)
+
+        results = self.storage.find_recordsets(
+            self.admin_context, {'domain_id': domain.id})
+
+        recordsets = dict((r.id, r) for r in results)
+
+        # Ensure each Record is attached to its own RecordSet only
+        self.assertEqual([record_a.id],
+                         [r.id for r in recordsets[recordset_a.id].records])
+        self.assertEqual([record_mx.id],
+                         [r.id for r in recordsets[recordset_mx.id].records])
+
+    def test_find_recordsets_without_records(self):
+        domain = self.create_domain()
+        recordset = self.create_recordset(domain)
+        self.create_record(domain, recordset)
+
+        results = self.storage.find_recordsets(
+            self.admin_context, {'id': recordset.id}, load_records=False)
+
+        self.assertEqual(1, len(results))
+        self.assertFalse(results[0].obj_attr_is_set('records'))
+
     def test_get_recordset(self):
         domain = self.create_domain()
         expected = self.create_recordset(domain)
@@ -1254,6 +1558,7 @@ class StorageTestCase(object):
         self.assertIsNotNone(result['id'])
         self.assertIsNotNone(result['created_at'])
         self.assertIsNotNone(result['hash'])
+        self.assertIsNotNone(result['rdata'])
         self.assertIsNone(result['updated_at'])
 
         self.assertEqual(result['tenant_id'], self.admin_context.tenant)
@@ -1271,6 +1576,73 @@ class StorageTestCase(object):
             # Attempt to create the second/duplicate record
             self.create_record(domain, recordset)
 
+    def test_create_records(self):
+        domain = self.create_domain()
+        recordset = self.create_recordset(domain, type='A')
+
+        records = objects.RecordList(objects=[
+            objects.Record(data='192.0.2.%d' % i) for i in range(1, 11)])
+
+        usage = self.storage.get_quota_usage(
+            self.admin_context, 'domain_records', domain['id'])
+
+        records = self.storage.create_records(
+            self.admin_context, domain['id'], recordset['id'], records)
+
+        for record in records:
+            self.assertIsNotNone(record['id'])
+            self.assertIsNotNone(record['hash'])
+            self.assertIsNotNone(record['rdata'])
+            self.assertEqual(recordset['id'], record['recordset_id'])
+
+        self.assertEqual(10, self.storage.count_records(
+            self.admin_context, {'recordset_id': recordset['id']}))
+        self.assertEqual(usage + 10, self.storage.get_quota_usage(
+            self.admin_context, 'domain_records', domain['id']))
+
+    def test_create_records_duplicate(self):
+        domain = self.create_domain()
+        recordset = self.create_recordset(domain, type='A')
+
+        records = objects.RecordList(objects=[
+            objects.Record(data='192.0.2.1'),
+            objects.Record(data='192.0.2.1'),
+        ])
+
+        with testtools.ExpectedException(exceptions.DuplicateRecord):
+            self.storage.create_records(
+                self.admin_context, domain['id'], recordset['id'], records)
+
+    def test_iter_recordsets(self):
+        domain = self.create_domain()
+
+        criterion = {'domain_id': domain['id'], 'name': '*.%s' % domain.name}
+        recordsets = [self.create_recordset(domain, fixture=i)
+                      for i in range(2)]
+        self.create_record(domain, recordsets[0])
+
+        results = list(self.storage.iter_recordsets(
+            self.admin_context, criterion, batch_size=1))
+
+        self.assertEqual([rs.id for rs in recordsets],
+                         [r.id for r in results])
+
+        # Ensure the records are loaded with their recordsets
+        self.assertEqual([1, 0], [len(r.records) for r in results])
+
+    def test_iter_records(self):
+        domain = self.create_domain()
+        recordset = self.create_recordset(domain)
+
+        records = [self.create_record(domain, recordset, fixture=i)
+                   for i in range(2)]
+
+        results = self.storage.iter_records(
+            self.admin_context, {'recordset_id': recordset['id']},
+            batch_size=1)
+
+        self.assertEqual([r.id for r in records], [r.id for r in results])
+
     def test_find_records(self):
         domain = self.create_domain()
         recordset = self.create_recordset(domain)
@@ -1460,6 +1832,8 @@ class StorageTestCase(object):
 
         # Ensure the new value took
         self.assertEqual('192.0.2.255', record.data)
+        self.assertEqual(dnsutils.rdata_to_wire('A', '192.0.2.255'),
+                         record.rdata)
 
         # Ensure the version column was incremented
         self.assertEqual(2, record.version)
@@ -1501,6 +1875,39 @@ class StorageTestCase(object):
             uuid = 'caf771fc-6b05-4891-bee1-c2a48621f57b'
             self.storage.delete_record(self.admin_context, uuid)
 
+    def test_delete_records(self):
+        domain = self.create_domain()
+        recordset = self.create_recordset(domain)
+
+        usage = self.storage.get_quota_usage(
+            self.admin_context, 'domain_records', domain['id'])
+
+        records = [self.create_record(domain, recordset, fixture=i)
+                   for i in range(2)]
+
+        deleted = self.storage.delete_records(
+            self.admin_context, [r['id'] for r in records])
+
+        self.assertEqual(sorted(r['id'] for r in records),
+                         sorted(r['id'] for r in deleted))
+
+        for record in records:
+            with testtools.ExpectedException(exceptions.RecordNotFound):
+                self.storage.get_record(self.admin_context, record['id'])
+
+        self.assertEqual(usage, self.storage.get_quota_usage(
+            self.admin_context, 'domain_records', domain['id']))
+
+    def test_delete_records_missing(self):
+        domain = self.create_domain()
+        recordset = self.create_recordset(domain)
+        record = self.create_record(domain, recordset)
+
+        with testtools.ExpectedException(exceptions.RecordNotFound):
+            uuid = 'caf771fc-6b05-4891-bee1-c2a48621f57b'
+            self.storage.delete_records(self.admin_context,
+                                        [record['id'], uuid])
+
     def test_count_records(self):
         # in the beginning, there should be nothing
         records = self.storage.count_records(self.admin_context)
@@ -1675,6 +2082,159 @@ class StorageTestCase(object):
             uuid = 'cac1fc02-79b2-4e62-a1a4-427b6790bbe6'
             self.storage.delete_tld(self.admin_context, uuid)
 
+    def test_get_tlds_version(self):
+        self.create_tld(fixture=0)
+        versions = [self.storage.get_tlds_version(self.admin_context)]
+
+        tld = self.create_tld(fixture=1)
+        versions.append(self.storage.get_tlds_version(self.admin_context))
+
+        tld.name = 'co.nz'
+        self.storage.update_tld(self.admin_context, tld)
+        versions.append(self.storage.get_tlds_version(self.admin_context))
+
+        self.storage.delete_tld(self.admin_context, tld.id)
+        versions.append(self.storage.get_tlds_version(self.admin_context))
+
+        # Every change should result in a new version
+        self.assertEqual(len(versions), len(set(versions)))
+
+    def _get_ns_data(self, domain):
+        recordset = self.storage.find_recordset(
+            self.admin_context, {'domain_id': domain.id, 'type': 'NS'})
+
+        return sorted(r.data for r in recordset.records)
+
+    def test_sync_ns_records(self):
+        domain_one = self.create_domain()
+        domain_two = self.create_domain(fixture=1)
+        domain_ids = [domain_one.id, domain_two.id]
+
+        changed = self.storage.sync_ns_records(
+            self.admin_context, domain_ids,
+            ['ns1.example.org.', 'ns2.example.org.'])
+
+        self.assertEqual(set(domain_ids), set(changed))
+        self.assertEqual(['ns1.example.org.', 'ns2.example.org.'],
+                         self._get_ns_data(domain_one))
+
+        # Nothing changes when the records already match
+        changed = self.storage.sync_ns_records(
+            self.admin_context, domain_ids,
+            ['ns1.example.org.', 'ns2.example.org.'])
+
+        self.assertEqual([], changed)
+
+        changed = self.storage.sync_ns_records(
+            self.admin_context, domain_ids, ['ns3.example.org.'],
+            remove=['ns1.example.org.'])
+
+        self.assertEqual(set(domain_ids), set(changed))
+        self.assertEqual(['ns3.example.org.'], self._get_ns_data(domain_two))
+
+    def test_update_soa_records(self):
+        domain = self.create_domain()
+
+        data = 'ns1.example.org. example.example.com. 1 3600 600 86400 3600'
+        self.storage.update_soa_records(self.admin_context, {domain.id: data})
+
+        recordset = self.storage.find_recordset(
+            self.admin_context, {'domain_id': domain.id, 'type': 'SOA'})
+
+        self.assertEqual(1, len(recordset.records))
+        self.assertEqual(data, recordset.records[0].data)
+        self.assertIsNotNone(recordset.records[0].rdata)
+
+    def test_update_records_status(self):
+        domain = self.create_domain()
+        recordset = self.create_recordset(domain)
+
+        def create_record(data, action, status, serial):
+            return self.storage.create_record(
+                self.admin_context, domain['id'], recordset['id'],
+                objects.Record(data=data, action=action, status=status,
+                               serial=serial))
+
+        pending = create_record('192.0.2.1', 'CREATE', 'PENDING', 10)
+        newer = create_record('192.0.2.2', 'UPDATE', 'PENDING', 20)
+        deleting = create_record('192.0.2.3', 'DELETE', 'ERROR', 10)
+
+        count = self.storage.update_records_status(
+            self.admin_context, domain['id'], 15, ['PENDING', 'ERROR'],
+            actions=['CREATE', 'UPDATE'], status='ACTIVE', action='NONE')
+
+        self.assertEqual(1, count)
+
+        record = self.storage.get_record(self.admin_context, pending['id'])
+        self.assertEqual('ACTIVE', record.status)
+        self.assertEqual('NONE', record.action)
+        self.assertThat(record.version, GreaterThan(pending.version))
+
+        # Ensure records beyond the serial, or with other actions, are
+        # left alone
+        record = self.storage.get_record(self.admin_context, newer['id'])
+        self.assertEqual('PENDING', record.status)
+
+        record = self.storage.get_record(self.admin_context, deleting['id'])
+        self.assertEqual('ERROR', record.status)
+        self.assertEqual('DELETE', record.action)
+
+    # Journal Tests
+    def _create_journal_entries(self, domain, previous_serial, serial):
+        entries = objects.JournalEntryList(objects=[
+            objects.JournalEntry(
+                serial=serial, previous_serial=previous_serial,
+                action='DELETE', name='www.%s' % domain['name'], type='A',
+                ttl=3600, data='192.0.2.1'),
+            objects.JournalEntry(
+                serial=serial, previous_serial=previous_serial,
+                action='ADD', name='www.%s' % domain['name'], type='A',
+                ttl=3600, data='192.0.2.2'),
+        ])
+
+        return self.storage.create_journal_entries(
+            self.admin_context, domain['id'], entries)
+
+    def test_create_journal_entries(self):
+        domain = self.create_domain()
+
+        entries = self._create_journal_entries(domain, 1, 2)
+
+        self.assertEqual(2, len(entries))
+        for entry in entries:
+            self.assertEqual(domain['id'], entry.domain_id)
+
+    def test_find_journal_entries(self):
+        domain = self.create_domain()
+
+        self._create_journal_entries(domain, 1, 2)
+        self._create_journal_entries(domain, 2, 3)
+
+        entries = self.storage.find_journal_entries(
+            self.admin_context, domain['id'], 1)
+
+        self.assertEqual(4, len(entries))
+        self.assertEqual([2, 2, 3, 3], [e.serial for e in entries])
+
+        entries = self.storage.find_journal_entries(
+            self.admin_context, domain['id'], 2)
+
+        self.assertEqual(2, len(entries))
+        self.assertEqual(['DELETE', 'ADD'], [e.action for e in entries])
+        self.assertEqual([0, 1], [e.sequence for e in entries])
+
+    def test_truncate_journal(self):
+        domain = self.create_domain()
+
+        self._create_journal_entries(domain, 1, 2)
+
+        self.storage.truncate_journal(self.admin_context, domain['id'])
+
+        entries = self.storage.find_journal_entries(
+            self.admin_context, domain['id'], 0)
+
+        self.assertEqual(0, len(entries))
+
     # Blacklist tests
     def test_create_blacklist(self):
         values = {
@@ -1824,6 +2384,26 @@ class StorageTestCase(object):
             uuid = '97f57960-f41b-4e93-8e22-8fd6c7e2c183'
             self.storage.delete_blacklist(self.admin_context, uuid)
 
+    def test_get_blacklists_version(self):
+        self.create_blacklist(fixture=0)
+        versions = [self.storage.get_blacklists_version(self.admin_context)]
+
+        blacklist = self.create_blacklist(fixture=1)
+        versions.append(
+            self.storage.get_blacklists_version(self.admin_context))
+
+        blacklist.pattern = 'example.net.'
+        self.storage.update_blacklist(self.admin_context, blacklist)
+        versions.append(
+            self.storage.get_blacklists_version(self.admin_context))
+
+        self.storage.delete_blacklist(self.admin_context, blacklist.id)
+        versions.append(
+            self.storage.get_blacklists_version(self.admin_context))
+
+        # Every change should result in a new version
+        self.assertEqual(len(versions), len(set(versions)))
+
     # Pool Tests
     def test_create_pool(self):
         values = {
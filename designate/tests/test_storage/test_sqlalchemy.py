@@ -13,8 +13,13 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
+import mock
+from oslo.config import cfg
+
 from designate.openstack.common import log as logging
 from designate import storage
+from designate.sqlalchemy import session
+from designate.storage.impl_sqlalchemy import tables
 from designate.tests import TestCase
 from designate.tests.test_storage import StorageTestCase
 
@@ -26,3 +31,129 @@ class SqlalchemyStorageTest(StorageTestCase, TestCase):
         super(SqlalchemyStorageTest, self).setUp()
 
         self.storage = storage.get_storage('sqlalchemy')
+
+    def test_reconcile_quota_usages_corrected(self):
+        domain = self.create_domain()
+        usage = self.storage.get_quota_usage(
+            self.admin_context, 'domain_records', domain['id'])
+
+        # Corrupt one usage, and lose another
+        table = tables.quota_usages
+        self.storage.session.execute(
+            table.update()
+                 .where(table.c.scope_id == domain['id'])
+                 .values(in_use=usage + 10))
+        self.storage.session.execute(
+            table.delete().where(table.c.resource == 'domains'))
+
+        self.assertEqual(2, self.storage.reconcile_quota_usages(
+            self.admin_context))
+
+        self.assertEqual(usage, self.storage.get_quota_usage(
+            self.admin_context, 'domain_records', domain['id']))
+        self.assertEqual(1, self.storage.get_quota_usage(
+            self.admin_context, 'domains', domain['tenant_id']))
+
+    def test_create_domain_generated_columns(self):
+        domain = self.create_domain()
+
+        # Ensure the generated columns match those stored in the database
+        stored = self.storage.get_domain(self.admin_context, domain.id)
+
+        for field in ('id', 'version', 'created_at', 'serial', 'status',
+                      'action', 'deleted'):
+            self.assertEqual(stored[field], domain[field])
+
+    def test_update_domain_generated_columns(self):
+        domain = self.create_domain()
+        domain.email = 'updated@example.com'
+
+        domain = self.storage.update_domain(self.admin_context, domain)
+
+        # Ensure the generated columns match those stored in the database
+        stored = self.storage.get_domain(self.admin_context, domain.id)
+
+        self.assertEqual(2, domain.version)
+        self.assertEqual(stored.version, domain.version)
+        self.assertEqual(stored.updated_at, domain.updated_at)
+        self.assertEqual(stored.email, domain.email)
+
+    def test_update_domain_out_of_date(self):
+        domain = self.create_domain()
+        stale = self.storage.get_domain(self.admin_context, domain.id)
+
+        domain.email = 'updated@example.com'
+        self.storage.update_domain(self.admin_context, domain)
+
+        stale.ttl = 1800
+        stale = self.storage.update_domain(self.admin_context, stale)
+
+        # Ensure the change made since the object was read is returned
+        self.assertEqual(3, stale.version)
+        self.assertEqual('updated@example.com', stale.email)
+        self.assertEqual(1800, stale.ttl)
+
+    def test_domain_timestamps_without_microseconds(self):
+        # Patch the class, as central uses its own storage instance
+        with mock.patch.object(self.storage.__class__,
+                               '_supports_microseconds', return_value=False):
+            domain = self.create_domain()
+
+            domain.email = 'updated@example.com'
+            domain = self.storage.update_domain(self.admin_context, domain)
+
+        self.assertEqual(0, domain.created_at.microsecond)
+        self.assertEqual(0, domain.updated_at.microsecond)
+
+    def _setup_replica(self, stale_window):
+        # Use the primary database as its own replica
+        self.config(
+            replica_connections=[cfg.CONF['storage:sqlalchemy'].connection],
+            replica_stale_window=stale_window,
+            group='storage:sqlalchemy')
+
+        session._REPLICA_FACADES.pop('storage:sqlalchemy', None)
+        self.addCleanup(session._REPLICA_FACADES.pop, 'storage:sqlalchemy',
+                        None)
+        self.addCleanup(session._LAST_WRITES.pop, 'storage:sqlalchemy', None)
+
+    def test_read_session_replica(self):
+        self._setup_replica(0)
+
+        domain = self.create_domain()
+
+        self.assertIsNot(self.storage.session, self.storage.read_session)
+        self.assertEqual(domain.id, self.storage.get_domain(
+            self.admin_context, domain.id).id)
+
+    def test_read_session_replica_transaction(self):
+        self._setup_replica(0)
+
+        self.storage.begin()
+        self.addCleanup(self.storage.rollback)
+
+        # Ensure reads within a transaction see its writes
+        self.assertIs(self.storage.session, self.storage.read_session)
+
+    def test_read_session_replica_stale(self):
+        self._setup_replica(60)
+
+        self.assertIsNot(self.storage.session, self.storage.read_session)
+
+        # Ensure reads stay on the primary once it was written to
+        self.create_domain()
+
+        self.assertIs(self.storage.session, self.storage.read_session)
+
+    def test_read_session_replica_read_primary(self):
+        self._setup_replica(0)
+
+        with self.storage.read_primary():
+            self.assertIs(self.storage.session, self.storage.read_session)
+
+            with self.storage.read_primary():
+                self.assertIs(self.storage.session, self.storage.read_session)
+
+            self.assertIs(self.storage.session, self.storage.read_session)
+
+        self.assertIsNot(self.storage.session, self.storage.read_session)
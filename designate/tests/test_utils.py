@@ -13,11 +13,13 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
+import datetime
 import os
 import tempfile
 
 import testtools
 from jinja2 import Template
+from oslo.utils import timeutils
 
 from designate.tests import TestCase
 from designate import exceptions
@@ -87,3 +89,24 @@ class TestUtils(TestCase):
                 self.assertEqual('Hello World', fh.read())
         finally:
             os.unlink(output_path)
+
+    def test_get_paging_keys(self):
+        self.assertEqual(['created_at', 'id'], utils.get_paging_keys())
+        self.assertEqual(['name', 'id'], utils.get_paging_keys('name'))
+        self.assertEqual(['id'], utils.get_paging_keys('id'))
+
+    def test_encode_marker(self):
+        created_at = datetime.datetime(2014, 10, 1, 12, 30, 15, 500)
+
+        marker = utils.encode_marker(['created_at', 'id'], [created_at, 'a'])
+
+        sort_keys, values = utils.decode_marker(marker)
+
+        self.assertEqual(['created_at', 'id'], sort_keys)
+        self.assertEqual(created_at, timeutils.parse_strtime(values[0]))
+        self.assertEqual('a', values[1])
+
+    def test_decode_marker_invalid(self):
+        self.assertIsNone(utils.decode_marker('invalid_marker'))
+        self.assertIsNone(utils.decode_marker(
+            utils.encode_marker(['id'], ['a'])[:-3]))
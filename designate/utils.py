@@ -13,7 +13,9 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
+import base64
 import copy
+import datetime
 import json
 import functools
 import inspect
@@ -274,6 +276,63 @@ def is_uuid_like(val):
         return False
 
 
+def get_paging_keys(sort_key=None):
+    """
+    Get the keys results are sorted by when paging
+
+    The last key is always the unique id, so the position of any row within
+    the results is known from its values for these keys.
+    """
+    sort_key = sort_key or 'created_at'
+
+    if sort_key == 'id':
+        return ['id']
+
+    return [sort_key, 'id']
+
+
+def encode_marker(sort_keys, values):
+    """
+    Build an opaque paging marker for the row with values for sort_keys
+
+    :param sort_keys: The keys returned by get_paging_keys.
+    :param values: The values of the last row of a page for sort_keys.
+    """
+    def _default(value):
+        if isinstance(value, datetime.datetime):
+            return timeutils.strtime(value)
+
+        raise TypeError('%r is not JSON serializable' % value)
+
+    marker = json.dumps({'k': sort_keys, 'v': values}, default=_default,
+                        separators=(',', ':'))
+
+    return base64.urlsafe_b64encode(marker).rstrip('=')
+
+
+def decode_marker(marker):
+    """
+    Get the sort keys and values of a marker built by encode_marker
+
+    Date and time values are returned as strings, in timeutils.strtime's
+    format. Returns None if the marker was not built by encode_marker.
+    """
+    try:
+        marker = str(marker)
+        marker = json.loads(base64.urlsafe_b64decode(
+            marker + '=' * (-len(marker) % 4)))
+
+        sort_keys, values = marker['k'], marker['v']
+    except (TypeError, ValueError, KeyError, UnicodeError):
+        return None
+
+    if (not isinstance(sort_keys, list) or not isinstance(values, list) or
+            len(sort_keys) != len(values)):
+        return None
+
+    return sort_keys, values
+
+
 def validate_uuid(*check):
     """
     A wrapper to ensure that API controller methods arguments are valid UUID's.